@@ -0,0 +1,138 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate
+
+import ssplot
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+try:
+  import lz4.frame
+except ImportError:
+  lz4 = None
+
+
+def compress(src, fmt):
+  """
+  This compresses a plain file into a format, returning the new file name.
+  """
+  writers = {
+    'gzip': ('.gz', lambda name: gzip.open(name, 'wb')),
+    'bz2': ('.bz2', lambda name: bz2.open(name, 'wb')),
+    'xz': ('.xz', lambda name: lzma.open(name, 'wb'))}
+  if zstandard is not None:
+    writers['zstd'] = ('.zst', lambda name: zstandard.open(name, 'wb'))
+  if lz4 is not None:
+    writers['lz4'] = ('.lz4', lambda name: lz4.frame.open(name, 'wb'))
+  if fmt not in writers:
+    return None
+  ext, opener = writers[fmt]
+  dst = src + ext
+  with open(src, 'rb') as ifd, opener(dst) as ofd:
+    shutil.copyfileobj(ifd, ofd, 1 << 20)
+  return dst
+
+
+def time_backend(filename, backend, repeat):
+  """
+  This returns the best time to decompress a whole file with a backend.
+  """
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    with ssplot.InputOpener.open(filename, backend) as fd:
+      while len(fd.read(1 << 20)) > 0:
+        pass
+    best = min(best, time.perf_counter() - start)
+  return best
+
+
+def time_parse(filename):
+  """
+  This returns the time to parse a whole file with the default backend.
+  """
+  start = time.perf_counter()
+  for _ in ssplot.SampleStats.read_chunks(filename):
+    pass
+  return time.perf_counter() - start
+
+
+def main():
+  ap = argparse.ArgumentParser(
+    description='Compare the input opener backends of ssplot')
+  ap.add_argument('--rows', type=int, default=1000000,
+                  help='number of latency samples in the generated file')
+  ap.add_argument('--repeat', type=int, default=3,
+                  help='number of timed repetitions per backend')
+  ap.add_argument('--parse', action='store_true',
+                  help='also time SampleStats parsing of each format')
+  args = ap.parse_args()
+
+  with tempfile.TemporaryDirectory() as tmpdir:
+    plain = os.path.join(tmpdir, 'latency.csv')
+    generate.latency_file(plain, args.rows)
+    size = os.path.getsize(plain) / 1e6
+    print('{:,} rows, {:.1f} MB uncompressed'.format(args.rows, size))
+    print('{:<8} {:<8} {:>10} {:>10} {:>10}'.format(
+      'format', 'backend', 'file MB', 'seconds', 'MB/s'))
+
+    for fmt in ['plain', 'gzip', 'zstd', 'lz4', 'bz2', 'xz']:
+      filename = plain if fmt == 'plain' else compress(plain, fmt)
+      if filename is None:
+        continue
+      fsize = os.path.getsize(filename) / 1e6
+      for backend in ssplot.InputOpener.backends(fmt):
+        secs = time_backend(filename, backend, args.repeat)
+        print('{:<8} {:<8} {:>10.1f} {:>10.3f} {:>10.1f}'.format(
+          fmt, backend, fsize, secs, size / secs))
+      if args.parse:
+        secs = time_parse(filename)
+        print('{:<8} {:<8} {:>10.1f} {:>10.3f} {:>10.1f}'.format(
+          fmt, 'parse', fsize, secs, size / secs))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,116 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+"""
+Compares the render time of latency percentile plots using the percentile axis
+scale of ssplot and the one of the external 'percentile' package (if it is
+installed).
+
+  python3 benchmarks/bench_percentile_scale.py --rows 100000 1000000 10000000
+"""
+
+import argparse
+import io
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy
+import time
+
+import ssplot
+
+try:
+  import percentile
+except ImportError:
+  percentile = None
+
+
+def transform(cdfy, scale, nines):
+  """
+  This returns the time to transform all CDF points with a scale.
+  """
+  fig = plt.figure()
+  axes = fig.add_subplot(1, 1, 1)
+  axes.set_yscale(scale, nines=nines)
+  trans = axes.yaxis.get_transform()
+  plt.close(fig)
+  start = time.perf_counter()
+  trans.transform_non_affine(cdfy)
+  return time.perf_counter() - start
+
+
+def render(cdfx, cdfy, scale, nines):
+  """
+  This returns the time to draw and save a latency percentile plot.
+  """
+  start = time.perf_counter()
+  fig = plt.figure(figsize=ssplot.FigureSize.parse(
+    ssplot.FigureSize.default()))
+  axes = fig.add_subplot(1, 1, 1)
+  axes.set_yscale(scale, nines=nines)
+  axes.set_xlim(cdfx[0], cdfx[-1])
+  axes.set_ylim(0, 1.0 - 10 ** -nines)
+  axes.scatter(cdfx, cdfy, c='b', s=2, rasterized=True)
+  buf = io.BytesIO()
+  fig.savefig(buf, format='png')
+  plt.close(fig)
+  return time.perf_counter() - start
+
+
+def main():
+  ap = argparse.ArgumentParser(
+    description='Compare the percentile axis scales of latency plots')
+  ap.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000],
+                  help='number of CDF points')
+  ap.add_argument('--repeat', type=int, default=3,
+                  help='number of timed repetitions per scale')
+  args = ap.parse_args()
+
+  scales = [ssplot.PercentileScale.name]
+  if percentile is not None:
+    scales.append(percentile.PercentileScale.name)
+  print('{:>12} {:<20} {:>10} {:>10}'.format('points', 'scale', 'transform',
+                                             'render'))
+  for rows in args.rows:
+    rng = numpy.random.default_rng(0)
+    cdfx = numpy.sort(rng.lognormal(3.0, 1.0, rows))
+    cdfy = numpy.linspace(1.0 / rows, 1.0, rows)
+    nines = int(numpy.ceil(numpy.log10(rows)))
+    for scale in scales:
+      tsecs = min(transform(cdfy, scale, nines) for _ in range(args.repeat))
+      rsecs = min(render(cdfx, cdfy, scale, nines)
+                  for _ in range(args.repeat))
+      print('{:>12,} {:<20} {:>10.4f} {:>10.3f}'.format(rows, scale, tsecs,
+                                                       rsecs))
+
+
+if __name__ == '__main__':
+  main()
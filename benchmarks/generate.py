@@ -0,0 +1,226 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+"""
+Deterministic generator of synthetic SuperSim outputs for benchmarking ssplot.
+
+  python3 benchmarks/generate.py <directory> --rows 1000000 --terminals 64
+"""
+
+import argparse
+import gzip
+import numpy
+import os
+
+# the latency fields of SuperSim latency grids (see LoadLatencyStats)
+LATENCY_FIELDS = ['Minimum', 'Mean', 'Median', '90th%', '99th%', '99.9th%',
+                  '99.99th%', '99.999th%', 'Maximum']
+LATENCY_PERCENTS = [50, 90, 99, 99.9, 99.99, 99.999]
+LATENCY_ROWS = ['Packet', 'Message', 'Transaction']
+HOPS_FIELDS = ['AveHops', 'AveMinHops', 'AveNonMinHops', 'PerMinimal',
+               'PerNonMinimal']
+
+# the number of latency rows generated at a time
+CHUNK_ROWS = 1000000
+
+
+def _open(filename):
+  return gzip.open(filename, 'wb') if filename.endswith('.gz') else \
+    open(filename, 'wb')
+
+
+def _write_grid(filename, head, rows, columns, values):
+  lines = [','.join([str(head)] + [str(c) for c in columns])]
+  for row, rvalues in zip(rows, values):
+    lines.append(','.join([str(row)] + ['{:.6g}'.format(v) for v in rvalues]))
+  with _open(filename) as fd:
+    fd.write(('\n'.join(lines) + '\n').encode('utf-8'))
+
+
+def _latency(rng, size, load):
+  # heavy-tailed latencies that grow toward saturation
+  scale = 1.0 / max(0.02, 1.0 - load)
+  body = rng.lognormal(4.0, 0.5, size) * scale
+  tail = rng.pareto(2.5, size) * 20.0 * scale
+  return body + tail
+
+
+def latency_file(filename, rows, load=0.5, seed=0):
+  """
+  This writes a raw latency file with 'rows' samples ordered by start time.
+  The file is written in chunks so that very large files (1e9 rows) can be
+  generated with bounded memory. A '.gz' suffix compresses the file.
+  """
+  rng = numpy.random.default_rng(seed)
+  time = 0.0
+  with _open(filename) as fd:
+    for start in range(0, rows, CHUNK_ROWS):
+      size = min(CHUNK_ROWS, rows - start)
+      starts = time + numpy.cumsum(rng.exponential(10.0, size))
+      time = starts[-1]
+      ends = starts + _latency(rng, size, load)
+      data = numpy.column_stack([starts, ends])
+      numpy.savetxt(fd, data, delimiter=',', fmt='%.3f')
+
+
+def latency_grid(filename, load, seed=0, samples=100000):
+  """
+  This writes a latency GridStats file of one load point.
+  """
+  rng = numpy.random.default_rng(seed)
+  values = []
+  for _ in LATENCY_ROWS:
+    lat = _latency(rng, samples, load)
+    values.append([lat.min(), lat.mean()] +
+                  list(numpy.percentile(lat, LATENCY_PERCENTS)) + [lat.max()])
+  _write_grid(filename, 'Latency', LATENCY_ROWS, LATENCY_FIELDS, values)
+
+
+def rate_grid(filename, load, terminals, seed=0):
+  """
+  This writes a rate GridStats file of one load point with a row per terminal
+  and a final total row.
+  """
+  rng = numpy.random.default_rng(seed)
+  saturation = 0.7
+  injected = numpy.full(terminals, load)
+  delivered = numpy.minimum(injected, saturation) * \
+    rng.uniform(0.97, 1.0, terminals)
+  values = list(zip(injected, delivered))
+  values.append((injected.mean(), delivered.mean()))
+  rows = list(range(terminals)) + ['Total']
+  _write_grid(filename, 'Rate', rows, ['injected', 'delivered'], values)
+
+
+def _hops(rng, load):
+  minimal = max(0.0, 1.0 - load * 0.6 + rng.normal(0, 0.01))
+  ave_min = 3.0 + rng.normal(0, 0.05)
+  ave_non_min = 5.0 + rng.normal(0, 0.05)
+  ave = minimal * ave_min + (1 - minimal) * ave_non_min
+  return [ave, ave_min, ave_non_min, minimal, 1 - minimal]
+
+
+def hops_grid(filename, load, seed=0):
+  """
+  This writes a hops GridStats file of one load point.
+  """
+  rng = numpy.random.default_rng(seed)
+  _write_grid(filename, 'Hops', ['Packet'], HOPS_FIELDS, [_hops(rng, load)])
+
+
+def time_latency_grid(filename, points, seed=0):
+  """
+  This writes a time series latency GridStats file.
+  """
+  rng = numpy.random.default_rng(seed)
+  values = []
+  for idx in range(points):
+    lat = _latency(rng, 1000, 0.3 + 0.4 * idx / points)
+    values.append([lat.min(), lat.mean()] +
+                  list(numpy.percentile(lat, LATENCY_PERCENTS)) + [lat.max()])
+  _write_grid(filename, 'Time', [idx * 1000 for idx in range(points)],
+              LATENCY_FIELDS, values)
+
+
+def time_hops_grid(filename, points, seed=0):
+  """
+  This writes a time series hops GridStats file.
+  """
+  rng = numpy.random.default_rng(seed)
+  values = [_hops(rng, 0.3 + 0.4 * idx / points) for idx in range(points)]
+  _write_grid(filename, 'Time', [idx * 1000 for idx in range(points)],
+              HOPS_FIELDS, values)
+
+
+def sim_info(filename, seed=0):
+  """
+  This writes a simulation info ColumnStats file.
+  """
+  rng = numpy.random.default_rng(seed)
+  with _open(filename) as fd:
+    fd.write('Total sim units,{}\n'.format(
+      int(rng.integers(1000000, 2000000))).encode('utf-8'))
+
+
+def sweep(directory, start, stop, step, terminals, seeds=1, sets=1,
+          name='sweep'):
+  """
+  This writes the latency, rate, and hops GridStats files of load sweeps and
+  returns a dict mapping each kind to its ordered list of files. Files are
+  ordered by data set, then seed, then load.
+  """
+  files = {'latency': [], 'rate': [], 'hops': []}
+  loads = numpy.arange(start, stop, step)
+  for dset in range(sets):
+    for seed in range(seeds):
+      for idx, load in enumerate(loads):
+        key = seed * 1000003 + dset * 1009 + idx
+        base = os.path.join(directory, '{}_{}_{}_{:.3f}'.format(
+          name, dset, seed, load))
+        files['latency'].append(base + '_latency.csv')
+        latency_grid(files['latency'][-1], load * (1 + 0.1 * dset), key)
+        files['rate'].append(base + '_rate.csv')
+        rate_grid(files['rate'][-1], load, terminals, key)
+        files['hops'].append(base + '_hops.csv')
+        hops_grid(files['hops'][-1], load, key)
+  return files
+
+
+def main():
+  ap = argparse.ArgumentParser(
+    description='Generate synthetic SuperSim outputs')
+  ap.add_argument('directory', help='output directory')
+  ap.add_argument('--rows', type=int, default=1000000,
+                  help='number of raw latency samples')
+  ap.add_argument('--gzip', action='store_true',
+                  help='gzip the raw latency file')
+  ap.add_argument('--terminals', type=int, default=64,
+                  help='number of terminals in rate grids')
+  ap.add_argument('--loads', type=int, default=20,
+                  help='number of load points in the sweep')
+  ap.add_argument('--points', type=int, default=1000,
+                  help='number of points in time series grids')
+  args = ap.parse_args()
+
+  os.makedirs(args.directory, exist_ok=True)
+  ext = '.csv.gz' if args.gzip else '.csv'
+  latency_file(os.path.join(args.directory, 'latency' + ext), args.rows)
+  sweep(args.directory, 1.0 / args.loads, 1.0 + 0.5 / args.loads,
+        1.0 / args.loads, args.terminals)
+  time_latency_grid(os.path.join(args.directory, 'time_latency.csv'),
+                    args.points)
+  time_hops_grid(os.path.join(args.directory, 'time_hops.csv'), args.points)
+  for idx in range(4):
+    sim_info(os.path.join(args.directory, 'info_{}.csv'.format(idx)), idx)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,224 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+"""
+End-to-end benchmark of every registered ssplot command on synthetic SuperSim
+outputs. Each command is timed as a whole and split into the stages recorded
+by ssplot.Profiler: 'parse', 'stats', 'draw', 'layout', and 'savefig'.
+
+  python3 benchmarks/run.py --rows 100000 1000000 --output results.json
+"""
+
+import argparse
+import datetime
+import json
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import os
+import platform
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate
+
+import ssplot
+
+
+def make_data(directory, rows, terminals, loads, points):
+  """
+  This generates all inputs and returns a dict describing them.
+  """
+  data = {'rows': rows, 'directory': directory}
+  data['latency'] = os.path.join(directory, 'latency_{}.csv'.format(rows))
+  generate.latency_file(data['latency'], rows)
+  data['start'] = 1.0 / loads
+  data['stop'] = 1.0 + 0.5 / loads
+  data['step'] = 1.0 / loads
+  data['sweep'] = generate.sweep(directory, data['start'], data['stop'],
+                                 data['step'], terminals, sets=2)
+  data['loads'] = len(data['sweep']['latency']) // 2
+  data['raw_sweep'] = []
+  for idx in range(data['loads']):
+    data['raw_sweep'].append(os.path.join(directory, 'raw_{}.csv'.format(idx)))
+    generate.latency_file(data['raw_sweep'][-1],
+                          max(1, rows // data['loads']),
+                          load=data['start'] + idx * data['step'], seed=idx)
+  data['time_latency'] = os.path.join(directory, 'time_latency.csv')
+  generate.time_latency_grid(data['time_latency'], points)
+  data['time_hops'] = os.path.join(directory, 'time_hops.csv')
+  generate.time_hops_grid(data['time_hops'], points)
+  data['info'] = []
+  for idx in range(4):
+    data['info'].append(os.path.join(directory, 'info_{}.csv'.format(idx)))
+    generate.sim_info(data['info'][-1], idx)
+  return data
+
+
+def _sweep_args(data, out):
+  return [out, str(data['start']), str(data['stop']), str(data['step'])]
+
+
+def _first_set(data, kind):
+  return data['sweep'][kind][:data['loads']]
+
+
+# a mapping of command names to functions creating their arguments
+ARGV = {
+  'latency-pdf': lambda d, o: [d['latency'], o],
+  'latency-cdf': lambda d, o: [d['latency'], o],
+  'latency-percentile': lambda d, o: [d['latency'], o],
+  'latency-summary': lambda d, o: [d['latency'], o + '.sketch'],
+  'time-latency-scatter': lambda d, o: [d['latency'], o],
+  'load-latency': lambda d, o: _sweep_args(d, o) + _first_set(d, 'latency'),
+  'load-latency-compare': lambda d, o: (_sweep_args(d, o) +
+                                        d['sweep']['latency']),
+  'load-latency-heatmap': lambda d, o: _sweep_args(d, o) + d['raw_sweep'],
+  'load-percentile': lambda d, o: _sweep_args(d, o) + d['raw_sweep'],
+  'load-rate': lambda d, o: _sweep_args(d, o) + _first_set(d, 'rate'),
+  'load-average-hops': lambda d, o: _sweep_args(d, o) + _first_set(d, 'hops'),
+  'load-percent-minimal': lambda d, o: (_sweep_args(d, o) +
+                                        _first_set(d, 'hops')),
+  'load-rate-percent': lambda d, o: (_sweep_args(d, o) +
+                                     ['--rate_stats'] + _first_set(d, 'rate') +
+                                     ['--hops_stats'] + _first_set(d, 'hops')),
+  'load-panels': lambda d, o: (_sweep_args(d, o) +
+                               ['--latency_stats'] + _first_set(d, 'latency') +
+                               ['--rate_stats'] + _first_set(d, 'rate') +
+                               ['--hops_stats'] + _first_set(d, 'hops')),
+  'time-latency': lambda d, o: [d['time_latency'], o],
+  'time-percentile': lambda d, o: [d['latency'], o, str(d['rows'] / 10.0)],
+  'time-average-hops': lambda d, o: [d['time_hops'], o],
+  'time-percent-minimal': lambda d, o: [d['time_hops'], o],
+  'report': lambda d, o: [d['directory'], os.path.splitext(o)[0]],
+  'simtime-compare': lambda d, o: [o, '2', '2'] + d['info'],
+}
+
+
+def make_parser():
+  # mirrors bin/ssplot
+  ap = argparse.ArgumentParser()
+  sp = ap.add_subparsers(dest='cmd')
+  for cls in ssplot.CommandLine.command_lines():
+    cls.create_parser(sp)
+  return ap
+
+
+def run(ap, name, argv, repeat):
+  """
+  This runs one command 'repeat' times and returns the stage wall times of the
+  fastest run as recorded by ssplot.Profiler.
+  """
+  best = None
+  for _ in range(repeat):
+    args = ap.parse_args([name] + argv)
+    profiler = ssplot.Profiler(trace_memory=False)
+    profiler.start()
+    try:
+      with ssplot.Profiler.stage('command'):
+        args.func(args, plt)
+    finally:
+      profiler.stop()
+      plt.close('all')
+    times = {'total': profiler.stages['command']['wall']}
+    for key, entry in profiler.stages.items():
+      if key.count('/') == 1:
+        times[key.split('/')[1]] = entry['wall']
+    if best is None or times['total'] < best['total']:
+      best = times
+  return best
+
+
+def main():
+  ap = argparse.ArgumentParser(
+    description='Benchmark all ssplot commands end-to-end')
+  ap.add_argument('--rows', type=int, nargs='+', default=[100000],
+                  help='raw latency file sizes to benchmark')
+  ap.add_argument('--terminals', type=int, default=64,
+                  help='number of terminals in rate grids')
+  ap.add_argument('--loads', type=int, default=20,
+                  help='number of load points in sweeps')
+  ap.add_argument('--points', type=int, default=1000,
+                  help='number of points in time series grids')
+  ap.add_argument('--repeat', type=int, default=1,
+                  help='number of timed repetitions per command')
+  ap.add_argument('--format', default='png',
+                  help='plot file format')
+  ap.add_argument('--commands', nargs='+', default=None,
+                  help='only run these commands')
+  ap.add_argument('--output', default=None,
+                  help='JSON results file (default: stdout)')
+  args = ap.parse_args()
+
+  parser = make_parser()
+  results = []
+  names = sorted(cls.NAME for cls in ssplot.CommandLine.command_lines())
+  if args.commands is not None:
+    names = [name for name in names if name in args.commands]
+
+  for rows in args.rows:
+    with tempfile.TemporaryDirectory() as tmpdir:
+      data = make_data(tmpdir, rows, args.terminals, args.loads, args.points)
+      for name in names:
+        result = {'command': name, 'rows': rows}
+        if name not in ARGV:
+          result['skipped'] = 'no benchmark arguments'
+        else:
+          out = os.path.join(tmpdir, '{}.{}'.format(name, args.format))
+          result.update(run(parser, name, ARGV[name](data, out),
+                            args.repeat))
+        results.append(result)
+        print('{:<24} {:>12,} {}'.format(
+          name, rows, result.get('skipped') or
+          '{:.3f}s'.format(result['total'])), file=sys.stderr)
+
+  report = {
+    'ssplot': getattr(ssplot, '__version__', None),
+    'python': platform.python_version(),
+    'matplotlib': matplotlib.__version__,
+    'machine': platform.machine(),
+    'cpus': os.cpu_count(),
+    'timestamp': datetime.datetime.now().isoformat(),
+    'terminals': args.terminals,
+    'loads': args.loads,
+    'points': args.points,
+    'results': results}
+  if args.output is None:
+    json.dump(report, sys.stdout, indent=2)
+    print()
+  else:
+    with open(args.output, 'w') as fd:
+      json.dump(report, fd, indent=2)
+
+
+if __name__ == '__main__':
+  main()
@@ -61,8 +61,9 @@ setup(
   url='http://github.com/nicmcd/ssplot',
   packages=['ssplot'],
   scripts=['bin/ssplot'],
-  install_requires=['percentile >= 1.0.3',
-                    'handycsv >= 4.0.0',
+  install_requires=['handycsv >= 4.0.0',
                     'matplotlib >= 3.3.4',
-                    'numpy >= 1.20.1'],
+                    'numpy >= 1.20.1',
+                    'Pillow >= 7.0.0'],
+  extras_require={'index': ['indexed_gzip']},
 )
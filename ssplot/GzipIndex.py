@@ -0,0 +1,172 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import gzip
+import json
+import os
+
+try:
+  import indexed_gzip
+except ImportError:
+  indexed_gzip = None
+
+class GzipIndex(object):
+  """
+  This class is a random-access index of a gzip compressed latency file. The
+  uncompressed file is split into segments of about 'spacing' bytes that start
+  on line boundaries, and the range of sample times in each segment is
+  recorded. Time window queries only decompress and parse the segments that
+  overlap the window.
+
+  The index is stored in a sidecar file ('<file>.ssidx'). If the optional
+  'indexed_gzip' package is installed, its zran-style decompressor checkpoints
+  are stored in a second sidecar ('<file>.gzidx') so that seeking does not
+  decompress any of the preceding data. Without it, seeking still skips the
+  parsing of the preceding data but has to decompress it.
+  """
+
+  SUFFIX = '.ssidx'
+  ZRAN_SUFFIX = '.gzidx'
+  VERSION = 1
+  DEFAULT_SPACING = 16 << 20
+
+  def __init__(self, filename, spacing=DEFAULT_SPACING):
+    assert spacing > 0, 'spacing must be > 0'
+    self.filename = filename
+    self.spacing = spacing
+    stat = os.stat(filename)
+    self.source_size = stat.st_size
+    self.source_mtime = stat.st_mtime
+    self.length = 0
+    self.offsets = []
+    self.tmins = []
+    self.tmaxs = []
+
+  def add_line(self, offset, length, time):
+    """
+    This adds a line of the uncompressed file to the index while it is built.
+    """
+    if len(self.offsets) == 0 or offset - self.offsets[-1] >= self.spacing:
+      self.offsets.append(offset)
+      self.tmins.append(time)
+      self.tmaxs.append(time)
+    elif time < self.tmins[-1]:
+      self.tmins[-1] = time
+    elif time > self.tmaxs[-1]:
+      self.tmaxs[-1] = time
+    self.length = offset + length
+
+  def ranges(self, tmin=None, tmax=None):
+    """
+    This returns the sorted (start, end) uncompressed byte ranges holding all
+    samples that start within [tmin, tmax].
+    """
+    ranges = []
+    for idx, start in enumerate(self.offsets):
+      if tmin is not None and self.tmaxs[idx] < tmin:
+        continue
+      if tmax is not None and self.tmins[idx] > tmax:
+        continue
+      if idx + 1 < len(self.offsets):
+        end = self.offsets[idx + 1]
+      else:
+        end = self.length
+      if len(ranges) > 0 and ranges[-1][1] == start:
+        ranges[-1] = (ranges[-1][0], end)
+      else:
+        ranges.append((start, end))
+    return ranges
+
+  def is_current(self):
+    """
+    This determines whether the indexed file is unchanged.
+    """
+    try:
+      stat = os.stat(self.filename)
+    except OSError:
+      return False
+    return (stat.st_size == self.source_size and
+            stat.st_mtime == self.source_mtime)
+
+  def write(self):
+    """
+    This writes the index sidecar file(s).
+    """
+    with open(self.filename + GzipIndex.SUFFIX, 'w') as fd:
+      json.dump({
+        'version': GzipIndex.VERSION,
+        'spacing': self.spacing,
+        'source_size': self.source_size,
+        'source_mtime': self.source_mtime,
+        'length': self.length,
+        'offsets': self.offsets,
+        'tmins': self.tmins,
+        'tmaxs': self.tmaxs}, fd)
+    if indexed_gzip is not None:
+      with indexed_gzip.IndexedGzipFile(self.filename,
+                                        spacing=self.spacing) as fd:
+        fd.build_full_index()
+        fd.export_index(self.filename + GzipIndex.ZRAN_SUFFIX)
+
+  @staticmethod
+  def read(filename):
+    """
+    This reads the index of a file. None is returned if the index doesn't exist
+    or is out of date.
+    """
+    try:
+      with open(filename + GzipIndex.SUFFIX, 'r') as fd:
+        obj = json.load(fd)
+    except (OSError, ValueError):
+      return None
+    if obj.get('version') != GzipIndex.VERSION:
+      return None
+    index = GzipIndex(filename, obj['spacing'])
+    index.source_size = obj['source_size']
+    index.source_mtime = obj['source_mtime']
+    index.length = obj['length']
+    index.offsets = obj['offsets']
+    index.tmins = obj['tmins']
+    index.tmaxs = obj['tmaxs']
+    if not index.is_current():
+      return None
+    return index
+
+  @staticmethod
+  def open(filename):
+    """
+    This opens a seekable binary reader of the uncompressed file, using the
+    zran checkpoints when they are available.
+    """
+    zran = filename + GzipIndex.ZRAN_SUFFIX
+    if indexed_gzip is not None and os.path.exists(zran):
+      return indexed_gzip.IndexedGzipFile(filename, index_file=zran)
+    return gzip.open(filename, 'rb')
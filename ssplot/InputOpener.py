@@ -0,0 +1,238 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import bz2
+import concurrent.futures
+import gzip
+import handycsv
+import io
+import lzma
+import shutil
+import subprocess
+
+import ssplot
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+try:
+  import lz4.frame
+except ImportError:
+  lz4 = None
+
+class InputOpener(object):
+  """
+  This class opens (possibly compressed) input files for binary reading. The
+  compression format is detected from the magic bytes of the file or, failing
+  that, from the file extension. Each format has registered backends which are
+  used in order of priority, skipping the ones that aren't available.
+  """
+
+  __magics = [(b'\x1f\x8b', 'gzip'),
+              (b'\x28\xb5\x2f\xfd', 'zstd'),
+              (b'\x04\x22\x4d\x18', 'lz4'),
+              (b'BZh', 'bz2'),
+              (b'\xfd7zXZ\x00', 'xz')]
+  __extensions = {'.gz': 'gzip', '.zst': 'zstd', '.lz4': 'lz4', '.bz2': 'bz2',
+                  '.xz': 'xz'}
+  __backends = {}
+
+  @staticmethod
+  def register_backend(name, fmt, func, available=True, priority=0):
+    """
+    This registers a backend function that opens files of a format. Higher
+    priority backends are preferred.
+    """
+    for backends in InputOpener.__backends.values():
+      assert name not in [b[1] for b in backends], \
+        '{} is already a registered backend'.format(name)
+    backends = InputOpener.__backends.setdefault(fmt, [])
+    backends.append((priority, name, func, available))
+    backends.sort(key=lambda b: -b[0])
+
+  @staticmethod
+  def backends(fmt=None):
+    """
+    This returns the names of the available backends (of a format).
+    """
+    names = []
+    for bfmt, backends in InputOpener.__backends.items():
+      if fmt is None or fmt == bfmt:
+        names.extend(b[1] for b in backends if b[3])
+    return names
+
+  @staticmethod
+  def format(filename):
+    """
+    This determines the compression format of a file ('plain' if none).
+    """
+    with open(filename, 'rb') as fd:
+      head = fd.read(8)
+    for magic, fmt in InputOpener.__magics:
+      if head.startswith(magic):
+        return fmt
+    for ext, fmt in InputOpener.__extensions.items():
+      if filename.endswith(ext):
+        return fmt
+    return 'plain'
+
+  @staticmethod
+  def open(filename, backend=None):
+    """
+    This opens a file for binary reading using the best available backend for
+    its format, or the named backend.
+    """
+    fmt = InputOpener.format(filename)
+    for _, name, func, available in InputOpener.__backends[fmt]:
+      if backend is None and available:
+        return func(filename)
+      if backend == name:
+        if not available:
+          raise ValueError('backend {} is not available'.format(name))
+        return func(filename)
+    raise ValueError('no backend {} for {} files'.format(
+      backend if backend else 'available', fmt))
+
+  @staticmethod
+  def read_text(filename):
+    """
+    This reads a whole file as text.
+    """
+    with InputOpener.open(filename) as fd:
+      return fd.read().decode('utf-8')
+
+  @staticmethod
+  @ssplot.Profiler.staged('parse')
+  def read_grid_stats(filename):
+    """
+    This reads a handycsv.GridStats from a file of any supported format.
+    """
+    csv = handycsv.Csv.load(InputOpener.read_text(filename))
+    csv._source = filename
+    return handycsv.GridStats.make_from_csv(csv)
+
+  @staticmethod
+  @ssplot.Profiler.staged('parse')
+  def read_column_stats(filename):
+    """
+    This reads a handycsv.ColumnStats from a file of any supported format.
+    """
+    csv = handycsv.Csv.load(InputOpener.read_text(filename))
+    csv._source = filename
+    return handycsv.ColumnStats.make_from_csv(csv)
+
+  @staticmethod
+  def read_many(func, filenames, workers=1):
+    """
+    This returns func(filename) for each file (e.g., read_grid_stats), in
+    order, using up to 'workers' processes.
+    """
+    filenames = list(filenames)
+    if workers <= 1 or len(filenames) <= 1:
+      return list(map(func, filenames))
+    chunksize = max(1, len(filenames) // (workers * 4))
+    with ssplot.Profiler.stage('parse'):
+      with concurrent.futures.ProcessPoolExecutor(
+          max_workers=workers) as pool:
+        return list(pool.map(func, filenames, chunksize=chunksize))
+
+
+class ProcessReader(object):
+  """
+  This is a binary reader of the standard output of a decompression process.
+  """
+
+  def __init__(self, args):
+    self._proc = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                  stderr=subprocess.DEVNULL)
+    self._fd = self._proc.stdout
+
+  def read(self, size=-1):
+    return self._fd.read(size)
+
+  def readline(self, size=-1):
+    return self._fd.readline(size)
+
+  def __iter__(self):
+    return iter(self._fd)
+
+  def close(self):
+    if self._proc.poll() is None:
+      # stopped reading early
+      self._proc.kill()
+      self._fd.close()
+      self._proc.wait()
+    else:
+      self._fd.close()
+      if self._proc.returncode != 0:
+        raise IOError('{} failed with code {}'.format(
+          self._proc.args[0], self._proc.returncode))
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+
+def plain(filename):
+  return open(filename, 'rb')
+InputOpener.register_backend('plain', 'plain', plain)
+
+def stdlib_gzip(filename):
+  return gzip.open(filename, 'rb')
+InputOpener.register_backend('gzip', 'gzip', stdlib_gzip)
+
+def process_generator(exe):
+  def process(filename):
+    return ProcessReader([exe, '-dc', filename])
+  return process
+for name, priority in [('igzip', 2), ('pigz', 1)]:
+  InputOpener.register_backend(name, 'gzip', process_generator(name),
+                              shutil.which(name) is not None, priority)
+
+def zstd(filename):
+  return io.BufferedReader(zstandard.open(filename, 'rb'))
+InputOpener.register_backend('zstd', 'zstd', zstd, zstandard is not None)
+
+def lz4_frame(filename):
+  return io.BufferedReader(lz4.frame.open(filename, 'rb'))
+InputOpener.register_backend('lz4', 'lz4', lz4_frame, lz4 is not None)
+
+def stdlib_bz2(filename):
+  return bz2.open(filename, 'rb')
+InputOpener.register_backend('bz2', 'bz2', stdlib_bz2)
+
+def stdlib_xz(filename):
+  return lzma.open(filename, 'rb')
+InputOpener.register_backend('xz', 'xz', stdlib_xz)
@@ -48,8 +48,8 @@ class LatencyPercentile(ssplot.CommandLine):
                                     'distribution plot'))
     sp.set_defaults(func=LatencyPercentile.run_command)
 
-    sp.add_argument('ifile',
-                    help='input latency file')
+    sp.add_argument('ifile', nargs='+',
+                    help='input latency file(s) or latency sketch(es)')
     sp.add_argument('plotfile',
                     help='output plot file')
 
@@ -58,7 +58,10 @@ class LatencyPercentile(ssplot.CommandLine):
   @staticmethod
   def run_command(args, plt):
     # create a sample stats object of latencies
-    lstats = ssplot.SampleStats(args.ifile)
+    lstats = ssplot.LatencyPlot.read_stats(
+      args.ifile, accuracy=args.sketch_accuracy, preview=args.preview,
+      tmin=args.tmin, tmax=args.tmax, time_ordered=args.time_ordered,
+      index=args.gzip_index, workers=args.workers)
 
     # plot
     lp = ssplot.LatencyPlot(plt, LatencyPercentile.NAME, lstats)
@@ -29,6 +29,7 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
+import io
 import math
 import numpy
 
@@ -43,6 +44,9 @@ class LatencyPlot(object):
   __PLOT_TYPES = ['time-latency-scatter', 'latency-pdf', 'latency-cdf',
                   'latency-percentile']
 
+  # the percentiles drawn as lines
+  PERCENTS = [0.50, 0.90, 0.99, 0.999, 0.9999]
+
   @staticmethod
   def add_args(plot_type, parser):
     """
@@ -72,6 +76,51 @@ class LatencyPlot(object):
     parser.add_argument('--gray', type=ssplot.str_to_bool,
                         default='n',
                         help='whether or not to use grayscale colors')
+    parser.add_argument('--preview', type=int,
+                        default=None,
+                        help=('only plot a uniform sample of this many '
+                              'samples for a quick look'))
+    parser.add_argument('--tmin', type=float,
+                        default=None,
+                        help='drop samples that start before this time')
+    parser.add_argument('--tmax', type=float,
+                        default=None,
+                        help='drop samples that start after this time')
+    parser.add_argument('--time_ordered', type=ssplot.str_to_bool,
+                        default='n',
+                        help=('whether or not the input is ordered by time '
+                              '(stops reading after --tmax)'))
+    parser.add_argument('--gzip_index', type=ssplot.str_to_bool,
+                        default='n',
+                        help=('whether or not to use (and build on first read) '
+                              'a random-access index of gzip inputs'))
+    parser.add_argument('--workers', type=int,
+                        default=1,
+                        help='number of processes used to parse each input')
+    parser.add_argument('--rasterize_threshold', type=int,
+                        default=ssplot.RASTERIZE_THRESHOLD,
+                        help=('rasterize plotted data with more points than '
+                              'this in vector outputs (negative to never '
+                              'rasterize)'))
+    parser.add_argument('--raster_dpi', type=int,
+                        default=ssplot.RASTER_DPI,
+                        help='the resolution of rasterized data in vector '
+                        'outputs')
+    if plot_type != 'latency-percentile':
+      parser.add_argument('--bootstrap_confidence', type=float,
+                          default=None,
+                          help=('show bootstrap confidence intervals of the '
+                                'percentile lines at this level (e.g., 0.95), '
+                                'widened by the sketch accuracy for previews '
+                                'and merged inputs'))
+      parser.add_argument('--bootstrap_resamples', type=int,
+                          default=10000,
+                          help='number of bootstrap resamples')
+    if plot_type != 'time-latency-scatter':
+      parser.add_argument('--sketch_accuracy', type=float,
+                          default=ssplot.LatencySketch.DEFAULT_ACCURACY,
+                          help=('relative accuracy used when merging multiple '
+                                'latency files'))
 
     if plot_type == 'time-latency-scatter':
       parser.add_argument('--xmin', type=float,
@@ -161,6 +210,31 @@ class LatencyPlot(object):
     else:
       assert False
 
+  @staticmethod
+  def read_stats(filenames, accuracy=None, preview=None, tmin=None, tmax=None,
+                 time_ordered=False, index=False, workers=1):
+    """
+    This reads the latency statistics of one or more input files. A single raw
+    latency file is read into a 'SampleStats' (sampled if 'preview' is given).
+    Otherwise, all inputs (raw latency files or serialized 'LatencySketch'
+    files) are summarized and merged into one approximate 'SketchStats'. Only
+    samples starting within [tmin, tmax] are read from raw latency files.
+    """
+    if accuracy is None:
+      accuracy = ssplot.LatencySketch.DEFAULT_ACCURACY
+    assert len(filenames) > 0, 'at least one input file is required'
+    if (len(filenames) == 1 and
+        not ssplot.LatencySketch.is_sketch(filenames[0])):
+      return ssplot.SampleStats(filenames[0], preview=preview, tmin=tmin,
+                                tmax=tmax, time_ordered=time_ordered,
+                                index=index, workers=workers,
+                                keep_times=False)
+    sketch = ssplot.LatencySketch(accuracy)
+    for filename in filenames:
+      sketch.merge(ssplot.LatencySketch.load(filename, accuracy, tmin, tmax,
+                                             time_ordered, index, workers))
+    return ssplot.SketchStats(sketch)
+
   def __init__(self, plt, plot_type, stats):
     """
     This constructs a latency plotting object
@@ -171,50 +245,110 @@ class LatencyPlot(object):
     self._stats = stats
 
 
-  def plot(self, plotfile, args):
+  def plot(self, plotfile, args, format=None):
     """
-    This generates the specified plot.
+    This generates the specified plot into a file name or file object.
     """
-    if self._plot_type == 'time-latency-scatter':
-      self._plot_time_latency_scatter(plotfile, args)
-    elif self._plot_type == 'latency-pdf':
-      self._plot_latency_pdf(plotfile, args)
-    elif self._plot_type == 'latency-cdf':
-      self._plot_latency_cdf(plotfile, args)
-    elif self._plot_type == 'latency-percentile':
-      self._plot_latency_percentile(plotfile, args)
-    elif self._plot_type == 'latency-quad':
-      self._plot_latency_quad(plotfile, args)
-    else:
-      assert False
+    fig = self.figure(args)
+    with ssplot.Profiler.stage('savefig'):
+      ssplot.save_figure(fig, plotfile, args.raster_dpi, format)
+    self._plt.close(fig)
+
+  def render(self, args, format='png'):
+    """
+    This renders the specified plot into a BytesIO (positioned at the start).
+    """
+    buf = io.BytesIO()
+    self.plot(buf, args, format)
+    buf.seek(0)
+    return buf
 
-  def _plot_time_latency_scatter(self, plotfile, args):
+  def render_rgba(self, args):
+    """
+    This renders the specified plot into an RGBA NumPy array.
+    """
+    fig = self.figure(args)
+    with ssplot.Profiler.stage('savefig'):
+      rgba = ssplot.figure_rgba(fig)
+    self._plt.close(fig)
+    return rgba
+
+  def figure(self, args):
+    """
+    This returns the laid out Figure of the specified plot. The caller owns (and
+    closes) it.
+    """
+    with ssplot.Profiler.stage('draw'):
+      if self._plot_type == 'time-latency-scatter':
+        fig = self._plot_time_latency_scatter(args)
+      elif self._plot_type == 'latency-pdf':
+        fig = self._plot_latency_pdf(args)
+      elif self._plot_type == 'latency-cdf':
+        fig = self._plot_latency_cdf(args)
+      elif self._plot_type == 'latency-percentile':
+        fig = self._plot_latency_percentile(args)
+      elif self._plot_type == 'latency-quad':
+        fig = self._plot_latency_quad(args)
+      else:
+        assert False
+    with ssplot.Profiler.stage('layout'):
+      fig.tight_layout()
+    return fig
+
+  def _plot_time_latency_scatter(self, args):
     fig = self._plt.figure(figsize=args.figure_size)
     ax1 = fig.add_subplot(1, 1, 1)
     self._gen_time_latency_scatter(ax1, args)
-    fig.tight_layout()
-    fig.savefig(plotfile)
+    if self._stats.sampled:
+      ssplot.sampled_text(ax1, self._stats.size, self._stats.count)
+    return fig
 
-  def _plot_latency_pdf(self, plotfile, args):
+  def _plot_latency_pdf(self, args):
     fig = self._plt.figure(figsize=args.figure_size)
     ax1 = fig.add_subplot(1, 1, 1)
     self._gen_latency_pdf(ax1, args)
-    fig.tight_layout()
-    fig.savefig(plotfile)
+    if self._stats.sampled:
+      ssplot.sampled_text(ax1, self._stats.size, self._stats.count)
+    return fig
 
-  def _plot_latency_cdf(self, plotfile, args):
+  def _plot_latency_cdf(self, args):
     fig = self._plt.figure(figsize=args.figure_size)
     ax1 = fig.add_subplot(1, 1, 1)
     self._gen_latency_cdf(ax1, args)
-    fig.tight_layout()
-    fig.savefig(plotfile)
+    if self._stats.sampled:
+      ssplot.sampled_text(ax1, self._stats.size, self._stats.count)
+    return fig
 
-  def _plot_latency_percentile(self, plotfile, args):
+  def _plot_latency_percentile(self, args):
     fig = self._plt.figure(figsize=args.figure_size)
     ax1 = fig.add_subplot(1, 1, 1)
     self._gen_latency_percentile(ax1, args)
-    fig.tight_layout()
-    fig.savefig(plotfile)
+    if self._stats.sampled:
+      ssplot.sampled_text(ax1, self._stats.size, self._stats.count)
+    return fig
+
+  def _intervals(self, args):
+    # the bootstrap confidence intervals of the percentile lines, if enabled
+    # (seeded so that replots are identical)
+    if args.bootstrap_confidence is None:
+      return None
+    with ssplot.Profiler.stage('bootstrap'):
+      lows, highs = ssplot.bootstrap_percentiles(
+        self._stats, LatencyPlot.PERCENTS, args.bootstrap_confidence,
+        args.bootstrap_resamples, seed=0)
+
+    # sketched percentiles (previews and merged inputs) collapse onto bucket
+    # values, so the intervals are widened by the accuracy of the sketch
+    if self._stats.accuracy is not None:
+      lows = lows * (1 - self._stats.accuracy)
+      highs = highs * (1 + self._stats.accuracy)
+    return lows, highs
+
+  def _interval_text(self, intervals, idx):
+    # the legend text of an interval, marked '~' if approximate
+    return ' {0}[{1:.3f}, {2:.3f}]'.format(
+      '' if self._stats.accuracy is None else '~', intervals[0][idx],
+      intervals[1][idx])
 
   def _gen_time_latency_scatter(self, axes, args):
     # format axes
@@ -267,13 +401,15 @@ class LatencyPlot(object):
       dotsize = 1 if args.figure_size[1] < 8 else 2
       color = '0.5' if args.gray else 'b'
       axes.scatter(self._stats.times, self._stats.samples, c=color,
-                   s=dotsize)
+                   s=dotsize, rasterized=ssplot.rasterize(
+                     self._stats.size, args.rasterize_threshold))
 
       # percentile lines
       if args.show_percentiles:
         pstats = [self._stats.p50, self._stats.p90, self._stats.p99,
                   self._stats.p999, self._stats.p9999]
         labels = ['50th', '90th', '99th', '99.9th', '99.99th']
+        intervals = self._intervals(args)
         color = 'black' if args.gray else 'red'
         ps = ssplot.PlotLineStyle(color, self._plt, len(pstats))
         lines = []
@@ -286,12 +422,17 @@ class LatencyPlot(object):
                       linewidth=ps[idx]['line_width'],
                       marker=ps[idx]['marker_style'],
                       markersize=ps[idx]['marker_size'] * 1.5)[0])
+          if intervals is not None:
+            axes.axhspan(intervals[0][idx], intervals[1][idx],
+                         color=ps[idx]['color'], alpha=0.2, linewidth=0)
 
         # legend
         if args.show_legend:
           unitstr = ' ' + args.latency_units if args.latency_units else ''
           for idx in range(len(labels)):
             labels[idx] += ' ({0:.3f}{1})'.format(pstats[idx], unitstr)
+            if intervals is not None:
+              labels[idx] += self._interval_text(intervals, idx)
           axes.legend(lines, labels,
                       loc=args.legend_location,
                       ncol=args.legend_columns,
@@ -353,6 +494,7 @@ class LatencyPlot(object):
         pstats = [self._stats.p50, self._stats.p90, self._stats.p99,
                   self._stats.p999, self._stats.p9999]
         labels = ['50th', '90th', '99th', '99.9th', '99.99th']
+        intervals = self._intervals(args)
         color = 'gray' if args.gray else 'red'
         ps = ssplot.PlotLineStyle(color, self._plt, len(pstats))
         lines = []
@@ -365,12 +507,17 @@ class LatencyPlot(object):
                       linewidth=ps[idx]['line_width'],
                       marker=ps[idx]['marker_style'],
                       markersize=ps[idx]['marker_size'] * 1.5)[0])
+          if intervals is not None:
+            axes.axvspan(intervals[0][idx], intervals[1][idx],
+                         color=ps[idx]['color'], alpha=0.2, linewidth=0)
 
         # legend
         if args.show_legend:
           unitstr = ' ' + args.latency_units if args.latency_units else ''
           for idx in range(len(labels)):
             labels[idx] += ' ({0:.3f}{1})'.format(pstats[idx], unitstr)
+            if intervals is not None:
+              labels[idx] += self._interval_text(intervals, idx)
           axes.legend(lines, labels,
                       loc=args.legend_location,
                       ncol=args.legend_columns,
@@ -380,7 +527,9 @@ class LatencyPlot(object):
 
       # PDF line
       color = 'k' if args.gray else 'b'
-      axes.plot(self._stats.pdfx[:-1], self._stats.pdfy, c=color, linewidth=1.5)
+      axes.plot(self._stats.pdfx[:-1], self._stats.pdfy, c=color, linewidth=1.5,
+                rasterized=ssplot.rasterize(len(self._stats.pdfy),
+                                            args.rasterize_threshold))
     else:
       ssplot.empty_text(axes, (ppxmax - ppxmin) / 2, (ppymax - ppymin) / 2)
 
@@ -434,8 +583,9 @@ class LatencyPlot(object):
       if args.show_percentiles:
         pstats = [self._stats.p50, self._stats.p90, self._stats.p99,
                   self._stats.p999, self._stats.p9999]
-        percents = [0.50, 0.90, 0.99, 0.999, 0.9999]
+        percents = LatencyPlot.PERCENTS
         labels = ['50th', '90th', '99th', '99.9th', '99.99th']
+        intervals = self._intervals(args)
         color = 'gray' if args.gray else 'red'
         ps = ssplot.PlotLineStyle(color, self._plt, len(pstats))
         lines = []
@@ -450,12 +600,18 @@ class LatencyPlot(object):
                       linewidth=ps[idx]['line_width'],
                       marker=ps[idx]['marker_style'],
                       markersize=ps[idx]['marker_size'] * 1.5)[0])
+          if intervals is not None:
+            axes.fill_betweenx([0, percents[idx]], intervals[0][idx],
+                               intervals[1][idx], color=ps[idx]['color'],
+                               alpha=0.2, linewidth=0)
 
         # legend
         if args.show_legend:
           unitstr = ' ' + args.latency_units if args.latency_units else ''
           for idx in range(len(labels)):
             labels[idx] += ' ({0:.3f}{1})'.format(pstats[idx], unitstr)
+            if intervals is not None:
+              labels[idx] += self._interval_text(intervals, idx)
           axes.legend(lines, labels,
                       loc=args.legend_location,
                       ncol=args.legend_columns,
@@ -465,7 +621,9 @@ class LatencyPlot(object):
 
       # CDF line
       color = 'k' if args.gray else 'b'
-      axes.plot(self._stats.cdfx, self._stats.cdfy, c=color, linewidth=1.5)
+      axes.plot(self._stats.cdfx, self._stats.cdfy, c=color, linewidth=1.5,
+                rasterized=ssplot.rasterize(len(self._stats.cdfx),
+                                            args.rasterize_threshold))
     else:
       ssplot.empty_text(axes, (cpxmax - cpxmin) / 2, (cpymax - cpymin) / 2)
 
@@ -484,7 +642,7 @@ class LatencyPlot(object):
       nines = args.nines
     else:
       nines = self._stats.nines()
-    axes.set_yscale('percentile', nines=nines)
+    axes.set_yscale(ssplot.PercentileScale.name, nines=nines)
 
     # plot bounds
     if self._stats.size > 0:
@@ -513,6 +671,8 @@ class LatencyPlot(object):
     if self._stats.size > 0:
       # create the plot
       color = 'k' if args.gray else 'b'
-      axes.scatter(self._stats.cdfx, self._stats.cdfy, c=color, s=2)
+      axes.scatter(self._stats.cdfx, self._stats.cdfy, c=color, s=2,
+                   rasterized=ssplot.rasterize(len(self._stats.cdfx),
+                                               args.rasterize_threshold))
     else:
       ssplot.empty_text(axes, (lpxmax - lpxmin) / 2, 0.9965)
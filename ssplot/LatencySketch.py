@@ -0,0 +1,366 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import functools
+import gzip
+import json
+import math
+import numpy
+import os
+
+import ssplot
+
+class LatencySketch(object):
+  """
+  This class is a mergeable summary of a latency distribution. Samples are
+  counted in logarithmically sized buckets (in the style of HDR histograms) so
+  that the summaries of separate shards can be built independently and merged
+  by adding bucket counts.
+
+  Error bounds: with a relative accuracy of 'a', bucket i holds the values in
+  (g^(i-1), g^i] where g = (1 + a) / (1 - a). Every value in a bucket is
+  represented by 2 * g^i / (g + 1), which is within a relative error of 'a' of
+  all values in that bucket. A percentile returned by percentile() is therefore
+  within a factor of (1 - a) to (1 + a) of the exact sample returned by
+  SampleStats.percentile() for the same percent. Values closer to zero than
+  MIN_VALUE are counted as zero. The count, minimum, maximum, and mean are
+  exact, and merging summaries adds no error.
+  """
+
+  FORMAT = 'ssplot-latency-sketch'
+  VERSION = 1
+  DEFAULT_ACCURACY = 0.01
+  MIN_VALUE = 1e-9
+  CACHE_SUFFIX = '.sssketch'
+
+  def __init__(self, accuracy=DEFAULT_ACCURACY):
+    assert 0 < accuracy < 1, 'accuracy must be between 0 and 1'
+    self.accuracy = accuracy
+    self._gamma = (1 + accuracy) / (1 - accuracy)
+    self._log_gamma = math.log(self._gamma)
+    self.count = 0
+    self.zeros = 0
+    self.total = 0.0
+    self.smin = None
+    self.smax = None
+    self.tmin = None
+    self.tmax = None
+    self._positive = LatencySketch._empty_store()
+    self._negative = LatencySketch._empty_store()
+
+  def add(self, samples, times=None):
+    """
+    This adds an array of samples (and optionally their times) to the sketch.
+    """
+    samples = numpy.asarray(samples, dtype=float)
+    if samples.size == 0:
+      return
+    self.count += samples.size
+    self.total += float(samples.sum())
+    self.smin = LatencySketch._min(self.smin, float(samples.min()))
+    self.smax = LatencySketch._max(self.smax, float(samples.max()))
+    if times is not None:
+      times = numpy.asarray(times, dtype=float)
+      assert times.size == samples.size, 'times and samples must match'
+      self.tmin = LatencySketch._min(self.tmin, float(times.min()))
+      self.tmax = LatencySketch._max(self.tmax, float(times.max()))
+
+    positive = samples >= LatencySketch.MIN_VALUE
+    negative = samples <= -LatencySketch.MIN_VALUE
+    self.zeros += samples.size - int(numpy.count_nonzero(positive)) - \
+      int(numpy.count_nonzero(negative))
+    self._positive = LatencySketch._merge_stores(
+      self._positive, self._bucket(samples[positive]))
+    self._negative = LatencySketch._merge_stores(
+      self._negative, self._bucket(-samples[negative]))
+
+  def merge(self, other):
+    """
+    This merges another sketch into this sketch.
+    """
+    if not isinstance(other, LatencySketch):
+      raise TypeError('can only merge a LatencySketch')
+    if other.accuracy != self.accuracy:
+      raise ValueError('can not merge sketches with different accuracies '
+                       '({} and {})'.format(self.accuracy, other.accuracy))
+    self.count += other.count
+    self.zeros += other.zeros
+    self.total += other.total
+    self.smin = LatencySketch._min(self.smin, other.smin)
+    self.smax = LatencySketch._max(self.smax, other.smax)
+    self.tmin = LatencySketch._min(self.tmin, other.tmin)
+    self.tmax = LatencySketch._max(self.tmax, other.tmax)
+    self._positive = LatencySketch._merge_stores(self._positive,
+                                                 other._positive)
+    self._negative = LatencySketch._merge_stores(self._negative,
+                                                 other._negative)
+    return self
+
+  def mean(self):
+    """
+    This returns the exact mean of all samples.
+    """
+    if self.count == 0:
+      return float('NaN')
+    return self.total / self.count
+
+  def distribution(self):
+    """
+    This returns the (values, counts) numpy arrays of the non-empty buckets
+    sorted by value. Values are clamped to the exact minimum and maximum.
+    """
+    noffset, ncounts = self._negative
+    poffset, pcounts = self._positive
+    nvalues = -self._value(numpy.arange(noffset, noffset + len(ncounts)))
+    pvalues = self._value(numpy.arange(poffset, poffset + len(pcounts)))
+    values = numpy.concatenate([nvalues[::-1], [0.0], pvalues])
+    counts = numpy.concatenate([ncounts[::-1], [self.zeros], pcounts])
+    keep = counts > 0
+    values = values[keep]
+    counts = counts[keep]
+    if self.count > 0:
+      values = numpy.clip(values, self.smin, self.smax)
+    return values, counts
+
+  def percentile(self, percent):
+    """
+    This function retrieves an approximate sample percentile. See the class
+    documentation for the error bound.
+    """
+    if percent < 0 or percent > 1:
+      raise Exception('percent must be between 0 and 1')
+    if self.count == 0:
+      raise ValueError('percentile of an empty sketch')
+    rank = min(self.count - 1, int(round(percent * self.count)))
+    if rank == 0:
+      return self.smin
+    if rank == self.count - 1:
+      return self.smax
+    values, counts = self.distribution()
+    index = numpy.searchsorted(numpy.cumsum(counts), rank, side='right')
+    return values[index]
+
+  def serialize(self):
+    """
+    This returns the sketch serialized as a JSON string.
+    """
+    return json.dumps({
+      'format': LatencySketch.FORMAT,
+      'version': LatencySketch.VERSION,
+      'accuracy': self.accuracy,
+      'count': self.count,
+      'zeros': self.zeros,
+      'total': self.total,
+      'smin': self.smin,
+      'smax': self.smax,
+      'tmin': self.tmin,
+      'tmax': self.tmax,
+      'positive': [self._positive[0], self._positive[1].tolist()],
+      'negative': [self._negative[0], self._negative[1].tolist()]})
+
+  @staticmethod
+  def deserialize(text):
+    """
+    This constructs a sketch from a string created by serialize().
+    """
+    obj = json.loads(text)
+    if obj.get('format') != LatencySketch.FORMAT:
+      raise ValueError('not a latency sketch')
+    if obj['version'] != LatencySketch.VERSION:
+      raise ValueError('unsupported latency sketch version: {}'.format(
+        obj['version']))
+    sketch = LatencySketch(obj['accuracy'])
+    sketch.count = obj['count']
+    sketch.zeros = obj['zeros']
+    sketch.total = obj['total']
+    sketch.smin = obj['smin']
+    sketch.smax = obj['smax']
+    sketch.tmin = obj['tmin']
+    sketch.tmax = obj['tmax']
+    for name in ['positive', 'negative']:
+      offset, counts = obj[name]
+      setattr(sketch, '_' + name,
+              (offset, numpy.array(counts, dtype=numpy.int64)))
+    return sketch
+
+  def write(self, filename):
+    """
+    This writes the sketch to a file (auto .gz if given).
+    """
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'wb') as fd:
+      fd.write(self.serialize().encode('utf-8'))
+
+  @staticmethod
+  def read(filename):
+    """
+    This reads a sketch from a file written by write().
+    """
+    with ssplot.InputOpener.open(filename) as fd:
+      return LatencySketch.deserialize(fd.read().decode('utf-8'))
+
+  @staticmethod
+  def is_sketch(filename):
+    """
+    This determines whether a file holds a serialized sketch (as opposed to raw
+    latency samples).
+    """
+    with ssplot.InputOpener.open(filename) as fd:
+      return fd.read(1) == b'{'
+
+  @staticmethod
+  def summarize(filename, accuracy=DEFAULT_ACCURACY, tmin=None, tmax=None,
+                time_ordered=False, index=False, workers=1):
+    """
+    This creates a sketch from a raw latency file without holding all samples
+    in memory. The file is split into ranges which are summarized by up to
+    'workers' processes and merged. See SampleStats.read_chunks() for the other
+    arguments.
+    """
+    sketch = LatencySketch(accuracy)
+    for part in ssplot.SampleStats.map_ranges(
+        LatencySketch._summarize_range, filename, workers, index, accuracy,
+        tmin, tmax, time_ordered):
+      sketch.merge(part)
+    return sketch
+
+  @staticmethod
+  @ssplot.Profiler.staged('parse')
+  def load(filename, accuracy=DEFAULT_ACCURACY, tmin=None, tmax=None,
+           time_ordered=False, index=False, workers=1, cache=False):
+    """
+    This reads a serialized sketch or summarizes a raw latency file. Time
+    windows can only be applied to raw latency files. If 'cache' is set, the
+    summary of a raw latency file is kept in a sidecar file
+    ('<file>.sssketch') and reused while the file, the accuracy, the time
+    window, and 'time_ordered' are unchanged.
+    """
+    if LatencySketch.is_sketch(filename):
+      if tmin is not None or tmax is not None:
+        raise ValueError('time windows can not be applied to the latency '
+                         'sketch {}'.format(filename))
+      return LatencySketch.read(filename)
+    if not cache:
+      return LatencySketch.summarize(filename, accuracy, tmin, tmax,
+                                     time_ordered, index, workers)
+
+    # use the cached summary if it is current
+    stat = os.stat(filename)
+    key = {'source_size': stat.st_size, 'source_mtime': stat.st_mtime,
+           'accuracy': accuracy, 'tmin': tmin, 'tmax': tmax,
+           'time_ordered': time_ordered}
+    cachefile = filename + LatencySketch.CACHE_SUFFIX
+    try:
+      with open(cachefile, 'r') as fd:
+        obj = json.load(fd)
+      if obj.get('key') == key:
+        return LatencySketch.deserialize(obj['sketch'])
+    except (OSError, ValueError, KeyError):
+      pass
+
+    # summarize and cache (an unwritable cache is skipped)
+    sketch = LatencySketch.summarize(filename, accuracy, tmin, tmax,
+                                     time_ordered, index, workers)
+    try:
+      with open(cachefile, 'w') as fd:
+        json.dump({'key': key, 'sketch': sketch.serialize()}, fd)
+    except OSError:
+      pass
+    return sketch
+
+  @staticmethod
+  def load_all(filenames, accuracy=DEFAULT_ACCURACY, tmin=None, tmax=None,
+               time_ordered=False, index=False, workers=1, cache=False):
+    """
+    This loads the sketch of each file (see load()), in order, using up to
+    'workers' processes that each summarize whole files.
+    """
+    load = functools.partial(
+      LatencySketch.load, accuracy=accuracy, tmin=tmin, tmax=tmax,
+      time_ordered=time_ordered, index=index, cache=cache)
+    return ssplot.InputOpener.read_many(load, filenames, workers)
+
+  @staticmethod
+  def _summarize_range(filename, byte_range, index, accuracy, tmin, tmax,
+                       time_ordered):
+    # summarizes one range of a raw latency file
+    sketch = LatencySketch(accuracy)
+    for times, samples in ssplot.SampleStats.read_chunks(
+        filename, tmin=tmin, tmax=tmax, time_ordered=time_ordered,
+        index=index, byte_range=byte_range):
+      sketch.add(samples, times)
+    return sketch
+
+  def _bucket(self, values):
+    # converts positive values to a store of bucket counts
+    if values.size == 0:
+      return LatencySketch._empty_store()
+    indices = numpy.ceil(numpy.log(values) / self._log_gamma).astype(
+      numpy.int64)
+    offset = int(indices.min())
+    return offset, numpy.bincount(indices - offset).astype(numpy.int64)
+
+  def _value(self, indices):
+    # the representative value of each bucket index
+    return 2 * numpy.power(self._gamma, indices) / (self._gamma + 1)
+
+  @staticmethod
+  def _empty_store():
+    return 0, numpy.zeros(0, dtype=numpy.int64)
+
+  @staticmethod
+  def _merge_stores(a, b):
+    if len(a[1]) == 0:
+      return b
+    if len(b[1]) == 0:
+      return a
+    offset = min(a[0], b[0])
+    end = max(a[0] + len(a[1]), b[0] + len(b[1]))
+    counts = numpy.zeros(end - offset, dtype=numpy.int64)
+    counts[a[0] - offset : a[0] - offset + len(a[1])] += a[1]
+    counts[b[0] - offset : b[0] - offset + len(b[1])] += b[1]
+    return offset, counts
+
+  @staticmethod
+  def _min(a, b):
+    if a is None:
+      return b
+    if b is None:
+      return a
+    return min(a, b)
+
+  @staticmethod
+  def _max(a, b):
+    if a is None:
+      return b
+    if b is None:
+      return a
+    return max(a, b)
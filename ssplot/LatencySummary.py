@@ -0,0 +1,87 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import ssplot
+
+class LatencySummary(ssplot.CommandLine):
+  """
+  This class is a command line interface to summarize a latency file into a
+  mergeable latency sketch.
+  """
+
+  NAME = 'latency-summary'
+  ALIASES = ['latsum', 'ls']
+
+  @staticmethod
+  def create_parser(subparser):
+    sp = subparser.add_parser(LatencySummary.NAME,
+                              aliases=LatencySummary.ALIASES,
+                              help=('Summarize latency files into a mergeable '
+                                    'latency sketch'))
+    sp.set_defaults(func=LatencySummary.run_command)
+
+    sp.add_argument('ifile', nargs='+',
+                    help='input latency file(s) or latency sketch(es)')
+    sp.add_argument('ofile',
+                    help='output latency sketch file (auto .gz if given)')
+
+    sp.add_argument('--accuracy', type=float,
+                    default=ssplot.LatencySketch.DEFAULT_ACCURACY,
+                    help='relative accuracy of the percentiles')
+    sp.add_argument('--tmin', type=float, default=None,
+                    help='drop samples that start before this time')
+    sp.add_argument('--tmax', type=float, default=None,
+                    help='drop samples that start after this time')
+    sp.add_argument('--time_ordered', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not the inputs are ordered by time '
+                          '(stops reading after --tmax)'))
+    sp.add_argument('--gzip_index', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not to use (and build on first read) a '
+                          'random-access index of gzip inputs'))
+    sp.add_argument('--workers', type=int, default=1,
+                    help='number of processes used to parse each input')
+
+  @staticmethod
+  def run_command(args, plt):
+    # summarize and merge all inputs
+    sketch = ssplot.LatencySketch(args.accuracy)
+    for ifile in args.ifile:
+      sketch.merge(ssplot.LatencySketch.load(
+        ifile, args.accuracy, args.tmin, args.tmax, args.time_ordered,
+        args.gzip_index, args.workers))
+
+    # write the merged sketch
+    sketch.write(args.ofile)
+
+    return 0
+
+
+ssplot.CommandLine.register(LatencySummary)
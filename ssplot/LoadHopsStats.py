@@ -32,6 +32,8 @@
 import handycsv
 import numpy
 
+import ssplot
+
 class LoadHopsStats(object):
   """
   This class holds load versus hops statistics. It is a simple class that
@@ -41,7 +43,11 @@ class LoadHopsStats(object):
   FIELDS = ['AveHops', 'AveMinHops', 'AveNonMinHops', 'PerMinimal',
             'PerNonMinimal']
 
-  def __init__(self, start, stop, step, grids):
+  @ssplot.Profiler.staged('stats')
+  def __init__(self, start, stop, step, grids, seeds=1, confidence=0.95):
+    """
+    The grids hold 'seeds' whole sweeps (see LoadLatencyStats).
+    """
     # save incase someone needs to check these
     self.start = start
     self.stop = stop
@@ -52,15 +58,32 @@ class LoadHopsStats(object):
     assert step > 0, 'step must be > 0.0'
     load = numpy.arange(start, stop, step)
     self.data = {'Load': load}
-    for field in LoadHopsStats.FIELDS:
-      self.data[field] = numpy.empty(len(load), dtype=float)
 
     # verify number of grids
-    assert len(grids) == len(self.data['Load']), 'wrong number of grids'
+    assert seeds >= 1, 'seeds must be >= 1'
+    assert len(grids) == len(load) * seeds, 'wrong number of grids'
 
-    # load data arrays
+    # gather a (loads x seeds x fields) array
+    fields = LoadHopsStats.FIELDS
+    values = numpy.empty((len(grids), len(fields)), dtype=float)
     for idx, grid in enumerate(grids):
       assert isinstance(grid, handycsv.GridStats), 'grids must be GridStats'
-      for key in self.data.keys():
-        if key != 'Load':
-          self.data[key][idx] = grid.get('Packet', key)
+      values[idx] = [grid.get('Packet', field) for field in fields]
+    values = values.reshape(seeds, len(load), len(fields)).transpose(1, 0, 2)
+
+    # reduce across seeds
+    means, lows, highs = ssplot.seed_reduce(values, confidence)
+    self.bands = None if lows is None else {}
+    for fidx, field in enumerate(fields):
+      self.data[field] = means[:, fidx]
+      if lows is not None:
+        self.bands[field] = (lows[:, fidx], highs[:, fidx])
+
+  @staticmethod
+  def accepts(grid):
+    """
+    This returns whether a grid has the row and fields read by this class.
+    """
+    return ('Packet' in grid.row_names() and
+            all(field in grid.column_names()
+                for field in LoadHopsStats.FIELDS))
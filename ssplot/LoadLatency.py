@@ -29,8 +29,6 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
-import handycsv
-
 import ssplot
 
 class LoadLatency(ssplot.CommandLine):
@@ -59,7 +57,9 @@ class LoadLatency(ssplot.CommandLine):
     sp.add_argument('step', type=float,
                     help='load step size')
     sp.add_argument('stats', metavar='F', type=str, nargs='+',
-                    help='stats file to parse')
+                    help=('stats files, directories, glob patterns, or '
+                          '@filelists to parse'))
+    ssplot.SweepIndex.add_args(sp)
 
     sp.add_argument('--latency_units', type=str, default=None,
                     help='latency units')
@@ -77,17 +77,29 @@ class LoadLatency(ssplot.CommandLine):
   @staticmethod
   def run_command(args, plt):
     # read in all stats
-    stats = []
-    for stat in args.stats:
-      gs = handycsv.GridStats.read(stat)
-      stats.append(gs)
+    index = ssplot.SweepIndex.from_args(args, args.stats)
+    stats = ssplot.InputOpener.read_many(ssplot.InputOpener.read_grid_stats,
+                                         index.files, args.workers)
+
+    # plot
+    mlp = LoadLatency.create_plot(args, plt, stats)
+    mlp.apply_args(args, *LoadLatency._SKIP)
+    mlp.plot(args.plotfile)
+
+    return 0
 
+  @staticmethod
+  def create_plot(args, plt, stats):
+    """
+    This creates the MultilinePlot of the stats grids of one sweep (per seed).
+    """
     # create LoadLatency stats object
     llstats = ssplot.LoadLatencyStats(
-      args.start, args.stop, args.step, stats, row=args.row)
+      args.start, args.stop, args.step, stats, row=args.row, seeds=args.seeds,
+      confidence=args.confidence)
 
     # determine the fields to plot
-    fields = ssplot.LoadLatencyStats.FIELDS
+    fields = list(ssplot.LoadLatencyStats.FIELDS)
     if not args.minimum:
       fields.remove('Minimum')
     fields = list(reversed(fields))
@@ -109,10 +121,9 @@ class LoadLatency(ssplot.CommandLine):
     mlp.set_xlabel(xlabel)
     mlp.set_ylabel(ylabel)
     mlp.set_data_labels(fields)
-    mlp.apply_args(args, *LoadLatency._SKIP)
-    mlp.plot(args.plotfile)
-
-    return 0
+    if llstats.bands is not None:
+      mlp.set_bands([llstats.bands[field] for field in fields])
+    return mlp
 
 
 ssplot.CommandLine.register(LoadLatency)
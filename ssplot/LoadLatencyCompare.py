@@ -29,7 +29,6 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
-import handycsv
 import numpy
 
 import ssplot
@@ -61,7 +60,9 @@ class LoadLatencyCompare(ssplot.CommandLine):
     sp.add_argument('step', type=float,
                     help='load step size')
     sp.add_argument('stats', metavar='F', type=str, nargs='+',
-                    help='stats file to parse')
+                    help=('stats files, directories, glob patterns, or '
+                          '@filelists to parse'))
+    ssplot.SweepIndex.add_args(sp)
 
     sp.add_argument('--field', default='Mean',
                     help='the field to be plotted')
@@ -81,28 +82,29 @@ class LoadLatencyCompare(ssplot.CommandLine):
     # check inputs
     assert args.start <= args.stop, 'start must be <= stop'
     assert args.step > 0, 'step must be > 0.0'
-    gridsPerSet = len(numpy.arange(args.start, args.stop, args.step))
-    if len(args.stats) % gridsPerSet != 0:
+    index = ssplot.SweepIndex.from_args(args, args.stats)
+    gridsPerSet = (len(numpy.arange(args.start, args.stop, args.step)) *
+                   args.seeds)
+    if len(index) % gridsPerSet != 0:
       print(('The number of stats file for data set is {0},\n'
              'yet you specified {1} stats files. What gives?')
-            .format(gridsPerSet, len(args.stats)))
+            .format(gridsPerSet, len(index)))
       return -1
-    dataSets = len(args.stats) // gridsPerSet
+    dataSets = len(index) // gridsPerSet
 
     # read in all stats
-    stats = []
-    for stat in args.stats:
-      gs = handycsv.GridStats.read(stat)
-      stats.append(gs)
+    stats = ssplot.InputOpener.read_many(ssplot.InputOpener.read_grid_stats,
+                                         index.files, args.workers)
 
     # create LoadLatency stats objects
     llstats = []
-    for idx in range(dataSets):
+    first = 0
+    for files in index.groups(dataSets):
       # create the LoadLatencyStats object
       llstat = ssplot.LoadLatencyStats(
-        args.start, args.stop, args.step,
-        stats[idx * gridsPerSet : (idx + 1) * gridsPerSet],
-        row=args.row)
+        args.start, args.stop, args.step, stats[first : first + len(files)],
+        row=args.row, seeds=args.seeds, confidence=args.confidence)
+      first += len(files)
 
       # save the object
       llstats.append(llstat)
@@ -126,6 +128,10 @@ class LoadLatencyCompare(ssplot.CommandLine):
     mlp = ssplot.MultilinePlot(plt, xdata, ydatas)
     mlp.set_xlabel(xlabel)
     mlp.set_ylabel(ylabel)
+    if index.sets is not None:
+      mlp.set_data_labels(index.sets)
+    if args.seeds > 1:
+      mlp.set_bands([stat.bands[args.field] for stat in llstats])
     mlp.apply_args(args, *LoadLatencyCompare._SKIP)
     mlp.plot(args.plotfile)
 
@@ -0,0 +1,212 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import matplotlib.colors
+import numpy
+
+import ssplot
+
+class LoadLatencyHeatmap(ssplot.CommandLine):
+  """
+  This class is a command line interface to generate a heatmap of the latency
+  distribution of each load computed from raw latency files.
+  """
+
+  NAME = 'load-latency-heatmap'
+  ALIASES = ['loadlatheat', 'llh']
+
+  @staticmethod
+  def create_parser(subparser):
+    sp = subparser.add_parser(LoadLatencyHeatmap.NAME,
+                              aliases=LoadLatencyHeatmap.ALIASES,
+                              help=('Generate a load vs. latency distribution '
+                                    'heatmap from raw latency files'))
+    sp.set_defaults(func=LoadLatencyHeatmap.run_command)
+
+    sp.add_argument('plotfile', type=str,
+                    help='output plot file')
+    sp.add_argument('start', type=float,
+                    help='starting load value')
+    sp.add_argument('stop', type=float,
+                    help='stopping load value (exclusive)')
+    sp.add_argument('step', type=float,
+                    help='load step size')
+    sp.add_argument('latency', metavar='F', type=str, nargs='+',
+                    help=('raw latency files or latency sketches (or '
+                          'directories, glob patterns, or @filelists), one '
+                          'per load'))
+    ssplot.SweepIndex.add_args(sp, bands=False)
+
+    sp.add_argument('--bins', type=int, default=100,
+                    help='number of log-spaced latency bins')
+    sp.add_argument('--accuracy', type=float,
+                    default=ssplot.LatencySketch.DEFAULT_ACCURACY,
+                    help='relative accuracy of the latency summaries')
+    sp.add_argument('--cache', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not to cache the summary of each raw '
+                          'latency file next to it'))
+    sp.add_argument('--tmin', type=float, default=None,
+                    help='drop samples that start before this time')
+    sp.add_argument('--tmax', type=float, default=None,
+                    help='drop samples that start after this time')
+    sp.add_argument('--time_ordered', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not the inputs are ordered by time '
+                          '(stops reading after --tmax)'))
+    sp.add_argument('--gzip_index', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not to use (and build on first read) a '
+                          'random-access index of gzip inputs'))
+    sp.add_argument('--title', type=str, default=None,
+                    help='the title of the plot')
+    sp.add_argument('--figure_size', type=ssplot.FigureSize.parse,
+                    default=ssplot.FigureSize.default(),
+                    help='the size of the figure (e.g., \'12x6\')')
+    sp.add_argument('--latency_units', type=str, default=None,
+                    help='latency units')
+    sp.add_argument('--load_units', type=str, default='%',
+                    help='load units')
+    sp.add_argument('--ymin', type=float, default=None,
+                    help='the minimum latency of the bins')
+    sp.add_argument('--ymax', type=float, default=None,
+                    help='the maximum latency of the bins')
+    sp.add_argument('--cmap', type=str, default='viridis',
+                    help='the colormap (see Matplotlib docs)')
+    sp.add_argument('--raster_dpi', type=int, default=ssplot.RASTER_DPI,
+                    help='the resolution of the heatmap in vector outputs')
+
+  @staticmethod
+  def run_command(args, plt):
+    # check inputs
+    index = ssplot.SweepIndex.from_args(args, args.latency)
+    loads = numpy.arange(args.start, args.stop, args.step)
+    if len(index) != len(loads) * args.seeds:
+      print('invalid number of latency files, expected {}'.format(
+        len(loads) * args.seeds))
+      return -1
+    assert args.bins > 0, 'bins must be > 0'
+
+    # summarize each file with bounded memory, then merge the seeds
+    sketches = ssplot.LatencySketch.load_all(
+      index.files, args.accuracy, args.tmin, args.tmax, args.time_ordered,
+      args.gzip_index, args.workers, args.cache)
+    merged = []
+    for lidx in range(len(loads)):
+      sketch = ssplot.LatencySketch(sketches[lidx].accuracy)
+      for seed in range(args.seeds):
+        sketch.merge(sketches[seed * len(loads) + lidx])
+      merged.append(sketch)
+
+    # bin the distributions
+    with ssplot.Profiler.stage('stats'):
+      edges, fractions = LoadLatencyHeatmap.histograms(
+        merged, args.bins, args.ymin, args.ymax)
+
+    # plot
+    with ssplot.Profiler.stage('draw'):
+      fig = LoadLatencyHeatmap.create_figure(args, plt, loads, edges,
+                                             fractions)
+    with ssplot.Profiler.stage('layout'):
+      fig.tight_layout()
+    with ssplot.Profiler.stage('savefig'):
+      ssplot.save_figure(fig, args.plotfile, args.raster_dpi)
+    plt.close(fig)
+
+    return 0
+
+  @staticmethod
+  def histograms(sketches, bins, ymin=None, ymax=None):
+    """
+    This bins the positive samples of each sketch into the same log-spaced
+    latency bins. It returns the bin edges and a (bins x sketches) array of the
+    fraction of each sketch's samples in each bin.
+    """
+    # gather the distributions and the latency bounds
+    dists = [s.distribution() for s in sketches]
+    positives = [values[values > 0] for values, _ in dists]
+    positives = [p for p in positives if len(p) > 0]
+    if ymin is None:
+      ymin = min((p[0] for p in positives), default=1.0)
+    if ymax is None:
+      ymax = max((p[-1] for p in positives), default=10.0)
+    assert ymin > 0, 'ymin must be > 0 on a logarithmic axis'
+    if ymax <= ymin:
+      ymax = ymin * 10.0
+    edges = numpy.geomspace(ymin, ymax, bins + 1)
+
+    # rebin the buckets of each sketch
+    fractions = numpy.zeros((bins, len(sketches)))
+    for idx, (sketch, (values, counts)) in enumerate(zip(sketches, dists)):
+      if sketch.count > 0:
+        hist, _ = numpy.histogram(values, bins=edges, weights=counts)
+        fractions[:, idx] = hist / sketch.count
+    return edges, fractions
+
+  @staticmethod
+  def create_figure(args, plt, loads, edges, fractions):
+    """
+    This creates the heatmap figure with one column per load.
+    """
+    fig = plt.figure(figsize=args.figure_size)
+    ax = fig.add_subplot(1, 1, 1)
+
+    # the column edges lie halfway between the loads
+    if len(loads) > 1:
+      mids = (loads[1:] + loads[:-1]) / 2
+      xedges = numpy.concatenate(([2 * loads[0] - mids[0]], mids,
+                                  [2 * loads[-1] - mids[-1]]))
+    else:
+      xedges = numpy.array([loads[0] - 0.5, loads[0] + 0.5])
+
+    # empty bins are left blank
+    data = numpy.ma.masked_less_equal(fractions, 0)
+    if data.count() > 0:
+      norm = matplotlib.colors.LogNorm(vmin=data.min(), vmax=data.max())
+      mesh = ax.pcolormesh(xedges, edges, data, cmap=args.cmap, norm=norm,
+                           rasterized=True)
+      fig.colorbar(mesh, ax=ax, label='Fraction of samples')
+    else:
+      ssplot.empty_text(ax, (xedges[0] + xedges[-1]) / 2,
+                        (edges[0] + edges[-1]) / 2)
+    ax.set_yscale('log')
+    ax.set_xlim(xedges[0], xedges[-1])
+    ax.set_ylim(edges[0], edges[-1])
+
+    # set title and axis labels
+    if args.title != None:
+      ax.set_title(args.title, fontsize=ssplot.PLOT_TITLE_FONTSIZE)
+    ax.set_xlabel('Load ({})'.format(args.load_units))
+    ylabel = 'Latency'
+    if args.latency_units:
+      ylabel += ' ({0})'.format(args.latency_units)
+    ax.set_ylabel(ylabel)
+    return fig
+
+
+ssplot.CommandLine.register(LoadLatencyHeatmap)
@@ -32,6 +32,8 @@
 import handycsv
 import numpy
 
+import ssplot
+
 class LoadLatencyStats(object):
   """
   This class holds load versus latency statistics. It is a simple class that
@@ -41,7 +43,14 @@ class LoadLatencyStats(object):
   FIELDS = ['Minimum', 'Mean', 'Median', '90th%', '99th%', '99.9th%',
             '99.99th%', '99.999th%', 'Maximum']
 
-  def __init__(self, start, stop, step, grids, row='Packet'):
+  @ssplot.Profiler.staged('stats')
+  def __init__(self, start, stop, step, grids, row='Packet', seeds=1,
+               confidence=0.95):
+    """
+    The grids hold 'seeds' whole sweeps, one after the other. The data holds
+    the mean across seeds and, with multiple seeds, the bands hold the lower
+    and upper bounds of the confidence intervals of the means.
+    """
     # save incase someone needs to check these
     self.start = start
     self.stop = stop
@@ -52,16 +61,33 @@ class LoadLatencyStats(object):
     assert step > 0, 'step must be > 0.0'
     load = numpy.arange(start, stop, step)
     self.data = {'Load': load}
-    for field in LoadLatencyStats.FIELDS:
-      self.data[field] = numpy.empty(len(load), dtype=float)
 
     # verify stat row and number of grids
     assert row in ['Packet', 'Message', 'Transaction']
-    assert len(grids) == len(self.data['Load']), 'wrong number of grids'
+    assert seeds >= 1, 'seeds must be >= 1'
+    assert len(grids) == len(load) * seeds, 'wrong number of grids'
 
-    # load data arrays
+    # gather a (loads x seeds x fields) array
+    fields = LoadLatencyStats.FIELDS
+    values = numpy.empty((len(grids), len(fields)), dtype=float)
     for idx, grid in enumerate(grids):
       assert isinstance(grid, handycsv.GridStats), 'grids must be GridStats'
-      for key in self.data.keys():
-        if key != 'Load':
-          self.data[key][idx] = grid.get(row, key)
+      values[idx] = [grid.get(row, field) for field in fields]
+    values = values.reshape(seeds, len(load), len(fields)).transpose(1, 0, 2)
+
+    # reduce across seeds
+    means, lows, highs = ssplot.seed_reduce(values, confidence)
+    self.bands = None if lows is None else {}
+    for fidx, field in enumerate(fields):
+      self.data[field] = means[:, fidx]
+      if lows is not None:
+        self.bands[field] = (lows[:, fidx], highs[:, fidx])
+
+  @staticmethod
+  def accepts(grid, row='Packet'):
+    """
+    This returns whether a grid has the row and fields read by this class.
+    """
+    return (row in grid.row_names() and
+            all(field in grid.column_names()
+                for field in LoadLatencyStats.FIELDS))
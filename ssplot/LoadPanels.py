@@ -0,0 +1,151 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import ssplot
+
+class LoadPanels(ssplot.CommandLine):
+  """
+  This class is a command line interface to generate load vs. latency, rate,
+  and average hops panels of one sweep in a single figure.
+  """
+
+  NAME = 'load-panels'
+  ALIASES = ['loadpanels', 'lps']
+  _SKIP = ('xlabel', 'ylabel', 'data_labels', 'title', 'figure_size', 'ymin',
+           'ymax')
+
+  @staticmethod
+  def create_parser(subparser):
+    sp = subparser.add_parser(LoadPanels.NAME,
+                              aliases=LoadPanels.ALIASES,
+                              help=('Generate load vs. latency, rate, and '
+                                    'hops panels'))
+    sp.set_defaults(func=LoadPanels.run_command)
+
+    sp.add_argument('plotfile', type=str,
+                    help='output plot file')
+    sp.add_argument('start', type=float,
+                    help='starting load value')
+    sp.add_argument('stop', type=float,
+                    help='stopping load value (exclusive)')
+    sp.add_argument('step', type=float,
+                    help='load step size')
+
+    sp.add_argument('--latency_stats', metavar='F', type=str, nargs='+',
+                    help='latency stats files of the latency panel')
+    sp.add_argument('--rate_stats', metavar='F', type=str, nargs='+',
+                    help='rate stats files of the rate panel')
+    sp.add_argument('--hops_stats', metavar='F', type=str, nargs='+',
+                    help='hops stats files of the average hops panel')
+    ssplot.SweepIndex.add_args(sp)
+    for panel in ['latency', 'rate', 'hops']:
+      sp.add_argument('--{}_regex'.format(panel), type=str, default=None,
+                      help=('regex selecting the {} stats files (default: '
+                            '--stats_regex)'.format(panel)))
+    sp.add_argument('--columns', type=int, default=1,
+                    help='number of panel columns')
+    sp.add_argument('--title', type=str,
+                    help='the title of the figure')
+    sp.add_argument('--figure_size', type=ssplot.FigureSize.parse,
+                    help='the size of the figure (e.g., \'12x6\')')
+    sp.add_argument('--latency_units', type=str, default=None,
+                    help='latency units')
+    sp.add_argument('--load_units', type=str, default='%',
+                    help='load units')
+    sp.add_argument('--minimum', type=ssplot.str_to_bool, default='y',
+                    help='whether or not to plot minimum latency')
+    sp.add_argument('--row', default='Packet',
+                    choices=['Packet', 'Message', 'Transaction'],
+                    help='chooses whether to analyze packets, messages, or'
+                    'transactions')
+    sp.add_argument('--ignore_zeros', type=ssplot.str_to_bool, default=False,
+                    help='ignore zeros in rate calculations')
+    sp.add_argument('--non_minimal', type=ssplot.str_to_bool, default='y',
+                    help='whether or not to plot non-minimal hops')
+
+    ssplot.MultilinePlot.add_args(sp, *LoadPanels._SKIP)
+
+  @staticmethod
+  def run_command(args, plt):
+    # determine the panels
+    panels = [(args.latency_stats, args.latency_regex, 'latency',
+               ssplot.LoadLatency,
+               lambda grid: ssplot.LoadLatencyStats.accepts(grid, args.row)),
+              (args.rate_stats, args.rate_regex, 'rate', ssplot.LoadRate,
+               ssplot.LoadRateStats.accepts),
+              (args.hops_stats, args.hops_regex, 'hops',
+               ssplot.LoadAverageHops, ssplot.LoadHopsStats.accepts)]
+    indices = []
+    for files, regex, kind, cls, accepts in panels:
+      if files:
+        index = ssplot.SweepIndex(files, regex or args.stats_regex)
+        index.check_loads(args.start, args.stop, args.step, args.seeds)
+        indices.append((index.files, kind, cls, accepts))
+    panels = indices
+    if len(panels) == 0:
+      print('at least one of --latency_stats, --rate_stats, or --hops_stats '
+            'is required')
+      return -1
+
+    # read in all stats, each file only once
+    unique = list(dict.fromkeys(stat for files, _, _, _ in panels
+                                for stat in files))
+    grids = dict(zip(unique, ssplot.InputOpener.read_many(
+      ssplot.InputOpener.read_grid_stats, unique, args.workers)))
+
+    # check that each panel got stats with the rows and fields it reads
+    for files, kind, _, accepts in panels:
+      for stat in files:
+        if not accepts(grids[stat]):
+          print('{} is not a {} stats file (use --{}_regex)'.format(
+            stat, kind, kind))
+          return -1
+
+    # create the panels sharing the load axis
+    pp = ssplot.PanelPlot(plt, columns=args.columns, sharex=True)
+    for files, _, cls, _ in panels:
+      mlp = cls.create_plot(args, plt, [grids[stat] for stat in files])
+      mlp.apply_args(args, *LoadPanels._SKIP)
+      pp.add(mlp)
+
+    # plot
+    if args.title != None:
+      pp.set_title(args.title)
+    if args.figure_size != None:
+      pp.set_figure_size(args.figure_size)
+    if args.raster_dpi != None:
+      pp.set_raster_dpi(args.raster_dpi)
+    pp.plot(args.plotfile)
+
+    return 0
+
+
+ssplot.CommandLine.register(LoadPanels)
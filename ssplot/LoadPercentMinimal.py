@@ -29,7 +29,6 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
-import handycsv
 import numpy
 
 import ssplot
@@ -60,7 +59,9 @@ class LoadPercentMinimal(ssplot.CommandLine):
     sp.add_argument('step', type=float,
                     help='load step size')
     sp.add_argument('stats', metavar='F', type=str, nargs='+',
-                    help='stats file to parse')
+                    help=('stats files, directories, glob patterns, or '
+                          '@filelists to parse'))
+    ssplot.SweepIndex.add_args(sp)
 
     sp.add_argument('--load_units', type=str, default='%',
                     help='load units')
@@ -70,14 +71,14 @@ class LoadPercentMinimal(ssplot.CommandLine):
   @staticmethod
   def run_command(args, plt):
     # read in all stats
-    stats = []
-    for stat in args.stats:
-      gs = handycsv.GridStats.read(stat)
-      stats.append(gs)
+    index = ssplot.SweepIndex.from_args(args, args.stats)
+    stats = ssplot.InputOpener.read_many(ssplot.InputOpener.read_grid_stats,
+                                         index.files, args.workers)
 
     # create LoadHops stats object
     lhstats = ssplot.LoadHopsStats(
-      args.start, args.stop, args.step, stats)
+      args.start, args.stop, args.step, stats, seeds=args.seeds,
+      confidence=args.confidence)
 
     # determine the fields and data labels to plot
     fields = ['PerMinimal', 'PerNonMinimal']
@@ -98,6 +99,8 @@ class LoadPercentMinimal(ssplot.CommandLine):
     mlp.set_xlabel(xlabel)
     mlp.set_ylabel(ylabel)
     mlp.set_data_labels(labels)
+    if lhstats.bands is not None:
+      mlp.set_bands([lhstats.bands[field] for field in fields])
     mlp.apply_args(args, *LoadPercentMinimal._SKIP)
     mlp.plot(args.plotfile)
 
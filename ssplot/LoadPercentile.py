@@ -0,0 +1,151 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import numpy
+
+import ssplot
+
+class LoadPercentile(ssplot.CommandLine):
+  """
+  This class is a command line interface to generate a load vs. latency plot
+  of arbitrary percentiles computed from raw latency files.
+  """
+
+  NAME = 'load-percentile'
+  ALIASES = ['loadperc', 'lpt']
+  _SKIP = ('xlabel', 'ylabel', 'data_labels')
+
+  PERCENTILES = [50.0, 90.0, 99.0, 99.9, 99.99]
+
+  @staticmethod
+  def create_parser(subparser):
+    sp = subparser.add_parser(LoadPercentile.NAME,
+                              aliases=LoadPercentile.ALIASES,
+                              help=('Generate a load vs. latency percentile '
+                                    'plot from raw latency files'))
+    sp.set_defaults(func=LoadPercentile.run_command)
+
+    sp.add_argument('plotfile', type=str,
+                    help='output plot file')
+    sp.add_argument('start', type=float,
+                    help='starting load value')
+    sp.add_argument('stop', type=float,
+                    help='stopping load value (exclusive)')
+    sp.add_argument('step', type=float,
+                    help='load step size')
+    sp.add_argument('latency', metavar='F', type=str, nargs='+',
+                    help=('raw latency files or latency sketches (or '
+                          'directories, glob patterns, or @filelists), one '
+                          'per load'))
+    ssplot.SweepIndex.add_args(sp)
+
+    sp.add_argument('--percentiles', type=float, action='append',
+                    help=('a percentile to plot (e.g., 99.95), default: {}'
+                          .format(', '.join('{:g}'.format(p) for p in
+                                            LoadPercentile.PERCENTILES))))
+    sp.add_argument('--accuracy', type=float,
+                    default=ssplot.LatencySketch.DEFAULT_ACCURACY,
+                    help='relative accuracy of the percentiles')
+    sp.add_argument('--cache', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not to cache the summary of each raw '
+                          'latency file next to it'))
+    sp.add_argument('--tmin', type=float, default=None,
+                    help='drop samples that start before this time')
+    sp.add_argument('--tmax', type=float, default=None,
+                    help='drop samples that start after this time')
+    sp.add_argument('--time_ordered', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not the inputs are ordered by time '
+                          '(stops reading after --tmax)'))
+    sp.add_argument('--gzip_index', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not to use (and build on first read) a '
+                          'random-access index of gzip inputs'))
+    sp.add_argument('--latency_units', type=str, default=None,
+                    help='latency units')
+    sp.add_argument('--load_units', type=str, default='%',
+                    help='load units')
+
+    ssplot.MultilinePlot.add_args(sp, *LoadPercentile._SKIP)
+
+  @staticmethod
+  def run_command(args, plt):
+    # check inputs
+    index = ssplot.SweepIndex.from_args(args, args.latency)
+    loads = numpy.arange(args.start, args.stop, args.step)
+    if len(index) != len(loads) * args.seeds:
+      print('invalid number of latency files, expected {}'.format(
+        len(loads) * args.seeds))
+      return -1
+    percentiles = args.percentiles or LoadPercentile.PERCENTILES
+    for percentile in percentiles:
+      if not 0 <= percentile <= 100:
+        print('percentiles must be between 0 and 100')
+        return -1
+
+    # summarize each file with bounded memory, one file per process
+    sketches = ssplot.LatencySketch.load_all(
+      index.files, args.accuracy, args.tmin, args.tmax, args.time_ordered,
+      args.gzip_index, args.workers, args.cache)
+
+    # gather a (loads x seeds x percentiles) array
+    values = numpy.full((len(sketches), len(percentiles)), float('NaN'))
+    for idx, sketch in enumerate(sketches):
+      if sketch.count > 0:
+        values[idx] = [sketch.percentile(p / 100.0) for p in percentiles]
+    values = values.reshape(args.seeds, len(loads), len(percentiles)).transpose(
+      1, 0, 2)
+    means, lows, highs = ssplot.seed_reduce(values, args.confidence)
+
+    # the highest percentile first
+    order = sorted(range(len(percentiles)), key=lambda i: percentiles[i],
+                   reverse=True)
+    ydatas = [means[:, pidx] for pidx in order]
+    labels = ['{:g}th%'.format(percentiles[pidx]) for pidx in order]
+
+    # create x and y axis labels
+    xlabel = 'Load ({})'.format(args.load_units)
+    ylabel = 'Latency'
+    if args.latency_units:
+      ylabel += ' ({0})'.format(args.latency_units)
+
+    # plot
+    mlp = ssplot.MultilinePlot(plt, loads, ydatas)
+    mlp.set_xlabel(xlabel)
+    mlp.set_ylabel(ylabel)
+    mlp.set_data_labels(labels)
+    if lows is not None:
+      mlp.set_bands([(lows[:, pidx], highs[:, pidx]) for pidx in order])
+    mlp.apply_args(args, *LoadPercentile._SKIP)
+    mlp.plot(args.plotfile)
+
+    return 0
+
+
+ssplot.CommandLine.register(LoadPercentile)
@@ -29,7 +29,6 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
-import handycsv
 import numpy
 
 import ssplot
@@ -59,7 +58,9 @@ class LoadRate(ssplot.CommandLine):
     sp.add_argument('step', type=float,
                     help='load step size')
     sp.add_argument('stats', metavar='F', type=str, nargs='+',
-                    help='stats file to parse')
+                    help=('stats files, directories, glob patterns, or '
+                          '@filelists to parse'))
+    ssplot.SweepIndex.add_args(sp)
     sp.add_argument('--load_units', type=str, default='%',
                     help='load units')
     sp.add_argument('--ignore_zeros', type=ssplot.str_to_bool, default=False,
@@ -70,14 +71,26 @@ class LoadRate(ssplot.CommandLine):
   @staticmethod
   def run_command(args, plt):
     # read in all stats
-    stats = []
-    for stat in args.stats:
-      gs = handycsv.GridStats.read(stat)
-      stats.append(gs)
+    index = ssplot.SweepIndex.from_args(args, args.stats)
+    stats = ssplot.InputOpener.read_many(ssplot.InputOpener.read_grid_stats,
+                                         index.files, args.workers)
 
+    # plot
+    mlp = LoadRate.create_plot(args, plt, stats)
+    mlp.apply_args(args, *LoadRate._SKIP)
+    mlp.plot(args.plotfile)
+
+    return 0
+
+  @staticmethod
+  def create_plot(args, plt, stats):
+    """
+    This creates the MultilinePlot of the stats grids of one sweep (per seed).
+    """
     # create the LoadRate stats object
     lrstats = ssplot.LoadRateStats(
-      args.start, args.stop, args.step, stats, args.ignore_zeros)
+      args.start, args.stop, args.step, stats, args.ignore_zeros,
+      seeds=args.seeds, confidence=args.confidence)
 
     # determine fields to plot
     fields = ssplot.LoadRateStats.FIELDS
@@ -97,10 +110,9 @@ class LoadRate(ssplot.CommandLine):
     mlp.set_xlabel(xlabel)
     mlp.set_ylabel(ylabel)
     mlp.set_data_labels(fields)
-    mlp.apply_args(args, *LoadRate._SKIP)
-    mlp.plot(args.plotfile)
-
-    return 0
+    if lrstats.bands is not None:
+      mlp.set_bands([lrstats.bands[field] for field in fields])
+    return mlp
 
 
 ssplot.CommandLine.register(LoadRate)
@@ -29,7 +29,6 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
-import handycsv
 import numpy
 
 import ssplot
@@ -62,9 +61,10 @@ class LoadRatePercent(ssplot.CommandLine):
                     help='load step size')
 
     sp.add_argument('--rate_stats', metavar='F', type=str, nargs='+',
-                    help='rate stats file to parse')
+                    help='rate stats files (or directories, globs, @filelists)')
     sp.add_argument('--hops_stats', metavar='F', type=str, nargs='+',
-                    help='hops stats file to parse')
+                    help='hops stats files (or directories, globs, @filelists)')
+    ssplot.SweepIndex.add_args(sp)
     sp.add_argument('--load_units', type=str, default='%',
                     help='load units')
 
@@ -73,24 +73,24 @@ class LoadRatePercent(ssplot.CommandLine):
   @staticmethod
   def run_command(args, plt):
     # read in all rate stats
-    rate_stats = []
-    for stat in args.rate_stats:
-      gs = handycsv.GridStats.read(stat)
-      rate_stats.append(gs)
+    rate_stats = ssplot.InputOpener.read_many(
+      ssplot.InputOpener.read_grid_stats,
+      ssplot.SweepIndex.from_args(args, args.rate_stats).files, args.workers)
 
     # create LoadRate stats object
     lrstats = ssplot.LoadRateStats(
-      args.start, args.stop, args.step, rate_stats)
+      args.start, args.stop, args.step, rate_stats, seeds=args.seeds,
+      confidence=args.confidence)
 
     # read in all hops stats
-    hops_stats = []
-    for stat in args.hops_stats:
-      gs = handycsv.GridStats.read(stat)
-      hops_stats.append(gs)
+    hops_stats = ssplot.InputOpener.read_many(
+      ssplot.InputOpener.read_grid_stats,
+      ssplot.SweepIndex.from_args(args, args.hops_stats).files, args.workers)
 
     # create LoadHops stats object
     lhstats = ssplot.LoadHopsStats(
-      args.start, args.stop, args.step, hops_stats)
+      args.start, args.stop, args.step, hops_stats, seeds=args.seeds,
+      confidence=args.confidence)
 
     # determine the fields and data labels to plot
     fields = ['Mean', 'Minimal', 'NonMinimal']
@@ -115,6 +115,9 @@ class LoadRatePercent(ssplot.CommandLine):
     mlp.set_xlabel(xlabel)
     mlp.set_ylabel(ylabel)
     mlp.set_data_labels(labels)
+    if lrstats.bands is not None:
+      # only the mean rate has a band, the splits are products of means
+      mlp.set_bands([lrstats.bands['Mean'], None, None])
     mlp.apply_args(args, *LoadRatePercent._SKIP)
     mlp.plot(args.plotfile)
 
@@ -33,6 +33,8 @@ import handycsv
 import math
 import numpy
 
+import ssplot
+
 class LoadRateStats(object):
   """
   This class holds load versus rate statistics. It is a simple class that
@@ -41,7 +43,12 @@ class LoadRateStats(object):
 
   FIELDS = ['Minimum', 'Mean', 'Maximum']
 
-  def __init__(self, start, stop, step, grids, ignore_zeros=False):
+  @ssplot.Profiler.staged('stats')
+  def __init__(self, start, stop, step, grids, ignore_zeros=False, seeds=1,
+               confidence=0.95):
+    """
+    The grids hold 'seeds' whole sweeps (see LoadLatencyStats).
+    """
     # check that all the grids are the same size
     for idx, grid in enumerate(grids[1:]):
       assert len(grid.column_names()) == len(grids[0].column_names()), (
@@ -63,13 +70,14 @@ class LoadRateStats(object):
     assert step > 0, 'step must be > 0.0'
     injected = numpy.arange(start, stop, step)
     self.data = {'Injected': injected}
-    for field in LoadRateStats.FIELDS:
-      self.data[field] = numpy.empty(len(injected), dtype=float)
 
     # check number of grids
-    assert len(grids) == len(self.data['Injected']), 'wrong number of grids'
+    assert seeds >= 1, 'seeds must be >= 1'
+    assert len(grids) == len(injected) * seeds, 'wrong number of grids'
 
-    # load data arrays
+    # gather a (loads x seeds x fields) array
+    fields = LoadRateStats.FIELDS
+    values = numpy.empty((len(grids), len(fields)), dtype=float)
     for idx, grid in enumerate(grids):
       assert isinstance(grid, handycsv.GridStats), 'grids must be GridStats'
       # extract delivered
@@ -81,13 +89,30 @@ class LoadRateStats(object):
           delivered.append(value)
           count += 1
 
-
       # compute stats
       minEj = min(delivered)
       meanEj = sum(delivered) / count
       maxEj = max(delivered)
 
       # prepare data
-      self.data['Minimum'][idx] = minEj
-      self.data['Mean'][idx] = meanEj
-      self.data['Maximum'][idx] = maxEj
+      values[idx] = [minEj, meanEj, maxEj]
+    values = values.reshape(seeds, len(injected), len(fields)).transpose(
+      1, 0, 2)
+
+    # reduce across seeds
+    means, lows, highs = ssplot.seed_reduce(values, confidence)
+    self.bands = None if lows is None else {}
+    for fidx, field in enumerate(fields):
+      self.data[field] = means[:, fidx]
+      if lows is not None:
+        self.bands[field] = (lows[:, fidx], highs[:, fidx])
+
+  @staticmethod
+  def accepts(grid):
+    """
+    This returns whether a grid has the terminal rows and 'delivered' column
+    read by this class.
+    """
+    rows = grid.row_names()
+    return ('delivered' in grid.column_names() and len(rows) > 1 and
+            all(term in rows for term in range(len(rows) - 1)))
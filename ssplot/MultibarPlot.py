@@ -28,6 +28,8 @@
  * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
  * POSSIBILITY OF SUCH DAMAGE.
 """
+import io
+import matplotlib.collections
 import matplotlib.ticker
 import math
 import numpy
@@ -77,6 +79,7 @@ class MultibarPlot(object):
     self._legend_title = None
     self._yscale = None
     self._yticklabels_verbose = False
+    self._yerr = None
 
   def set_plot_style(self, value):
     assert value in ssplot.PlotBarStyle.styles(), \
@@ -152,6 +155,22 @@ class MultibarPlot(object):
   def set_yticklabels_verbose(self, value):
     self._yticklabels_verbose = bool(value)
 
+  def set_yerr(self, value):
+    """
+    This sets error bars as either symmetric errors (bars x sets) or lower and
+    upper errors (bars x 2 x sets), given as distances from the bar heights.
+    """
+    if value is None:
+      self._yerr = None
+      return
+    value = numpy.asarray(value, dtype=float)
+    assert value.shape in ((self._num_bars, self._num_sets),
+                           (self._num_bars, 2, self._num_sets)), \
+      'improper yerr shape of {}'.format(value.shape)
+    if value.ndim == 2:
+      value = numpy.stack((value, value), axis=1)
+    self._yerr = value
+
   def set(self, **kwargs):
     for k in kwargs:
       value = kwargs[k]
@@ -273,21 +292,74 @@ class MultibarPlot(object):
         args.yticklabels_verbose != None):
       self.set_yticklabels_verbose(args.yticklabels_verbose)
 
-  def plot(self, plotfile):
+  def plot(self, plotfile, format=None):
+    fig = self.figure()
+    with ssplot.Profiler.stage('savefig'):
+      ssplot.save_figure(fig, plotfile, format=format)
+    self._plt.close(fig)
+
+  def render(self, format='png'):
+    """
+    This renders the plot into a BytesIO (positioned at the start).
+    """
+    buf = io.BytesIO()
+    self.plot(buf, format)
+    buf.seek(0)
+    return buf
+
+  def render_rgba(self):
+    """
+    This renders the plot into an RGBA NumPy array.
+    """
+    fig = self.figure()
+    with ssplot.Profiler.stage('savefig'):
+      rgba = ssplot.figure_rgba(fig)
+    self._plt.close(fig)
+    return rgba
+
+  def figure(self):
+    """
+    This returns the laid out Figure. The caller owns (and closes) it.
+    """
+    with ssplot.Profiler.stage('draw'):
+      fig = self._draw()
+    with ssplot.Profiler.stage('layout'):
+      fig.tight_layout()
+    return fig
+
+  def _draw(self):
     # create figure
     fig = self._plt.figure(figsize=self._figure_size)
     ax = fig.add_subplot(1, 1, 1)
+    self.draw(ax)
+    return fig
 
+  def draw(self, ax, dpi=None):
+    """
+    This draws the plot into an existing Axes (e.g., a panel of a PanelPlot).
+    Bars are not decimated so the output resolution 'dpi' is unused.
+    """
     # create a PlotBarStyle object
     ps = ssplot.PlotBarStyle(self._plot_style, self._plt, self._num_bars)
 
+    # gather all bar heights as a (bars x sets) array
+    heights = numpy.asarray(self._ydatas)
+
+    # determine the extents of the error bars
+    if self._yerr is None:
+      lows = heights
+      highs = heights
+    else:
+      lows = heights - self._yerr[:, 0]
+      highs = heights + self._yerr[:, 1]
+
     # compute plot bounds
     ymin = self._ymin
     ymax = self._ymax
     if ymin == None:
-      ymin = min(map(min, self._ydatas))
+      ymin = numpy.nanmin(lows)
     if ymax == None:
-      ymax = max(map(max, self._ydatas))
+      ymax = numpy.nanmax(highs)
 
     yspan = ymax - ymin
     ymin -= (yspan * self._yauto_frame)
@@ -308,22 +380,40 @@ class MultibarPlot(object):
     ax.set_xticks(set_locs)
     ax.set_xticklabels([str(x) for x in self._xdata])
 
-    # plot the bars
+    # compute the left edge of every bar as a (bars x sets) array
+    lefts = (set_locs - ((bar_width * self._num_bars) / 2) +
+             (numpy.arange(self._num_bars) * bar_width)[:, None])
+    rights = lefts + bar_width
+
+    # plot the bars, one collection of rectangles per bar series
     bar_sets = []
-    for idx, ydata in enumerate(self._ydatas):
+    zeros = numpy.zeros(self._num_sets)
+    for idx in range(self._num_bars):
       # retrieve the plot style info
       style = ps[idx]
 
+      # create the rectangle vertices for this series
+      verts = numpy.stack((
+        numpy.column_stack((lefts[idx], zeros)),
+        numpy.column_stack((lefts[idx], heights[idx])),
+        numpy.column_stack((rights[idx], heights[idx])),
+        numpy.column_stack((rights[idx], zeros))), axis=1)
+
       # create bars for this set
-      bar_sets.append(ax.bar(
-        set_locs - ((bar_width * self._num_bars) / 2) + (idx * bar_width),
-        ydata,
-        bar_width,
-        align='edge',
-        color=style['color'],
-        edgecolor=style['edgecolor'],
-        ecolor=style['ecolor'],
-        hatch=style['hatch']))
+      bar_set = matplotlib.collections.PolyCollection(
+        verts,
+        facecolors=style['color'],
+        edgecolors=style['edgecolor'],
+        hatch=style['hatch'] or None)
+      ax.add_collection(bar_set)
+      bar_sets.append(bar_set)
+
+      # create error bars for this set
+      if self._yerr is not None:
+        ax.errorbar(lefts[idx] + (bar_width / 2.0), heights[idx],
+                    yerr=self._yerr[idx], fmt='none', ecolor=style['ecolor'],
+                    capsize=2.0)
+    ax.autoscale_view()
 
     # set title
     if self._title != None:
@@ -337,37 +427,42 @@ class MultibarPlot(object):
 
     # create legend
     if self._data_labels != None:
-      ax.legend((bar_set[0] for bar_set in bar_sets), self._data_labels,
+      ax.legend(bar_sets, self._data_labels,
                 loc=self._legend_location, ncol=self._legend_columns,
                 title=self._legend_title, fancybox=True, facecolor='white',
                 edgecolor='black', framealpha=1.0)
 
-    # determine if the bar labels can be int or need to be float
-    use_int = True
-    for bar_set in bar_sets:
-      for bar in bar_set:
-        height = bar.get_height()
-        if isinstance(height, numpy.int64) or isinstance(height, int):
-          continue
-        elif isinstance(height, numpy.int64) or isinstance(height, float):
-          if not height.is_integer():
-            use_int = False
-            break
-        else:
-          assert False, f'New type detected: {type(height)}'
-
     # add value labels
     if self._label_bars:
-      for bar_set in bar_sets:
-        for bar in bar_set:
-          height = bar.get_height()
-          if use_int:
-            bar_label = '{}'.format(int(height))
-          else:
-            fmt = '{{:.{}f}}'.format(self._bar_label_precision)
-            bar_label = fmt.format(float(height))
-          ax.text(bar.get_x() + bar.get_width() / 2.0, height,
-                  bar_label, ha='center', va='bottom')
+      # determine if the bar labels can be int or need to be float
+      if heights.dtype.kind in 'iub':
+        use_int = True
+      elif heights.dtype.kind == 'f':
+        use_int = bool(numpy.all(numpy.mod(heights, 1) == 0))
+      else:
+        raise ValueError(f'unsupported bar height type: {heights.dtype}')
+
+      # format all labels at once
+      if use_int:
+        bar_labels = numpy.char.mod('%d', heights)
+      else:
+        bar_labels = numpy.char.mod(
+          '%.{}f'.format(self._bar_label_precision), heights)
+
+      # only labels on the outer bars, the tallest bars, or outside the y
+      # bounds can extend the layout, the rest are skipped by tight_layout
+      in_layout = ((highs >= numpy.nanmax(highs)) | (highs <= ymin) |
+                   (highs >= ymax))
+      in_layout[:, 0] = True
+      in_layout[:, -1] = True
+
+      # emit the labels centered above each bar
+      centers = (lefts + (bar_width / 2.0)).ravel()
+      for x, y, label, layout in zip(
+          centers.tolist(), highs.ravel().tolist(),
+          bar_labels.ravel().tolist(), in_layout.ravel().tolist()):
+        text = ax.text(x, y, label, ha='center', va='bottom')
+        text.set_in_layout(layout)
 
     # set plot bounds
     ax.set_ylim(ymin, ymax)
@@ -417,11 +512,6 @@ class MultibarPlot(object):
       ax.yaxis.set_major_formatter(matplotlib.ticker.ScalarFormatter())
       ax.ticklabel_format(axis='y', style='plain', useOffset=False)
 
-    # generate the plot
-    fig.tight_layout()
-    fig.savefig(plotfile)
-    self._plt.close(fig)
-
 
 MultibarPlot._kwargs = {
   'plot_style': MultibarPlot.set_plot_style,
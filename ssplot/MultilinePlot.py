@@ -28,9 +28,11 @@
  * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
  * POSSIBILITY OF SUCH DAMAGE.
 """
+import io
 import matplotlib.ticker
 import math
 import numbers
+import numpy
 import ssplot
 
 class MultilinePlot(object):
@@ -42,43 +44,10 @@ class MultilinePlot(object):
 
   def __init__(self, plt, xdata, ydatas):
     """
-    This constructs default plot information
+    This constructs default plot information (see set_data())
     """
-    for ydata in ydatas:
-      assert len(xdata) == len(ydata)
-
-    self._x_min_val = None
-    self._x_max_val = None
-    for xval in xdata:
-      if isinstance(xval, numbers.Number):
-        assert not math.isnan(xval), 'xdata can not contain NaN'
-      if self._x_min_val is None or xval < self._x_min_val:
-        self._x_min_val = xval
-      if self._x_max_val is None or xval > self._x_max_val:
-        self._x_max_val = xval
-    if self._x_min_val == None:
-      self._x_min_val = 0
-    if self._x_max_val == None:
-      self._x_max_val = 1
-
-    self._y_min_val = None
-    self._y_max_val = None
-    for ydata in ydatas:
-      for yval in ydata:
-        if not math.isnan(yval):
-          if self._y_min_val is None or yval < self._y_min_val:
-            self._y_min_val = yval
-          if self._y_max_val is None or yval > self._y_max_val:
-            self._y_max_val = yval
-    if self._y_min_val == None:
-      self._y_min_val = 0
-    if self._y_max_val == None:
-      self._y_max_val = 1
-
     self._plt = plt
-    self._xdata = xdata
-    self._ydatas = ydatas
-    self._num_lines = len(self._ydatas)
+    self.set_data(xdata, ydatas)
 
     self._plot_style = ssplot.PlotLineStyle.default()
     self._figure_size = ssplot.FigureSize.parse(ssplot.FigureSize.default())
@@ -106,6 +75,91 @@ class MultilinePlot(object):
     self._yscale = None
     self._xticklabels_verbose = False
     self._yticklabels_verbose = False
+    self._rasterize_threshold = ssplot.RASTERIZE_THRESHOLD
+    self._raster_dpi = ssplot.RASTER_DPI
+    self._decimate = True
+    self._template = False
+    self._kept = None
+
+  def set_data(self, xdata, ydatas):
+    """
+    This sets the plotted data. 'xdata' and each line of 'ydatas' may be
+    sequences or NumPy arrays and 'ydatas' may be a 2-D array with one line per
+    row. Arrays are used without being copied. This clears the bands.
+    """
+    for ydata in ydatas:
+      assert len(xdata) == len(ydata)
+
+    # x bounds (non-numeric values, e.g., row names, are compared as given)
+    xarray = numpy.asarray(xdata)
+    if len(xarray) == 0:
+      self._x_min_val = 0
+      self._x_max_val = 1
+    elif numpy.issubdtype(xarray.dtype, numpy.number):
+      assert not numpy.isnan(xarray).any(), 'xdata can not contain NaN'
+      self._x_min_val = xarray.min()
+      self._x_max_val = xarray.max()
+    else:
+      self._x_min_val = min(xdata)
+      self._x_max_val = max(xdata)
+
+    # y bounds ignoring NaNs (a 2-D array is reduced at once)
+    if isinstance(ydatas, numpy.ndarray) and ydatas.ndim == 2:
+      yarrays = [ydatas.ravel()]
+    else:
+      yarrays = [numpy.asarray(ydata) for ydata in ydatas]
+    self._y_min_val = None
+    self._y_max_val = None
+    for yarray in yarrays:
+      if len(yarray) == 0:
+        continue
+      ymin = numpy.fmin.reduce(yarray)
+      ymax = numpy.fmax.reduce(yarray)
+      if not math.isnan(ymin):
+        if self._y_min_val is None or ymin < self._y_min_val:
+          self._y_min_val = ymin
+        if self._y_max_val is None or ymax > self._y_max_val:
+          self._y_max_val = ymax
+    if self._y_min_val == None:
+      self._y_min_val = 0
+    if self._y_max_val == None:
+      self._y_max_val = 1
+
+    self._xdata = xdata
+    self._ydatas = ydatas
+    self._num_lines = len(self._ydatas)
+    self._bands = None
+    self._band_min_val = None
+    self._band_max_val = None
+
+  def set_bands(self, value):
+    """
+    This sets a shaded band around each line (e.g., a confidence interval) as
+    a list with a (lower, upper) pair of sequences or None for each line.
+    """
+    self._bands = None
+    self._band_min_val = None
+    self._band_max_val = None
+    if value is None:
+      return
+    assert len(value) == self._num_lines, 'bands must be given for each line'
+    self._bands = []
+    for band in value:
+      if band is None:
+        self._bands.append(None)
+        continue
+      lower = numpy.asarray(band[0], dtype=float)
+      upper = numpy.asarray(band[1], dtype=float)
+      assert len(lower) == len(self._xdata) and len(upper) == len(self._xdata)
+      self._bands.append((lower, upper))
+      if len(lower) == 0 or numpy.isnan(lower).all():
+        continue
+      bmin = numpy.nanmin(lower)
+      bmax = numpy.nanmax(upper)
+      if self._band_min_val is None or bmin < self._band_min_val:
+        self._band_min_val = bmin
+      if self._band_max_val is None or bmax > self._band_max_val:
+        self._band_max_val = bmax
 
   def set_plot_style(self, value):
     assert value in ssplot.PlotLineStyle.styles(), \
@@ -206,6 +260,17 @@ class MultilinePlot(object):
   def set_yticklabels_verbose(self, value):
     self._yticklabels_verbose = bool(value)
 
+  def set_rasterize_threshold(self, value):
+    assert isinstance(value, int)
+    self._rasterize_threshold = value
+
+  def set_raster_dpi(self, value):
+    assert value > 0
+    self._raster_dpi = value
+
+  def set_decimate(self, value):
+    self._decimate = bool(value)
+
   def set(self, **kwargs):
     for k in kwargs:
       value = kwargs[k]
@@ -299,6 +364,18 @@ class MultilinePlot(object):
       parser.add_argument('--yticklabels_verbose', type=ssplot.str_to_bool,
                           help='whether or not to turn y-axis ticklabels '
                           'verbose')
+    if 'rasterize_threshold' not in skip:
+      parser.add_argument('--rasterize_threshold', type=int,
+                          help='rasterize lines with more points than this in '
+                          'vector outputs (negative to never rasterize)')
+    if 'raster_dpi' not in skip:
+      parser.add_argument('--raster_dpi', type=int,
+                          help='the resolution of rasterized lines in vector '
+                          'outputs')
+    if 'decimate' not in skip:
+      parser.add_argument('--decimate', type=ssplot.str_to_bool,
+                          help='whether or not to reduce dense lines to the '
+                          'extremes of each pixel column')
 
   def apply_args(self, args, *skip):
     for s in skip:
@@ -357,95 +434,161 @@ class MultilinePlot(object):
     if ('yticklabels_verbose' not in skip and
         args.yticklabels_verbose != None):
       self.set_yticklabels_verbose(args.yticklabels_verbose)
+    if ('rasterize_threshold' not in skip and
+        args.rasterize_threshold != None):
+      self.set_rasterize_threshold(args.rasterize_threshold)
+    if 'raster_dpi' not in skip and args.raster_dpi != None:
+      self.set_raster_dpi(args.raster_dpi)
+    if 'decimate' not in skip and args.decimate != None:
+      self.set_decimate(args.decimate)
+
+  def set_template(self, value):
+    """
+    In template mode plot() keeps the figure so that later plots with the same
+    structure (e.g., after set_data(), set_title(), or set_xmax()) only swap
+    line data, text, and limits. The layout is only recomputed when text
+    changes. Use close() to release the figure.
+    """
+    self._template = bool(value)
+    if not self._template:
+      self.close()
+
+  def close(self):
+    if self._kept is not None:
+      self._plt.close(self._kept['fig'])
+      self._kept = None
+
+  def plot(self, plotfile, format=None):
+    self._output(lambda fig: ssplot.save_figure(fig, plotfile,
+                                                self._raster_dpi, format),
+                 ssplot.output_dpi(self._figure_size[0], plotfile,
+                                   self._raster_dpi, format))
+
+  def render(self, format='png'):
+    """
+    This renders the plot into a BytesIO (positioned at the start).
+    """
+    buf = io.BytesIO()
+    self.plot(buf, format)
+    buf.seek(0)
+    return buf
+
+  def render_rgba(self):
+    """
+    This renders the plot into an RGBA NumPy array.
+    """
+    return self._output(ssplot.figure_rgba,
+                        ssplot.output_dpi(self._figure_size[0]))
+
+  def figure(self):
+    """
+    This returns the laid out Figure. The caller owns (and closes) it.
+    """
+    with ssplot.Profiler.stage('draw'):
+      fig = self._draw()
+    with ssplot.Profiler.stage('layout'):
+      fig.tight_layout()
+    return fig
+
+  def _output(self, func, dpi):
+    # lays out the (kept) figure, with lines decimated for 'dpi', and returns
+    # func(fig)
+    kept = self._kept
+    if (kept is not None and len(self._xdata) > 0 and
+        kept['structure'] == self._structure()):
+      fig = kept['fig']
+      with ssplot.Profiler.stage('draw'):
+        self._update(fig.axes[0], dpi)
+    else:
+      self.close()
+      with ssplot.Profiler.stage('draw'):
+        fig = self._draw(dpi)
+    layout = MultilinePlot._layout_key(fig.axes[0])
+    if kept is None or kept['fig'] is not fig or kept['layout'] != layout:
+      with ssplot.Profiler.stage('layout'):
+        fig.tight_layout()
+      layout = MultilinePlot._layout_key(fig.axes[0])
+    with ssplot.Profiler.stage('savefig'):
+      result = func(fig)
+    if self._template:
+      self._kept = {'fig': fig, 'structure': self._structure(),
+                    'layout': layout}
+    else:
+      self._plt.close(fig)
+    return result
+
+  def _structure(self):
+    # the settings that can't be changed on a kept figure
+    return (self._num_lines, len(self._xdata) > 0, self._data_labels is None,
+            self._plot_style, tuple(self._figure_size), self._xgrid,
+            self._ygrid, self._grid_style, self._xmajor_ticks,
+            self._xminor_ticks, self._ymajor_ticks, self._yminor_ticks,
+            self._legend_location, self._legend_columns, self._legend_title,
+            self._xscale, self._yscale, self._xticklabels_verbose,
+            self._yticklabels_verbose, self._rasterize_threshold,
+            self._decimate)
 
-  def plot(self, plotfile):
+  @staticmethod
+  def _layout_key(ax):
+    # all text that determines the layout
+    key = [ax.get_title(), ax.get_xlabel(), ax.get_ylabel()]
+    legend = ax.get_legend()
+    if legend is not None:
+      key.append(tuple(text.get_text() for text in legend.get_texts()))
+    for axis in [ax.xaxis, ax.yaxis]:
+      ticks = axis.get_major_locator()()
+      key.append(tuple(axis.get_major_formatter().format_ticks(ticks)))
+    return tuple(key)
+
+  def _draw(self, dpi=None):
     # create figure
     fig = self._plt.figure(figsize=self._figure_size)
     ax = fig.add_subplot(1, 1, 1)
+    self.draw(ax, dpi)
+    return fig
 
+  def draw(self, ax, dpi=None):
+    """
+    This draws the plot into an existing Axes (e.g., a panel of a PanelPlot).
+    Dense lines are decimated for the output resolution 'dpi' (the savefig
+    resolution if not given).
+    """
     # create a PlotLineStyle object
     ps = ssplot.PlotLineStyle(self._plot_style, self._plt, self._num_lines)
 
     # compute plot bounds
-    if len(self._xdata) > 0:
-      xmin = self._xmin
-      xmax = self._xmax
-      ymin = self._ymin
-      ymax = self._ymax
-      if xmin == None:
-        xmin = self._x_min_val
-      if xmax == None:
-        xmax = self._x_max_val
-      if ymin == None:
-        ymin = self._y_min_val #min(map(min, self._ydatas))
-      if ymax == None:
-        ymax = self._y_max_val #max(map(max, self._ydatas))
-    else :
-      xmin = 0
-      xmax = 1
-      ymin = 0
-      ymax = 1
-
-    for limit in [xmin, xmax, ymin, ymax]:
-      assert limit != None
-      if isinstance(limit, numbers.Number):
-        assert not math.isnan(limit)
-
-    xspan = xmax - xmin
-    yspan = ymax - ymin
-    xmin -= (xspan * self._xauto_frame)
-    xmax += (xspan * self._xauto_frame)
-    ymin -= (yspan * self._yauto_frame)
-    ymax += (yspan * self._yauto_frame)
-    xspan = xmax - xmin
-    yspan = ymax - ymin
-
-    # figure out where markers should be placed (target 20 markers)
-    if len(self._xdata) > 1 and isinstance(xspan, numbers.Number):
-      mark_every = math.ceil(
-        (int(xspan) / (self._xdata[1] - self._xdata[0])) / 20)
-    else:
-      mark_every = 1
+    xmin, xmax, ymin, ymax, mark_every = self._bounds()
 
     # plot the lines
     if len(self._xdata) > 0:
-      for idx, ydata in enumerate(self._ydatas):
+      for idx, (lxdata, lydata, lmark_every) in enumerate(
+          self._line_data(ax.figure, xmin, xmax, mark_every, dpi)):
         # retrieve the plot style info
         style = ps[idx]
 
         # create line
-        line = ax.plot(self._xdata,
-                       ydata,
+        line = ax.plot(lxdata,
+                       lydata,
                        color=style['color'],
                        linestyle=style['line_style'],
                        linewidth=style['line_width'],
                        marker=style['marker_style'],
                        markersize=style['marker_size'],
-                       markevery=mark_every)[0]
+                       markevery=lmark_every,
+                       rasterized=ssplot.rasterize(
+                         len(lxdata), self._rasterize_threshold))[0]
 
         # set line label
         if self._data_labels != None:
           line.set_label(self._data_labels[idx])
+
+      # shade the bands behind the lines
+      self._draw_bands(ax, ps)
     else:
       ssplot.empty_text(ax, (xmax - xmin) / 2, (ymax - ymin) / 2)
 
-    # set title
-    if self._title != None:
-      ax.set_title(self._title, fontsize=ssplot.PLOT_TITLE_FONTSIZE)
-
-    # set axis labels
-    if self._xlabel != None:
-      ax.set_xlabel(self._xlabel)
-    if self._ylabel != None:
-      ax.set_ylabel(self._ylabel)
-
-    # create legend
-    if len(self._xdata) > 0 and self._data_labels != None:
-      ax.legend(
-        loc=self._legend_location,
-        ncol=self._legend_columns, title=self._legend_title,
-        fancybox=True, facecolor='white', edgecolor='black',
-        framealpha=1.0)
+    # set title, axis labels, and legend
+    self._draw_text(ax)
 
     # set plot bounds
     ax.set_xlim(xmin, xmax)
@@ -529,10 +672,181 @@ class MultilinePlot(object):
       ax.yaxis.set_major_formatter(matplotlib.ticker.ScalarFormatter())
       ax.ticklabel_format(axis='y', style='plain', useOffset=False)
 
-    # generate the plot
-    fig.tight_layout()
-    fig.savefig(plotfile)
-    self._plt.close(fig)
+  def _update(self, ax, dpi):
+    # swap the data, text, and bounds of a kept figure
+    xmin, xmax, ymin, ymax, mark_every = self._bounds()
+    for idx, (line, (lxdata, lydata, lmark_every)) in enumerate(zip(
+        ax.get_lines(),
+        self._line_data(ax.figure, xmin, xmax, mark_every, dpi))):
+      line.set_data(lxdata, lydata)
+      line.set_markevery(lmark_every)
+      line.set_rasterized(ssplot.rasterize(len(lxdata),
+                                           self._rasterize_threshold))
+      if self._data_labels != None:
+        line.set_label(self._data_labels[idx])
+    for collection in list(ax.collections):
+      if collection.get_gid() == 'band':
+        collection.remove()
+    self._draw_bands(
+      ax, ssplot.PlotLineStyle(self._plot_style, self._plt, self._num_lines))
+    self._draw_text(ax)
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+
+  def _draw_bands(self, ax, ps):
+    # shades the bands in the colors of their lines
+    if self._bands is None:
+      return
+    for idx, band in enumerate(self._bands):
+      if band is None:
+        continue
+      ax.fill_between(self._xdata, band[0], band[1], color=ps[idx]['color'],
+                      alpha=0.25, linewidth=0, zorder=1, gid='band',
+                      rasterized=ssplot.rasterize(
+                        len(self._xdata), self._rasterize_threshold))
+
+  def _draw_text(self, ax):
+    # set title
+    if self._title != None:
+      ax.set_title(self._title, fontsize=ssplot.PLOT_TITLE_FONTSIZE)
+    elif ax.get_title():
+      ax.set_title('')
+
+    # set axis labels
+    if self._xlabel != None:
+      ax.set_xlabel(self._xlabel)
+    elif ax.get_xlabel():
+      ax.set_xlabel('')
+    if self._ylabel != None:
+      ax.set_ylabel(self._ylabel)
+    elif ax.get_ylabel():
+      ax.set_ylabel('')
+
+    # create legend
+    if len(self._xdata) > 0 and self._data_labels != None:
+      ax.legend(
+        loc=self._legend_location,
+        ncol=self._legend_columns, title=self._legend_title,
+        fancybox=True, facecolor='white', edgecolor='black',
+        framealpha=1.0)
+
+  def _bounds(self):
+    # compute plot bounds
+    if len(self._xdata) > 0:
+      xmin = self._xmin
+      xmax = self._xmax
+      ymin = self._ymin
+      ymax = self._ymax
+      if xmin == None:
+        xmin = self._x_min_val
+      if xmax == None:
+        xmax = self._x_max_val
+      if ymin == None:
+        ymin = self._y_min_val #min(map(min, self._ydatas))
+        if self._band_min_val is not None:
+          ymin = min(ymin, self._band_min_val)
+      if ymax == None:
+        ymax = self._y_max_val #max(map(max, self._ydatas))
+        if self._band_max_val is not None:
+          ymax = max(ymax, self._band_max_val)
+    else :
+      xmin = 0
+      xmax = 1
+      ymin = 0
+      ymax = 1
+
+    for limit in [xmin, xmax, ymin, ymax]:
+      assert limit != None
+      if isinstance(limit, numbers.Number):
+        assert not math.isnan(limit)
+
+    xspan = xmax - xmin
+    yspan = ymax - ymin
+    xmin -= (xspan * self._xauto_frame)
+    xmax += (xspan * self._xauto_frame)
+    ymin -= (yspan * self._yauto_frame)
+    ymax += (yspan * self._yauto_frame)
+    xspan = xmax - xmin
+    yspan = ymax - ymin
+
+    # figure out where markers should be placed (target 20 markers)
+    if len(self._xdata) > 1 and isinstance(xspan, numbers.Number):
+      mark_every = math.ceil(
+        (int(xspan) / (self._xdata[1] - self._xdata[0])) / 20)
+    else:
+      mark_every = 1
+
+    return xmin, xmax, ymin, ymax, mark_every
+
+  def _line_data(self, fig, xmin, xmax, mark_every, dpi=None):
+    # yields the x data, y data, and markevery of each line to be drawn
+    # find the pixel column of each x value at 'dpi' for decimation
+    buckets = None
+    if self._decimate:
+      if dpi is None:
+        dpi = matplotlib.rcParams['savefig.dpi']
+      if not isinstance(dpi, numbers.Number):
+        dpi = fig.dpi
+      buckets = MultilinePlot._buckets(
+        self._xdata, xmin, xmax, self._xscale,
+        int(math.ceil(self._figure_size[0] * dpi)))
+    if buckets is not None:
+      marks = numpy.arange(0, len(self._xdata), max(1, mark_every))
+      xdata = numpy.asarray(self._xdata)
+
+    for ydata in self._ydatas:
+      # reduce the line keeping the marker cadence
+      if buckets is not None:
+        keep = MultilinePlot._decimate(buckets, ydata, marks)
+        yield (xdata[keep], numpy.asarray(ydata)[keep],
+               list(numpy.searchsorted(keep, marks)))
+      else:
+        yield self._xdata, ydata, mark_every
+
+  @staticmethod
+  def _buckets(xdata, xmin, xmax, xscale, pixels):
+    """
+    This returns the pixel column of each x value or None if the data is too
+    sparse or not sorted numeric data on a linear or logarithmic axis.
+    """
+    x = numpy.asarray(xdata)
+    if len(x) <= 4 * pixels or not numpy.issubdtype(x.dtype, numpy.number):
+      return None
+    if xscale != None and xscale.startswith('log'):
+      if x[0] <= 0 or xmin <= 0:
+        return None
+      x = numpy.log10(x)
+      xmin = math.log10(xmin)
+      xmax = math.log10(xmax)
+    elif xscale != None and xscale != 'linear':
+      return None
+    if not xmax > xmin or (numpy.diff(x) < 0).any():
+      return None
+    return numpy.floor((x - xmin) * (pixels / (xmax - xmin))).astype(int)
+
+  @staticmethod
+  def _decimate(buckets, ydata, marks):
+    """
+    This returns the sorted indices of the points to draw: the first, last,
+    minimum, and maximum point of each pixel column, the start of each NaN gap,
+    and the marker points.
+    """
+    y = numpy.asarray(ydata, dtype=float)
+    starts = numpy.concatenate(
+      ([0], numpy.flatnonzero(numpy.diff(buckets)) + 1))
+    ends = numpy.append(starts[1:], len(y)) - 1
+    ids = numpy.repeat(numpy.arange(len(starts)), ends - starts + 1)
+    keep = [starts, ends, marks]
+    for extreme in [numpy.fmin.reduceat(y, starts),
+                    numpy.fmax.reduceat(y, starts)]:
+      # the first point of each column equal to its extreme
+      found = numpy.flatnonzero(y == extreme[ids])
+      first = numpy.ones(len(found), dtype=bool)
+      first[1:] = ids[found[1:]] != ids[found[:-1]]
+      keep.append(found[first])
+    nans = numpy.isnan(y)
+    keep.append(numpy.flatnonzero(nans[1:] & ~nans[:-1]) + 1)
+    return numpy.unique(numpy.concatenate(keep))
 
 
 MultilinePlot._kwargs = {
@@ -560,5 +874,10 @@ MultilinePlot._kwargs = {
   'xscale': MultilinePlot.set_xscale,
   'yscale': MultilinePlot.set_yscale,
   'xticklabels_verbose': MultilinePlot.set_xticklabels_verbose,
-  'yticklabels_verbose': MultilinePlot.set_yticklabels_verbose
+  'yticklabels_verbose': MultilinePlot.set_yticklabels_verbose,
+  'rasterize_threshold': MultilinePlot.set_rasterize_threshold,
+  'raster_dpi': MultilinePlot.set_raster_dpi,
+  'decimate': MultilinePlot.set_decimate,
+  'template': MultilinePlot.set_template,
+  'bands': MultilinePlot.set_bands
 }
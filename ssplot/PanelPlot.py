@@ -0,0 +1,138 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import io
+import math
+
+import ssplot
+
+class PanelPlot(object):
+  """
+  This class lays out multiple 'MultilinePlot' and 'MultibarPlot' panels in a
+  grid within one figure. The figure is laid out and saved once. Panels are
+  placed in row-major order and, with shared axes, only the outer panels show
+  the shared tick labels and axis labels.
+  """
+
+  def __init__(self, plt, columns=1, sharex=False, sharey=False):
+    """
+    This constructs an empty panel plot
+    """
+    assert columns > 0, 'there must be at least one column'
+    self._plt = plt
+    self._columns = columns
+    self._sharex = sharex
+    self._sharey = sharey
+    self._panels = []
+    self._figure_size = ssplot.FigureSize.parse(ssplot.FigureSize.default())
+    self._title = None
+    self._raster_dpi = ssplot.RASTER_DPI
+
+  def add(self, panel):
+    """
+    This adds a panel (anything with a draw(ax) function).
+    """
+    self._panels.append(panel)
+
+  def set_figure_size(self, value):
+    self._figure_size = ssplot.FigureSize.parse(value)
+
+  def set_title(self, value):
+    self._title = value
+
+  def set_raster_dpi(self, value):
+    assert value > 0
+    self._raster_dpi = value
+
+  def figure(self, dpi=None):
+    """
+    This returns the laid out Figure, with the lines of the panels decimated for
+    the output resolution 'dpi' (see MultilinePlot.draw()). The caller owns (and
+    closes) it.
+    """
+    assert len(self._panels) > 0, 'there must be at least one panel'
+    count = len(self._panels)
+    columns = min(self._columns, count)
+    rows = int(math.ceil(count / columns))
+
+    with ssplot.Profiler.stage('draw'):
+      # create the figure and grid of axes
+      fig, axes = self._plt.subplots(
+        rows, columns, figsize=self._figure_size, squeeze=False,
+        sharex=self._sharex, sharey=self._sharey)
+      axes = [ax for row in axes for ax in row]
+      for ax in axes[count:]:
+        fig.delaxes(ax)
+
+      # draw each panel
+      for idx, panel in enumerate(self._panels):
+        ax = axes[idx]
+        panel.draw(ax, dpi)
+        if self._sharex and idx + columns < count:
+          ax.set_xlabel('')
+          ax.tick_params(labelbottom=False)
+        if self._sharey and idx % columns != 0:
+          ax.set_ylabel('')
+          ax.tick_params(labelleft=False)
+
+      # set title
+      if self._title != None:
+        fig.suptitle(self._title, fontsize=ssplot.PLOT_TITLE_FONTSIZE)
+
+    with ssplot.Profiler.stage('layout'):
+      fig.tight_layout()
+    return fig
+
+  def plot(self, plotfile, format=None):
+    fig = self.figure(ssplot.output_dpi(self._figure_size[0], plotfile,
+                                        self._raster_dpi, format))
+    with ssplot.Profiler.stage('savefig'):
+      ssplot.save_figure(fig, plotfile, self._raster_dpi, format)
+    self._plt.close(fig)
+
+  def render(self, format='png'):
+    """
+    This renders the plot into a BytesIO (positioned at the start).
+    """
+    buf = io.BytesIO()
+    self.plot(buf, format)
+    buf.seek(0)
+    return buf
+
+  def render_rgba(self):
+    """
+    This renders the plot into an RGBA NumPy array.
+    """
+    fig = self.figure(ssplot.output_dpi(self._figure_size[0]))
+    with ssplot.Profiler.stage('savefig'):
+      rgba = ssplot.figure_rgba(fig)
+    self._plt.close(fig)
+    return rgba
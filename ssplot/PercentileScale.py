@@ -0,0 +1,147 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import functools
+import numpy
+from matplotlib import scale as mscale
+from matplotlib import ticker as mticker
+from matplotlib import transforms as mtransforms
+
+class PercentileScale(mscale.ScaleBase):
+  """
+  This class is an axis scale of percentiles (given as fractions) where each
+  nine takes the same space, i.e., y maps to -log10(1 - y). The axis shows
+  'nines' nines (0 to 0.99999 for 5). Values beyond 1 - 10^-(nines + 1) are
+  placed just past the top of the axis, so the whole transform is a single
+  vectorized NumPy expression without masked arrays.
+
+    axes.set_yscale(ssplot.PercentileScale.name, nines=5)
+  """
+
+  name = 'ssplot-percentile'
+
+  def __init__(self, axis, nines=5, **kwargs):
+    mscale.ScaleBase.__init__(self, axis)
+    assert nines >= 0, 'nines must be >= 0'
+    self.nines = int(nines)
+
+  def get_transform(self):
+    return PercentileScale.PercentileTransform(self.nines)
+
+  def set_default_locators_and_formatters(self, axis):
+    axis.set_major_locator(PercentileScale.Locator(self.nines))
+    axis.set_major_formatter(PercentileScale.Formatter())
+    axis.set_minor_locator(mticker.NullLocator())
+
+  def limit_range_for_scale(self, vmin, vmax, minpos):
+    return vmin, min(1 - 10 ** -self.nines, vmax)
+
+  @staticmethod
+  @functools.lru_cache(maxsize=None)
+  def ticks(nines):
+    """
+    This returns the ticks (0, 0.9, 0.99, ...) of an axis of 'nines' nines as a
+    read-only array.
+    """
+    values = 1 - 10.0 ** -numpy.arange(nines + 1)
+    values.setflags(write=False)
+    return values
+
+  class Locator(mticker.Locator):
+    """
+    This class places the (cached) ticks of an axis of 'nines' nines that lie
+    within the view.
+    """
+
+    def __init__(self, nines):
+      self.nines = nines
+
+    def __call__(self):
+      vmin, vmax = self.axis.get_view_interval()
+      return self.tick_values(vmin, vmax)
+
+    def tick_values(self, vmin, vmax):
+      if vmin > vmax:
+        vmin, vmax = vmax, vmin
+      ticks = PercentileScale.ticks(self.nines)
+      lo, hi = numpy.searchsorted(ticks, [vmin, vmax * (1 + 1e-12)])
+      return ticks[lo:hi]
+
+  class Formatter(mticker.Formatter):
+    """
+    This class labels the major ticks by their nines (e.g., '0.999').
+    """
+
+    def __call__(self, x, pos=None):
+      if x >= 1:
+        return ''
+      nines = -numpy.log10(1 - x)
+      if abs(nines - round(nines)) > 1e-6:
+        return '{:g}'.format(x)
+      nines = int(round(nines))
+      return '0.' + '9' * nines if nines > 0 else '0'
+
+  class PercentileTransform(mtransforms.Transform):
+    input_dims = 1
+    output_dims = 1
+    is_separable = True
+    has_inverse = True
+
+    def __init__(self, nines):
+      mtransforms.Transform.__init__(self)
+      self.nines = nines
+      self._floor = 10.0 ** -(nines + 1)
+
+    def transform_non_affine(self, a):
+      return -numpy.log10(numpy.maximum(1 - numpy.asarray(a, dtype=float),
+                                        self._floor))
+
+    def inverted(self):
+      return PercentileScale.InvertedPercentileTransform(self.nines)
+
+  class InvertedPercentileTransform(mtransforms.Transform):
+    input_dims = 1
+    output_dims = 1
+    is_separable = True
+    has_inverse = True
+
+    def __init__(self, nines):
+      mtransforms.Transform.__init__(self)
+      self.nines = nines
+
+    def transform_non_affine(self, a):
+      return 1 - numpy.power(10.0, -numpy.asarray(a, dtype=float))
+
+    def inverted(self):
+      return PercentileScale.PercentileTransform(self.nines)
+
+
+mscale.register_scale(PercentileScale)
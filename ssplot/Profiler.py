@@ -0,0 +1,193 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+
+class Profiler(object):
+  """
+  This records the wall time, CPU time, peak RSS growth, and peak traced
+  memory of the named stages of a command. Stages are entered with
+  Profiler.stage(name) which does nothing unless a Profiler is active.
+  Nested stages are recorded under 'outer/inner' names and repeated stages
+  are accumulated.
+
+  CPU time includes finished child processes (e.g., parse workers). Traced
+  memory only covers allocations made by this process.
+  """
+
+  # the active profiler, if any
+  _active = None
+
+  def __init__(self, trace_memory=True, cprofile=None):
+    self._trace_memory = trace_memory
+    self._cprofile = cprofile
+    self._profile = None
+    self._path = []
+    self._frames = []
+    self.stages = {}
+
+  def start(self):
+    """
+    This makes this profiler the active one.
+    """
+    assert Profiler._active is None, 'a profiler is already active'
+    Profiler._active = self
+    if self._trace_memory:
+      tracemalloc.start()
+    if self._cprofile is not None:
+      self._profile = cProfile.Profile()
+      self._profile.enable()
+
+  def stop(self):
+    """
+    This deactivates this profiler and writes the cProfile dump if requested.
+    """
+    assert Profiler._active is self, 'this profiler is not active'
+    if self._profile is not None:
+      self._profile.disable()
+      self._profile.dump_stats(self._cprofile)
+      self._profile = None
+    if self._trace_memory:
+      tracemalloc.stop()
+    Profiler._active = None
+
+  @staticmethod
+  def active():
+    return Profiler._active
+
+  @staticmethod
+  @contextlib.contextmanager
+  def stage(name):
+    """
+    This records the enclosed code as the named stage of the active profiler.
+    """
+    profiler = Profiler._active
+    if profiler is None:
+      yield
+      return
+    profiler._path.append(name)
+    key = '/'.join(profiler._path)
+    entry = profiler._entry(key)
+    if profiler._trace_memory:
+      # outer stages keep their peaks across the reset
+      traced_start, peak = tracemalloc.get_traced_memory()
+      for frame in profiler._frames:
+        frame[1] = max(frame[1], peak)
+      profiler._frames.append([traced_start, traced_start])
+      tracemalloc.reset_peak()
+    rss_start = Profiler._max_rss()
+    wall_start = time.perf_counter()
+    cpu_start = Profiler._cpu_time()
+    try:
+      yield
+    finally:
+      cpu = Profiler._cpu_time() - cpu_start
+      wall = time.perf_counter() - wall_start
+      rss = Profiler._max_rss() - rss_start
+      traced = None
+      if profiler._trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in profiler._frames:
+          frame[1] = max(frame[1], peak)
+        traced_start, peak = profiler._frames.pop()
+        traced = peak - traced_start
+      profiler._path.pop()
+      entry['calls'] += 1
+      entry['wall'] += wall
+      entry['cpu'] += cpu
+      entry['rss'] = max(entry['rss'], rss)
+      if traced is not None:
+        entry['traced'] = max(entry['traced'] or 0, traced)
+
+  @staticmethod
+  def staged(name):
+    """
+    This returns a decorator recording calls of a function as the named stage.
+    """
+    def decorator(func):
+      @functools.wraps(func)
+      def wrapper(*args, **kwargs):
+        with Profiler.stage(name):
+          return func(*args, **kwargs)
+      return wrapper
+    return decorator
+
+  def _entry(self, key):
+    # stages are reported in the order they are first entered
+    if key not in self.stages:
+      self.stages[key] = {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'rss': 0,
+                          'traced': None}
+    return self.stages[key]
+
+  @staticmethod
+  def _cpu_time():
+    times = os.times()
+    return times.user + times.system + times.children_user + \
+      times.children_system
+
+  @staticmethod
+  def _max_rss():
+    # peak resident set size in bytes
+    if resource is None:
+      return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+  def report(self, filename=None):
+    """
+    This writes the stage report as a table to stderr or as JSON to a file.
+    """
+    if filename is not None:
+      with open(filename, 'w') as fd:
+        json.dump({'stages': self.stages}, fd, indent=2)
+      return
+    print('{:<32} {:>6} {:>10} {:>10} {:>10} {:>10}'.format(
+      'stage', 'calls', 'wall s', 'cpu s', 'rss MB', 'traced MB'),
+          file=sys.stderr)
+    for key, entry in self.stages.items():
+      traced = '-' if entry['traced'] is None else \
+        '{:.1f}'.format(entry['traced'] / 1e6)
+      print('{:<32} {:>6} {:>10.3f} {:>10.3f} {:>10.1f} {:>10}'.format(
+        key, entry['calls'], entry['wall'], entry['cpu'], entry['rss'] / 1e6,
+        traced), file=sys.stderr)
@@ -0,0 +1,171 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import concurrent.futures
+import matplotlib
+import numbers
+import numpy
+import os
+import re
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+class RasterVariants(object):
+  """
+  This class writes extra raster variants (e.g., a thumbnail, a screen-size
+  image, and a print quality image) of every plot file saved while it is
+  active (see start()). Each variant is given as 'name=WIDTH' (in pixels) or
+  'name=DPIdpi' and is written next to the plot file as '<plot>_<name><ext>'
+  in the raster format of the plot file (PNG for vector plot files).
+
+  The figure is drawn once at the highest resolution needed and every raster
+  output, including a raster plot file itself, is downscaled from that buffer
+  (each from the next larger output). The outputs are encoded by parallel
+  threads (Pillow releases the GIL while encoding). Pillow is only imported
+  when variants are saved.
+  """
+
+  # Pillow formats of the raster file extensions
+  FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.tif': 'TIFF',
+             '.tiff': 'TIFF', '.webp': 'WEBP'}
+
+  # the active variants, if any
+  _active = None
+
+  def __init__(self, variants):
+    # a list of (name, width, dpi) with either width or dpi set
+    assert len(variants) > 0, 'no variants given'
+    self.variants = variants
+
+  @staticmethod
+  def parse(value):
+    """
+    This parses a comma separated list of variants (e.g.,
+    'thumb=320,screen=1280,print=300dpi').
+    """
+    variants = []
+    for item in value.split(','):
+      match = re.fullmatch(r'\s*(\w+)\s*=\s*(\d+(?:\.\d*)?)\s*(dpi)?\s*', item)
+      if match is None or float(match.group(2)) <= 0:
+        raise ValueError('invalid raster variant: {}'.format(item))
+      name, size, dpi = match.groups()
+      if dpi:
+        variants.append((name, None, float(size)))
+      else:
+        variants.append((name, int(float(size)), None))
+    names = [v[0] for v in variants]
+    if len(set(names)) != len(names):
+      raise ValueError('duplicate raster variant names: {}'.format(value))
+    return RasterVariants(variants)
+
+  def start(self):
+    """
+    This makes these variants the active ones.
+    """
+    RasterVariants._active = self
+
+  def stop(self):
+    """
+    This deactivates these variants.
+    """
+    assert RasterVariants._active is self, 'these variants are not active'
+    RasterVariants._active = None
+
+  @staticmethod
+  def active():
+    return RasterVariants._active
+
+  def save(self, fig, plotfile, ext, kwargs):
+    """
+    This saves a figure to a plot file (see save_figure()) and its variants.
+    """
+    from PIL import Image
+
+    # vector plot files are saved as usual
+    base = os.path.splitext(plotfile)[0]
+    fmt = RasterVariants.FORMATS.get(ext)
+    dpi = matplotlib.rcParams['savefig.dpi']
+    if not isinstance(dpi, numbers.Number):
+      dpi = fig.dpi
+    outputs = []
+    if fmt is None:
+      fig.savefig(plotfile, **kwargs)
+      fmt = 'PNG'
+      ext = '.png'
+    else:
+      outputs.append((plotfile, dpi))
+
+    # the resolution of each raster output
+    for name, width, vdpi in self.variants:
+      if vdpi is None:
+        vdpi = width / fig.get_figwidth()
+      outputs.append(('{}_{}{}'.format(base, name, ext), vdpi))
+
+    # draw once at the highest resolution and downscale each output from the
+    # next larger one
+    outputs.sort(key=lambda output: output[1], reverse=True)
+    image = Image.fromarray(RasterVariants.render(fig, outputs[0][1]))
+    width, height = image.size
+    images = []
+    for filename, vdpi in outputs:
+      scale = vdpi / outputs[0][1]
+      size = (max(1, int(round(width * scale))),
+              max(1, int(round(height * scale))))
+      if size != image.size:
+        image = image.resize(size, Image.LANCZOS, reducing_gap=2.0)
+      images.append(image)
+
+    # encode in parallel
+    with concurrent.futures.ThreadPoolExecutor(len(outputs)) as pool:
+      list(pool.map(RasterVariants._write, images,
+                    [filename for filename, _ in outputs], [fmt] * len(outputs),
+                    [vdpi for _, vdpi in outputs]))
+
+  @staticmethod
+  def render(fig, dpi):
+    """
+    This draws a figure at a resolution into an RGBA NumPy array.
+    """
+    original = fig.dpi
+    fig.dpi = dpi
+    try:
+      canvas = FigureCanvasAgg(fig)
+      canvas.draw()
+      return numpy.array(canvas.buffer_rgba())
+    finally:
+      fig.dpi = original
+
+  @staticmethod
+  def _write(image, filename, fmt, dpi):
+    # encodes one raster output
+    if fmt == 'JPEG':
+      image = image.convert('RGB')
+    image.save(filename, fmt, dpi=(dpi, dpi))
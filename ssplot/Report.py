@@ -0,0 +1,482 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import html
+import io
+import json
+import numpy
+import os
+import re
+import time
+import urllib.parse
+
+import ssplot
+
+class Report(ssplot.CommandLine):
+  """
+  This class is a command line interface to generate the plots of a whole
+  results tree and a static HTML index of them.
+
+  Every file is classified by its first line: raw latency files and latency
+  sketches, latency, rate, and hops stats grids, time series grids, and
+  simulation info files. The stats grids of a directory whose names only
+  differ in numbers form load sweeps: the last number that varies is the load
+  and the other varying numbers (e.g., data set and seed) separate the sweeps.
+  Each plot is made by the regular ssplot command and is only redrawn when it
+  is older than its inputs or its command changed.
+  """
+
+  NAME = 'report'
+  ALIASES = ['rpt']
+
+  # the manifest of rendered plots kept in the output directory
+  MANIFEST = 'report.json'
+
+  # the name of the thumbnail variant (see RasterVariants)
+  THUMBNAIL = 'thumb'
+
+  # the plots made of each kind of file
+  LATENCY_PLOTS = ['latency-percentile', 'latency-cdf', 'latency-pdf']
+  SWEEP_PLOTS = {'latency': ['load-latency'],
+                 'rate': ['load-rate'],
+                 'hops': ['load-average-hops', 'load-percent-minimal']}
+  TIME_PLOTS = {'time_latency': ['time-latency'],
+                'time_hops': ['time-average-hops', 'time-percent-minimal']}
+
+  # extensions of files that are never inputs
+  _SKIP_EXTS = ('.png', '.jpg', '.jpeg', '.pdf', '.svg', '.svgz', '.eps',
+                '.ps', '.html', '.htm', '.json', '.txt', '.md', '.log', '.py',
+                '.sh')
+  _COMPRESSED_EXTS = ('.gz', '.bz2', '.xz', '.zst', '.lz4')
+  _NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+  # the number of lines read to classify a file
+  _CLASSIFY_LINES = 32
+
+  @staticmethod
+  def create_parser(subparser):
+    sp = subparser.add_parser(Report.NAME,
+                              aliases=Report.ALIASES,
+                              help=('Generate the plots of a results tree '
+                                    'and an HTML index of them'))
+    sp.set_defaults(func=Report.run_command)
+
+    sp.add_argument('results', type=str,
+                    help='results directory to scan')
+    sp.add_argument('output', type=str,
+                    help='output directory of the plots and index.html')
+    sp.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                    help='number of processes rendering plots')
+    sp.add_argument('--force', action='store_true',
+                    help='redraw all plots even if they are up to date')
+    sp.add_argument('--verbose', action='store_true',
+                    help='print the progress of the report')
+    sp.add_argument('--title', type=str, default=None,
+                    help='the title of the index (default: the directory)')
+    sp.add_argument('--thumbnail_width', type=int, default=320,
+                    help='the width of the thumbnails in pixels')
+    sp.add_argument('--preview', type=int, default=1000000,
+                    help=('the number of samples of each raw latency file '
+                          'plotted (<= 0 for all)'))
+
+  @staticmethod
+  def run_command(args, plt):
+    # check inputs
+    if not os.path.isdir(args.results):
+      print('{} is not a directory'.format(args.results))
+      return -1
+    if args.thumbnail_width <= 0:
+      print('thumbnail_width must be > 0')
+      return -1
+    os.makedirs(args.output, exist_ok=True)
+
+    # find the inputs and plan the plots
+    with ssplot.Profiler.stage('scan'):
+      files = Report.scan(args.results, args.output)
+      jobs = Report.plan(files, args.results, args.output, args.preview)
+
+    # only redraw the plots that are out of date
+    manifest = Report._read_manifest(args.output)
+    stale = [job for job in jobs
+             if args.force or not Report._up_to_date(job, manifest)]
+    if args.verbose:
+      print('{} plots of {} inputs, {} to draw'.format(
+        sum(len(job['outputs']) for job in jobs),
+        sum(len(kind_files) for kind_files in files.values()),
+        sum(len(job['outputs']) for job in stale)))
+
+    # draw in parallel
+    thumbnails = 'thumb={}'.format(args.thumbnail_width)
+    errors = {}
+    with ssplot.Profiler.stage('render'):
+      if args.workers <= 1 or len(stale) <= 1:
+        results = [Report._render(job, thumbnails, plt) for job in stale]
+      else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=args.workers) as pool:
+          results = list(pool.map(Report._render, stale,
+                                  [thumbnails] * len(stale)))
+    for job, error in zip(stale, results):
+      key = job['outputs'][0]
+      if error is None:
+        manifest[key] = job['argvs']
+      else:
+        manifest.pop(key, None)
+        errors[key] = error
+
+    # write the index
+    Report._write_manifest(args.output, manifest)
+    title = args.title or os.path.basename(os.path.abspath(args.results))
+    Report.write_index(os.path.join(args.output, 'index.html'), title, jobs,
+                       errors, args.output)
+    failed = sum(len(job['outputs']) for job in stale
+                 if job['outputs'][0] in errors)
+    if args.verbose or failed > 0:
+      print('{} drawn, {} failed, index: {}'.format(
+        sum(len(job['outputs']) for job in stale) - failed, failed,
+        os.path.join(args.output, 'index.html')))
+    return 0
+
+  @staticmethod
+  def scan(results, output):
+    """
+    This walks a results tree and returns a dict of the files of each kind
+    (see classify()), in natural order. The output directory is skipped.
+    """
+    output = os.path.abspath(output)
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(results):
+      dirnames[:] = sorted(
+        (d for d in dirnames if not d.startswith('.') and
+         os.path.abspath(os.path.join(dirpath, d)) != output),
+        key=ssplot.SweepIndex.natural_key)
+      for name in sorted(filenames, key=ssplot.SweepIndex.natural_key):
+        if (name.startswith('.') or name.lower().endswith(Report._SKIP_EXTS)
+            or ssplot.SweepIndex._is_sidecar(name)):
+          continue
+        filename = os.path.join(dirpath, name)
+        kind = Report.classify(filename)
+        if kind is not None:
+          files.setdefault(kind, []).append(filename)
+    return files
+
+  @staticmethod
+  def classify(filename):
+    """
+    This returns the kind of a file from its first lines: 'raw' (latency
+    samples or sketches), 'latency', 'rate', or 'hops' (stats grids),
+    'time_latency' or 'time_hops' (time series grids), 'info' (simulation
+    info), or None. Grids are recognized by the fields their commands read
+    and time series by their numeric row names.
+    """
+    try:
+      with ssplot.InputOpener.open(filename) as fd:
+        lines = [fd.readline(4096) for _ in range(Report._CLASSIFY_LINES)]
+    except Exception:
+      return None
+    lines = [line.decode('utf-8', 'replace').strip() for line in lines]
+    lines = [line for line in lines if line]
+    if len(lines) == 0:
+      return None
+    if lines[0].startswith('{'):
+      return 'raw' if ssplot.LatencySketch.is_sketch(filename) else None
+    rows = [[cell.strip() for cell in line.split(',')] for line in lines]
+
+    # stats grids
+    columns = rows[0][1:]
+    timed = len(rows) > 1 and Report._is_number(rows[1][0])
+    if all(field in columns for field in ssplot.LoadLatencyStats.FIELDS):
+      return 'time_latency' if timed else 'latency'
+    if all(field in columns for field in ssplot.LoadHopsStats.FIELDS):
+      return 'time_hops' if timed else 'hops'
+    if 'delivered' in columns and timed:
+      return 'rate'
+
+    # raw latency files start with the start and end times of a sample
+    if len(rows[0]) >= 2 and all(Report._is_number(cell)
+                                 for cell in rows[0][:2]):
+      return 'raw'
+
+    # simulation info holds the simulated time
+    for row in rows:
+      if (len(row) == 2 and row[0] == 'Total sim units' and
+          Report._is_number(row[1])):
+        return 'info'
+    return None
+
+  @staticmethod
+  def sweeps(filenames):
+    """
+    This groups stats grids into load sweeps and returns a list of (label,
+    start, stop, step, files). Files are grouped by directory and by their
+    names with all numbers masked. Within a group, the last number that varies
+    is the load and the other varying numbers separate the sweeps. Sweeps
+    with fewer than two loads or uneven load steps are skipped.
+    """
+    groups = {}
+    for filename in filenames:
+      dirname, name = os.path.split(filename)
+      numbers = Report._NUMBER.findall(name)
+      if len(numbers) > 0:
+        key = (dirname, Report._NUMBER.sub('#', name))
+        groups.setdefault(key, []).append((numbers, filename))
+
+    sweeps = []
+    for members in groups.values():
+      varying = [idx for idx in range(len(members[0][0]))
+                 if len({numbers[idx] for numbers, _ in members}) > 1]
+      if len(varying) == 0:
+        continue
+      load = varying[-1]
+      split = {}
+      for numbers, filename in members:
+        key = tuple(numbers[idx] for idx in varying[:-1])
+        split.setdefault(key, []).append((float(numbers[load]), numbers,
+                                          filename))
+      for points in split.values():
+        points.sort(key=lambda point: point[0])
+        loads = numpy.array([point[0] for point in points])
+        steps = numpy.diff(loads)
+        if len(loads) < 2 or steps[0] <= 0 or not numpy.allclose(
+            steps, steps[0], rtol=1e-6, atol=0):
+          continue
+        numbers = list(points[0][1])
+        numbers[load] = 'X'
+        label = Report._NUMBER.sub(lambda _: numbers.pop(0),
+                                   os.path.basename(points[0][2]))
+        sweeps.append((label, float(loads[0]),
+                       float(loads[-1] + steps[0] / 2), float(steps[0]),
+                       [point[2] for point in points]))
+    return sweeps
+
+  @staticmethod
+  def plan(files, results, output, preview):
+    """
+    This returns the jobs drawing all plots of the classified files. Each job
+    is a dict of its 'argvs' (ssplot commands sharing one read of the inputs),
+    'outputs', 'inputs', and index 'section' and 'label'.
+    """
+    jobs = []
+    bases = set()
+
+    def add(inputs, label, commands, argv):
+      section = os.path.relpath(os.path.dirname(inputs[0]), results)
+      # keeps the extensions, then counts, when stems repeat in a section
+      names = [Report._sanitize(label)]
+      if len(inputs) == 1:
+        names.append(Report._sanitize(os.path.basename(inputs[0])))
+      base = next((os.path.join(output, section, name) for name in names
+                   if os.path.join(output, section, name) not in bases), None)
+      count = 2
+      while base is None or base in bases:
+        base = os.path.join(output, section, '{}_{}'.format(names[0], count))
+        count += 1
+      bases.add(base)
+      outputs = ['{}.{}.png'.format(base, command) for command in commands]
+      jobs.append({'argvs': [argv(command, out) for command, out in
+                             zip(commands, outputs)],
+                   'outputs': outputs, 'inputs': inputs,
+                   'section': section, 'label': label})
+
+    # raw latency files
+    for filename in files.get('raw', []):
+      extra = ['--preview', str(preview)] if preview > 0 else []
+      add([filename], Report._stem(filename), Report.LATENCY_PLOTS,
+          lambda command, out: [command, filename, out] + extra)
+
+    # load sweeps
+    for kind, commands in Report.SWEEP_PLOTS.items():
+      for label, start, stop, step, inputs in Report.sweeps(
+          files.get(kind, [])):
+        add(inputs, Report._stem(label), commands,
+            lambda command, out: ([command, out, repr(start), repr(stop),
+                                   repr(step)] + inputs))
+
+    # time series
+    for kind, commands in Report.TIME_PLOTS.items():
+      for filename in files.get(kind, []):
+        add([filename], Report._stem(filename), commands,
+            lambda command, out: [command, filename, out])
+
+    # simulated times of each directory
+    infos = {}
+    for filename in files.get('info', []):
+      infos.setdefault(os.path.dirname(filename), []).append(filename)
+    for inputs in infos.values():
+      add(inputs, 'simtime', ['simtime-compare'],
+          lambda command, out: [command, out, str(len(inputs)), '1'] + inputs)
+
+    return jobs
+
+  @staticmethod
+  def write_index(filename, title, jobs, errors, output):
+    """
+    This writes the HTML index of the plots of all jobs, one section per
+    results directory.
+    """
+    sections = {}
+    for job in jobs:
+      sections.setdefault(job['section'], []).append(job)
+
+    def href(path):
+      rel = os.path.relpath(path, output).replace(os.sep, '/')
+      return urllib.parse.quote(rel)
+
+    lines = ['<!DOCTYPE html>', '<html>', '<head>', '<meta charset="utf-8">',
+             '<title>{}</title>'.format(html.escape(title)), '<style>',
+             'body { font-family: sans-serif; margin: 1em 2em; }',
+             'figure { display: inline-block; margin: 0.5em; '
+             'vertical-align: top; }',
+             'figcaption { font-size: small; max-width: 320px; '
+             'word-wrap: break-word; }',
+             '.error { color: red; white-space: pre-wrap; }',
+             '</style>', '</head>', '<body>',
+             '<h1>{}</h1>'.format(html.escape(title)),
+             '<p>Generated {}</p>'.format(
+               html.escape(time.strftime('%Y-%m-%d %H:%M:%S')))]
+    for section in sorted(sections, key=ssplot.SweepIndex.natural_key):
+      lines.append('<h2>{}</h2>'.format(
+        html.escape(section if section != os.curdir else '(top level)')))
+      for job in sections[section]:
+        error = errors.get(job['outputs'][0])
+        if error is not None:
+          lines.append('<p class="error">{}: {}</p>'.format(
+            html.escape(job['label']), html.escape(error)))
+          continue
+        for out, argv in zip(job['outputs'], job['argvs']):
+          thumb = Report._thumbnail(out)
+          lines.append(
+            '<figure><a href="{0}"><img src="{1}" alt="{2}"></a>'
+            '<figcaption>{2}<br>{3}</figcaption></figure>'.format(
+              href(out), href(thumb), html.escape(argv[0]),
+              html.escape(job['label'])))
+    lines += ['</body>', '</html>']
+    with open(filename, 'w') as fd:
+      fd.write('\n'.join(lines) + '\n')
+
+  @staticmethod
+  def _render(job, thumbnails, plt=None):
+    # draws the plots of one job, returning None or an error message
+    if plt is None:
+      import matplotlib.pyplot as plt
+    parser = Report._parser()
+    variants = ssplot.RasterVariants.parse(thumbnails)
+    variants.start()
+    stats = None
+    out = io.StringIO()
+    try:
+      with contextlib.redirect_stdout(out):
+        for argv, plotfile in zip(job['argvs'], job['outputs']):
+          os.makedirs(os.path.dirname(plotfile), exist_ok=True)
+          args = parser.parse_args(argv)
+          if argv[0] in Report.LATENCY_PLOTS:
+            # the latency plots of one file share one read
+            if stats is None:
+              stats = ssplot.LatencyPlot.read_stats(
+                args.ifile, accuracy=args.sketch_accuracy,
+                preview=args.preview)
+            ssplot.LatencyPlot(plt, argv[0], stats).plot(args.plotfile, args)
+          elif args.func(args, plt) not in (None, 0):
+            return out.getvalue().strip() or 'failed'
+    except SystemExit:
+      return out.getvalue().strip() or 'invalid arguments'
+    except Exception as ex:
+      return '{}: {}'.format(type(ex).__name__, ex)
+    finally:
+      variants.stop()
+      plt.close('all')
+    return None
+
+  @staticmethod
+  def _parser():
+    # a parser of all ssplot commands (see bin/ssplot)
+    ap = argparse.ArgumentParser(prog='ssplot')
+    sp = ap.add_subparsers(dest='cmd')
+    for cls in ssplot.CommandLine.command_lines():
+      cls.create_parser(sp)
+    return ap
+
+  @staticmethod
+  def _up_to_date(job, manifest):
+    # whether the plots of a job are newer than its inputs with the same argvs
+    if manifest.get(job['outputs'][0]) != job['argvs']:
+      return False
+    try:
+      newest = max(os.path.getmtime(f) for f in job['inputs'])
+      oldest = min(os.path.getmtime(f) for out in job['outputs']
+                   for f in (out, Report._thumbnail(out)))
+    except OSError:
+      return False
+    return oldest >= newest
+
+  @staticmethod
+  def _read_manifest(output):
+    try:
+      with open(os.path.join(output, Report.MANIFEST), 'r') as fd:
+        return json.load(fd)
+    except (OSError, ValueError):
+      return {}
+
+  @staticmethod
+  def _write_manifest(output, manifest):
+    with open(os.path.join(output, Report.MANIFEST), 'w') as fd:
+      json.dump(manifest, fd, indent=1, sort_keys=True)
+
+  @staticmethod
+  def _thumbnail(plotfile):
+    base, ext = os.path.splitext(plotfile)
+    return '{}_{}{}'.format(base, Report.THUMBNAIL, ext)
+
+  @staticmethod
+  def _stem(name):
+    # the base name without data and compression extensions
+    name = os.path.basename(name)
+    if name.lower().endswith(Report._COMPRESSED_EXTS):
+      name = os.path.splitext(name)[0]
+    return os.path.splitext(name)[0] or name
+
+  @staticmethod
+  def _sanitize(label):
+    return re.sub(r'[^\w.\-]+', '_', label)
+
+  @staticmethod
+  def _is_number(text):
+    try:
+      float(text)
+      return True
+    except ValueError:
+      return False
+
+
+ssplot.CommandLine.register(Report)
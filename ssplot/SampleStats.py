@@ -29,66 +29,74 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
-import gzip
+import concurrent.futures
 import math
 import numpy
-import percentile
+import os
 import random
 
+import ssplot
+
 class SampleStats(object):
   """
   Sample statistics for a single simulation run.
+
+  In preview mode only a uniform reservoir sample of 'preview' samples is kept
+  for plotting. The minimum, maximum, and count stay exact, percentiles whose
+  rank lies within the largest 'preview' samples are exact, and all other
+  percentiles come from a 'LatencySketch' within its relative accuracy (held
+  in 'accuracy', which is None for exact percentiles).
+
+  Otherwise the file is split into ranges (see split()) which are parsed by up
+  to 'workers' processes. Each worker returns the partial statistics of its
+  range (count, extremes, and its samples as a sorted run) which are combined
+  without sorting the raw data again. The times of the samples are only kept
+  if 'keep_times' is set (e.g., for scatter plots), in which case 'times' and
+  'samples' are not ordered by time. Otherwise 'times' is None and 'samples'
+  is sorted.
   """
 
-  def __init__(self, filename, allow_negative=False):
+  # the number of samples per chunk yielded by read_chunks()
+  CHUNK_SIZE = 1 << 20
+
+  # the minimum number of bytes given to each worker by split()
+  MIN_SPLIT_SIZE = 4 << 20
+
+  def __init__(self, filename, allow_negative=False, preview=None, tmin=None,
+               tmax=None, time_ordered=False, index=False, workers=1,
+               keep_times=True):
     # read in raw data
-    self.times = []
-    self.samples = []
-    opener = gzip.open if filename.endswith('.gz') else open
-    with opener(filename, 'rb') as fd:
-      while True:
-        line = fd.readline().decode('utf-8')
-        delim = line.find(',')
-        if (delim >= 0):
-          cols = line.split(',')
-          startTime = float(cols[0])
-          endTime = float(cols[1])
-          self.times.append(startTime)
-          self.samples.append(endTime - startTime)
-        else:
-          break
-      self.times = numpy.array(self.times)
-      self.samples = numpy.array(self.samples)
-      assert len(self.times) == len(self.samples)
+    with ssplot.Profiler.stage('parse'):
+      if preview is None:
+        self._read_full(filename, tmin, tmax, time_ordered, index, workers,
+                        keep_times)
+      else:
+        self._read_preview(filename, preview, tmin, tmax, time_ordered, index)
 
-    # size
-    self.size = len(self.times)
-    if self.size > 0:
-      # min and max
-      self.tmin = min(self.times)
-      self.tmax = max(self.times)
-      self.smin = min(self.samples)
-      self.smax = max(self.samples)
-      if allow_negative:
-        assert self.smin >= 0, 'samples can not be negative'
-
-      # compute the probability density function
-      try:
-        hist, self.pdfx = numpy.histogram(self.samples, density=True, bins='auto')
-      except:
-        hist, self.pdfx = numpy.histogram(self.samples, density=True)
-      self.pdfy = hist.astype(float) / hist.sum()
-
-      # compute the cumulative distribution function
-      self.cdfx = numpy.sort(self.samples)
-      self.cdfy = numpy.linspace(1.0 / self.size, 1.0, self.size)
-
-      # find percentiles
-      self.p50 = self.percentile(0.50)
-      self.p90 = self.percentile(0.90)
-      self.p99 = self.percentile(0.99)
-      self.p999 = self.percentile(0.999)
-      self.p9999 = self.percentile(0.9999)
+    # compute statistics
+    with ssplot.Profiler.stage('stats'):
+      self.sampled = self.count > self.size
+      self.accuracy = self._sketch.accuracy if self.sampled else None
+      if self.size > 0:
+        if allow_negative:
+          assert self.smin >= 0, 'samples can not be negative'
+
+        # compute the probability density function
+        try:
+          hist, self.pdfx = numpy.histogram(self.cdfx, density=True, bins='auto')
+        except:
+          hist, self.pdfx = numpy.histogram(self.cdfx, density=True)
+        self.pdfy = hist.astype(float) / hist.sum()
+
+        # compute the cumulative distribution function
+        self.cdfy = numpy.linspace(1.0 / self.size, 1.0, self.size)
+
+        # find percentiles
+        self.p50 = self.percentile(0.50)
+        self.p90 = self.percentile(0.90)
+        self.p99 = self.percentile(0.99)
+        self.p999 = self.percentile(0.999)
+        self.p9999 = self.percentile(0.9999)
 
   def percentile(self, percent):
     """
@@ -96,6 +104,12 @@ class SampleStats(object):
     """
     if percent < 0 or percent > 1:
       raise Exception('percent must be between 0 and 1')
+    if self.sampled:
+      rank = min(self.count - 1, int(round(percent * self.count)))
+      tail_rank = rank - (self.count - len(self._tail))
+      if tail_rank >= 0:
+        return self._tail[tail_rank]
+      return self._sketch.percentile(percent)
     index = int(round(percent * len(self.cdfx)))
     index = min(len(self.cdfy) - 1, index)
     return self.cdfx[index]
@@ -110,3 +124,256 @@ class SampleStats(object):
     else:
       nines = 5
     return nines
+
+  @staticmethod
+  def read_chunks(filename, chunk_size=None, tmin=None, tmax=None,
+                  time_ordered=False, index=False, byte_range=None):
+    """
+    This generator reads a latency file and yields (times, samples) numpy arrays
+    holding at most 'chunk_size' samples each. Samples starting outside of
+    [tmin, tmax] are dropped while parsing. If the file is ordered by time
+    ('time_ordered'), reading stops at the first sample after 'tmax'. If
+    'index' is set, gzip files are read using a 'GzipIndex' which is built on
+    the first full read. If 'byte_range' is given (see split()), only that
+    range of the uncompressed file is read.
+    """
+    if chunk_size is None:
+      chunk_size = SampleStats.CHUNK_SIZE
+    assert chunk_size > 0, 'chunk_size must be > 0'
+
+    # use or build the random-access index
+    gzindex = None
+    builder = None
+    if index and ssplot.InputOpener.format(filename) == 'gzip':
+      gzindex = ssplot.GzipIndex.read(filename)
+      if gzindex is None and byte_range is None:
+        builder = ssplot.GzipIndex(filename)
+    if gzindex is not None:
+      ranges = gzindex.ranges(tmin, tmax)
+      if byte_range is not None:
+        ranges = [(max(start, byte_range[0]), min(end, byte_range[1]))
+                  for start, end in ranges
+                  if start < byte_range[1] and end > byte_range[0]]
+      fd = ssplot.GzipIndex.open(filename)
+    else:
+      ranges = [byte_range if byte_range is not None else (0, None)]
+      fd = ssplot.InputOpener.open(filename)
+
+    times = []
+    samples = []
+    with fd:
+      for offset, raw in SampleStats._read_lines(fd, ranges):
+        line = raw.decode('utf-8')
+        delim = line.find(',')
+        if (delim >= 0):
+          cols = line.split(',')
+          startTime = float(cols[0])
+          if builder is not None:
+            builder.add_line(offset, len(raw), startTime)
+          if tmax is not None and startTime > tmax:
+            if time_ordered and builder is None:
+              break
+            continue
+          if tmin is not None and startTime < tmin:
+            continue
+          endTime = float(cols[1])
+          times.append(startTime)
+          samples.append(endTime - startTime)
+          if len(times) == chunk_size:
+            yield numpy.array(times), numpy.array(samples)
+            times = []
+            samples = []
+        else:
+          break
+    if builder is not None:
+      builder.write()
+    if len(times) > 0:
+      yield numpy.array(times), numpy.array(samples)
+
+  @staticmethod
+  def split(filename, parts, index=False):
+    """
+    This splits a latency file into at most 'parts' (start, end) byte ranges of
+    the uncompressed data which start on line boundaries. Compressed files can
+    only be split if they are gzip files with an existing 'GzipIndex'. A list
+    holding None (the whole file) is returned for files that can't be split.
+    """
+    assert parts > 0, 'parts must be > 0'
+    fmt = ssplot.InputOpener.format(filename)
+    if fmt == 'gzip':
+      gzindex = ssplot.GzipIndex.read(filename) if index else None
+      if gzindex is None or parts == 1 or len(gzindex.offsets) < 2:
+        return [None]
+      parts = min(parts, len(gzindex.offsets))
+      starts = [gzindex.offsets[len(gzindex.offsets) * idx // parts]
+                for idx in range(parts)]
+      return list(zip(starts, starts[1:] + [gzindex.length]))
+    elif fmt != 'plain':
+      return [None]
+
+    size = os.path.getsize(filename)
+    parts = max(1, min(parts, size // SampleStats.MIN_SPLIT_SIZE))
+    if parts == 1:
+      return [None]
+    starts = [0]
+    with open(filename, 'rb') as fd:
+      for idx in range(1, parts):
+        fd.seek(size * idx // parts)
+        fd.readline()
+        if fd.tell() > starts[-1] and fd.tell() < size:
+          starts.append(fd.tell())
+    return list(zip(starts, starts[1:] + [size]))
+
+  @staticmethod
+  def map_ranges(func, filename, workers, index, *args):
+    """
+    This splits a latency file into ranges and returns the results of calling
+    func(filename, byte_range, index, *args) for each range, in file order,
+    using up to 'workers' processes.
+    """
+    ranges = SampleStats.split(filename, workers, index)
+    if len(ranges) == 1:
+      return [func(filename, ranges[0], index, *args)]
+    count = len(ranges)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+      return list(pool.map(func, [filename] * count, ranges, [index] * count,
+                           *[[arg] * count for arg in args]))
+
+  @staticmethod
+  def merge_runs(runs):
+    """
+    This merges sorted arrays into one sorted array. NumPy's sort is used as
+    the merge since it is faster on concatenated runs than vectorized k-way
+    merges (e.g., by searchsorted()), which need random memory accesses.
+    """
+    runs = [run for run in runs if len(run) > 0]
+    if len(runs) == 0:
+      return numpy.array([])
+    if len(runs) == 1:
+      return runs[0]
+    merged = numpy.concatenate(runs)
+    merged.sort()
+    return merged
+
+  def _read_full(self, filename, tmin, tmax, time_ordered, index, workers,
+                 keep_times):
+    # combines the partial statistics of all ranges of a file
+    parts = [part for part in SampleStats.map_ranges(
+      SampleStats._read_range, filename, workers, index, tmin, tmax,
+      time_ordered, keep_times) if part['count'] > 0]
+    self.count = sum(part['count'] for part in parts)
+    self.size = self.count
+    if self.count > 0:
+      self.tmin = min(part['tmin'] for part in parts)
+      self.tmax = max(part['tmax'] for part in parts)
+      self.smin = min(part['smin'] for part in parts)
+      self.smax = max(part['smax'] for part in parts)
+    self.cdfx = SampleStats.merge_runs([part['run'] for part in parts])
+    if keep_times:
+      self.times = SampleStats._concatenate(
+        [part['times'] for part in parts])
+      self.samples = SampleStats._concatenate(
+        [part['run'] for part in parts])
+    else:
+      self.times = None
+      self.samples = self.cdfx
+
+  @staticmethod
+  def _read_range(filename, byte_range, index, tmin, tmax, time_ordered,
+                  keep_times):
+    # returns the partial statistics of one range of a file: its count,
+    # extremes, samples as a sorted run, and their times if 'keep_times'
+    times = []
+    samples = []
+    for ctimes, csamples in SampleStats.read_chunks(
+        filename, tmin=tmin, tmax=tmax, time_ordered=time_ordered,
+        index=index, byte_range=byte_range):
+      if keep_times:
+        times.append(ctimes)
+      else:
+        times.append(numpy.array([ctimes.min(), ctimes.max()]))
+      samples.append(csamples)
+    times = SampleStats._concatenate(times)
+    samples = SampleStats._concatenate(samples)
+    part = {'count': len(samples), 'times': None}
+    if len(samples) == 0:
+      part['run'] = samples
+      return part
+    part['tmin'] = times.min()
+    part['tmax'] = times.max()
+    if keep_times:
+      order = numpy.argsort(samples)
+      part['run'] = samples[order]
+      part['times'] = times[order]
+    else:
+      part['run'] = numpy.sort(samples)
+    part['smin'] = part['run'][0]
+    part['smax'] = part['run'][-1]
+    return part
+
+  @staticmethod
+  def _concatenate(arrays):
+    return numpy.concatenate(arrays) if arrays else numpy.array([])
+
+  @staticmethod
+  def _read_lines(fd, ranges):
+    # yields the (offset, line) of all lines within the uncompressed ranges
+    offset = 0
+    for start, end in ranges:
+      if offset != start:
+        fd.seek(start)
+        offset = start
+      while end is None or offset < end:
+        raw = fd.readline()
+        if len(raw) == 0:
+          return
+        yield offset, raw
+        offset += len(raw)
+
+  def _read_preview(self, filename, size, tmin, tmax, time_ordered, index):
+    # keeps a uniform reservoir sample, the exact largest samples, and a sketch
+    assert size > 0, 'preview size must be > 0'
+    rng = numpy.random.default_rng()
+    times = numpy.empty(size)
+    samples = numpy.empty(size)
+    tail = numpy.empty(0)
+    sketch = ssplot.LatencySketch()
+    count = 0
+    for ctimes, csamples in SampleStats.read_chunks(
+        filename, tmin=tmin, tmax=tmax, time_ordered=time_ordered,
+        index=index):
+      sketch.add(csamples, ctimes)
+
+      # fill the reservoir
+      fill = max(0, min(size - count, len(csamples)))
+      times[count : count + fill] = ctimes[:fill]
+      samples[count : count + fill] = csamples[:fill]
+
+      # sample i replaces a random reservoir entry with probability size/(i+1)
+      positions = numpy.arange(count + fill, count + len(csamples))
+      keep = rng.random(len(positions)) * (positions + 1) < size
+      slots = rng.integers(0, size, numpy.count_nonzero(keep))
+      times[slots] = ctimes[fill:][keep]
+      samples[slots] = csamples[fill:][keep]
+      count += len(csamples)
+
+      # keep the largest samples exactly
+      tail = numpy.concatenate([tail, csamples])
+      if len(tail) > size:
+        tail = numpy.partition(tail, len(tail) - size)[len(tail) - size:]
+
+    # order the reservoir by time
+    used = min(count, size)
+    order = numpy.argsort(times[:used], kind='stable')
+    self.times = times[:used][order]
+    self.samples = samples[:used][order]
+    self.cdfx = numpy.sort(self.samples)
+    self.count = count
+    self.size = used
+    if count > 0:
+      self.tmin = sketch.tmin
+      self.tmax = sketch.tmax
+      self.smin = sketch.smin
+      self.smax = sketch.smax
+    self._sketch = sketch
+    self._tail = numpy.sort(tail)
@@ -30,7 +30,6 @@
 """
 
 import numpy
-import handycsv
 
 import ssplot
 
@@ -45,6 +44,7 @@ class SimTimeCompare(ssplot.CommandLine):
   _SKIP = ()#('xlabel', 'ylabel')
 
   DATA_MODES = ['straight', 'set_normalize', 'label_normalize']
+  ERROR_BARS = ['stddev', 'minmax', 'none']
 
   @staticmethod
   def create_parser(subparser):
@@ -67,17 +67,27 @@ class SimTimeCompare(ssplot.CommandLine):
                     help='set the mode for data manipulation')
     sp.add_argument('--data_set_labels', type=str, action='append',
                     help='labels for the data sets')
+    sp.add_argument('--seeds', type=int, default=1,
+                    help='number of seeds (consecutive stats) of each data '
+                    'point, which are averaged')
+    sp.add_argument('--error_bars', type=str,
+                    default=SimTimeCompare.ERROR_BARS[0],
+                    choices=SimTimeCompare.ERROR_BARS,
+                    help='the error bars shown across seeds')
+    sp.add_argument('--workers', type=int, default=1,
+                    help='number of processes used to read the stats')
     sp.add_argument('stats', metavar='F', type=str, nargs='+',
-                    help='simulation info stats to parse')
+                    help=('simulation info stats to parse (ordered by bar, '
+                          'then data set, then seed)'))
 
     ssplot.MultibarPlot.add_args(sp, *SimTimeCompare._SKIP)
 
   @staticmethod
   def run_command(args, plt):
     # check inputs
-    if len(args.stats) != (args.data_set_size * args.num_data_sets):
-      print('invalid number of stats, expected {}'.format(
-        args.data_set_size * args.num_data_sets))
+    num_stats = args.data_set_size * args.num_data_sets * args.seeds
+    if len(args.stats) != num_stats:
+      print('invalid number of stats, expected {}'.format(num_stats))
       return -1
     if (args.data_set_labels is not None and
         len(args.data_set_labels) != args.num_data_sets):
@@ -85,48 +95,45 @@ class SimTimeCompare(ssplot.CommandLine):
         len(args.data_set_labels), args.num_data_sets))
       return -1
 
-    # read in all stats
-    ydatas = [[float('NaN')] * args.num_data_sets
-              for x in range(args.data_set_size)]
-    for idx, stat in enumerate(args.stats):
-      # parse the data
-      cstats = handycsv.ColumnStats.read(stat)
-      simtime = cstats.get('Total sim units')
-
-      # scale the data
-      simtime *= args.scalar
-
-      # place the data
-      block = idx // args.num_data_sets
-      offset = idx % args.num_data_sets
-      ydatas[block][offset] = simtime
+    # read in all stats as a (configurations x sets x seeds) array
+    simtimes = SimTimeCompare.read_simtimes(args.stats, args.workers)
+    data = simtimes.reshape(
+      args.data_set_size, args.num_data_sets, args.seeds) * args.scalar
 
     # manipulate the data based on the mode
     if args.data_mode == 'straight':
       # do nothing
       pass
     elif args.data_mode == 'set_normalize':
-      # normalize each set to the set's maximum value
-      for offset in range(args.num_data_sets):
-        max_value = max([ydatas[block][offset]
-                         for block in range(args.data_set_size)])
-        for block in range(args.data_set_size):
-          ydatas[block][offset] = ydatas[block][offset] / max_value * 100.0
+      # normalize each set to the set's maximum (seed averaged) value
+      max_values = data.mean(axis=2).max(axis=0)
+      data = data / max_values[None, :, None] * 100.0
     elif args.data_mode == 'label_normalize':
       # normalize each value relative to the set label
-      if len(args.data_set_labels) != args.num_data_sets:
+      if args.data_set_labels is None:
         print('data set labels must be given for label normalize mode')
         return -1
-      for offset in range(args.num_data_sets):
-        try:
-          div = float(args.data_set_labels[offset])
-        except TypeError as ex:
-          print('numeric data set labels must be given for label normalize '
-                'mode')
-          print(ex)
-          return -1
-        for block in range(args.data_set_size):
-          ydatas[block][offset] = ydatas[block][offset] / div
+      try:
+        divs = numpy.array([float(x) for x in args.data_set_labels])
+      except ValueError as ex:
+        print('numeric data set labels must be given for label normalize '
+              'mode')
+        print(ex)
+        return -1
+      data = data / divs[None, :, None]
+    else:
+      assert False, 'programmer error :('
+
+    # aggregate across seeds
+    ydatas = data.mean(axis=2)
+    if data.shape[2] < 2 or args.error_bars == 'none':
+      yerr = None
+    elif args.error_bars == 'stddev':
+      # the sample standard deviation, as in ssplot.seed_reduce()
+      yerr = data.std(axis=2, ddof=1)
+    elif args.error_bars == 'minmax':
+      yerr = numpy.stack((ydatas - data.min(axis=2),
+                          data.max(axis=2) - ydatas), axis=1)
     else:
       assert False, 'programmer error :('
 
@@ -136,10 +143,27 @@ class SimTimeCompare(ssplot.CommandLine):
     else:
       xdata = args.data_set_labels
     mbp = ssplot.MultibarPlot(plt, xdata, ydatas)
+    mbp.set_yerr(yerr)
     mbp.apply_args(args, *SimTimeCompare._SKIP)
     mbp.plot(args.plotfile)
 
     return 0
 
+  @staticmethod
+  def read_simtimes(filenames, workers=1):
+    """
+    This reads the simulated time of each simulation info file into an array,
+    using up to 'workers' processes.
+    """
+    simtimes = ssplot.InputOpener.read_many(SimTimeCompare._read_simtime,
+                                            filenames, workers)
+    return numpy.array(simtimes, dtype=float)
+
+  @staticmethod
+  def _read_simtime(filename):
+    # reads the simulated time of one simulation info file
+    cstats = ssplot.InputOpener.read_column_stats(filename)
+    return float(cstats.get('Total sim units'))
+
 
 ssplot.CommandLine.register(SimTimeCompare)
@@ -0,0 +1,98 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import math
+import numpy
+
+import ssplot
+
+class SketchStats(object):
+  """
+  Approximate sample statistics built from a 'LatencySketch'. This provides the
+  same distribution attributes as 'SampleStats' (but not the raw times and
+  samples) so that merged summaries can be drawn by 'LatencyPlot'. Percentiles
+  are within the relative 'accuracy' of the sketch.
+  """
+
+  # the maximum number of bins used for the probability density function
+  PDF_BINS = 200
+
+  @ssplot.Profiler.staged('stats')
+  def __init__(self, sketch):
+    self.sketch = sketch
+
+    # size
+    self.size = sketch.count
+    self.count = sketch.count
+    self.sampled = False
+    self.accuracy = sketch.accuracy
+    if self.size > 0:
+      # min and max
+      self.tmin = sketch.tmin
+      self.tmax = sketch.tmax
+      self.smin = sketch.smin
+      self.smax = sketch.smax
+
+      # compute the probability density function by rebinning the buckets
+      values, counts = sketch.distribution()
+      bins = min(len(values), SketchStats.PDF_BINS)
+      srange = (self.smin, self.smax) if self.smin < self.smax else None
+      hist, self.pdfx = numpy.histogram(values, bins=bins, range=srange,
+                                        weights=counts)
+      self.pdfy = hist.astype(float) / hist.sum()
+
+      # compute the cumulative distribution function
+      self.cdfx = values
+      self.cdfy = numpy.cumsum(counts) / self.size
+
+      # find percentiles
+      self.p50 = self.percentile(0.50)
+      self.p90 = self.percentile(0.90)
+      self.p99 = self.percentile(0.99)
+      self.p999 = self.percentile(0.999)
+      self.p9999 = self.percentile(0.9999)
+
+  def percentile(self, percent):
+    """
+    This function retrieves an approximate sample percentile.
+    """
+    return self.sketch.percentile(percent)
+
+  def nines(self):
+    """
+    This computes the number of nines needed to represent the percentile
+    distribution.
+    """
+    if self.size > 0:
+      nines = int(math.ceil(math.log10(self.size)))
+    else:
+      nines = 5
+    return nines
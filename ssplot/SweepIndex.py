@@ -0,0 +1,235 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import fnmatch
+import glob
+import numpy
+import os
+import re
+
+import ssplot
+
+class SweepIndex(object):
+  """
+  This class builds the ordered list of stats files of load sweeps. Each input
+  is either a file, a directory (all files in it), a glob pattern, or an
+  '@filelist' (a file listing one file per line). Each directory is scanned
+  once, so the files never have to be enumerated on the command line. The
+  sidecar files written by ssplot (e.g., gzip indices) are skipped.
+
+  Given a regex, only the files whose path matches it are used. Its named
+  groups 'set', 'seed', and 'load' extract the data set, seed, and load keys,
+  and the files are ordered by data set and seed (in natural order), then by
+  load. Each seed of a data set is thereby a whole sweep.
+  """
+
+  # a decimal number within a file name
+  _NUMBER = re.compile(r'(\d+(?:\.\d+)?)')
+
+  def __init__(self, inputs, regex=None):
+    # expand all inputs in order
+    files = []
+    for inp in inputs:
+      files.extend(SweepIndex.expand(inp))
+
+    # without a regex the order is kept
+    self.sets = None
+    self.loads = None
+    if regex is None:
+      self.files = files
+      return
+
+    # extract the keys of each file
+    pattern = re.compile(regex)
+    has_set = 'set' in pattern.groupindex
+    has_seed = 'seed' in pattern.groupindex
+    has_load = 'load' in pattern.groupindex
+    keyed = []
+    for filename in files:
+      match = pattern.search(filename)
+      if match is None:
+        continue
+      set_key = match.group('set') if has_set else ''
+      seed_key = match.group('seed') if has_seed else ''
+      load = float(match.group('load')) if has_load else 0.0
+      keyed.append((SweepIndex.natural_key(set_key),
+                    SweepIndex.natural_key(seed_key), load, set_key,
+                    filename))
+    keyed.sort(key=lambda k: k[:3])
+
+    # build the ordered index
+    self.files = [k[4] for k in keyed]
+    if has_set:
+      self._file_sets = [k[3] for k in keyed]
+      self.sets = []
+      for set_key in self._file_sets:
+        if len(self.sets) == 0 or self.sets[-1] != set_key:
+          self.sets.append(set_key)
+    if has_load:
+      self.loads = [k[2] for k in keyed]
+
+  def __len__(self):
+    return len(self.files)
+
+  def groups(self, count=None):
+    """
+    This returns the files of each data set as a list of lists. Without 'set'
+    keys the files are split into 'count' equal data sets.
+    """
+    if self.sets is None:
+      count = 1 if count is None else count
+      assert len(self.files) % count == 0, 'uneven data sets'
+      size = len(self.files) // count
+      return [self.files[idx * size : (idx + 1) * size]
+              for idx in range(count)]
+    groups = {set_key: [] for set_key in self.sets}
+    for set_key, filename in zip(self._file_sets, self.files):
+      groups[set_key].append(filename)
+    return [groups[set_key] for set_key in self.sets]
+
+  def check_loads(self, start, stop, step, seeds=1):
+    """
+    This checks that the extracted loads of each data set are 'seeds' sweeps
+    from 'start' to 'stop' (exclusive) by 'step'. Without extracted loads, the
+    files must be whole sweeps and, if every file name contains a load of the
+    sweep, each must contain the load of its position.
+    """
+    expected = numpy.tile(numpy.arange(start, stop, step), seeds)
+    if self.loads is None:
+      if len(expected) == 0 or len(self.files) % len(expected) != 0:
+        raise ValueError('{} files are not whole sweeps of {} loads'.format(
+          len(self.files), len(expected)))
+      loads = numpy.tile(expected, len(self.files) // len(expected))
+      named = [SweepIndex._named_loads(filename, expected)
+               for filename in self.files]
+      if all(len(n) > 0 for n in named):
+        for filename, load, names in zip(self.files, loads, named):
+          if not numpy.isclose(names, load).any():
+            raise ValueError(('{} is not in the position of a load {} file '
+                              '(order the files or give a regex)').format(
+                                filename, load))
+      return
+    idx = 0
+    for group in self.groups():
+      loads = numpy.array(self.loads[idx : idx + len(group)])
+      idx += len(group)
+      if len(loads) != len(expected) or not numpy.allclose(loads, expected):
+        raise ValueError('loads {} do not match the sweep {}'.format(
+          loads.tolist(), expected.tolist()))
+
+  @staticmethod
+  def expand(inp):
+    """
+    This expands one input into its list of files.
+    """
+    if inp.startswith('@'):
+      with open(inp[1:], 'r') as fd:
+        files = [line.strip() for line in fd]
+      return [f for f in files if f and not f.startswith('#')]
+    if os.path.isdir(inp):
+      files = SweepIndex._scan(inp, '*')
+    elif glob.has_magic(inp):
+      dirname, basename = os.path.split(inp)
+      if glob.has_magic(dirname):
+        files = sorted((f for f in glob.glob(inp)
+                        if not SweepIndex._is_sidecar(f)),
+                       key=SweepIndex.natural_key)
+      else:
+        files = SweepIndex._scan(dirname, basename)
+    else:
+      return [inp]
+    if len(files) == 0:
+      raise ValueError('no files found for {}'.format(inp))
+    return files
+
+  @staticmethod
+  def _scan(dirname, basename):
+    # scans a directory once for the files matching a pattern
+    names = []
+    with os.scandir(dirname or os.curdir) as it:
+      for entry in it:
+        if (entry.is_file() and fnmatch.fnmatchcase(entry.name, basename) and
+            not SweepIndex._is_sidecar(entry.name)):
+          names.append(entry.name)
+    names.sort(key=SweepIndex.natural_key)
+    return [os.path.join(dirname, name) for name in names]
+
+  @staticmethod
+  def _is_sidecar(filename):
+    # whether a file is a sidecar written by ssplot
+    return filename.endswith((ssplot.GzipIndex.SUFFIX,
+                              ssplot.GzipIndex.ZRAN_SUFFIX,
+                              ssplot.LatencySketch.CACHE_SUFFIX))
+
+  @staticmethod
+  def natural_key(text):
+    """
+    This is a sort key that orders the numbers within text numerically.
+    """
+    parts = SweepIndex._NUMBER.split(text)
+    return [float(t) if idx % 2 else t for idx, t in enumerate(parts)]
+
+  @staticmethod
+  def _named_loads(filename, loads):
+    # the numbers in the base name of a file that are loads of a sweep
+    numbers = [float(n) for n in
+               SweepIndex._NUMBER.findall(os.path.basename(filename))]
+    return [n for n in numbers if numpy.isclose(n, loads).any()]
+
+  @staticmethod
+  def add_args(parser, bands=True):
+    """
+    This adds the sweep input arguments to a parser. Commands that don't draw
+    confidence bands across seeds pass 'bands' as False.
+    """
+    parser.add_argument('--stats_regex', type=str, default=None,
+                        help=('regex selecting the stats files, whose named '
+                              'groups \'set\', \'seed\', and \'load\' '
+                              'order them'))
+    parser.add_argument('--seeds', type=int, default=1,
+                        help=('number of seeds of each load, given as whole '
+                              'sweeps one after the other'))
+    if bands:
+      parser.add_argument('--confidence', type=float, default=0.95,
+                          help=('the confidence level of the bands across '
+                                'seeds'))
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes used to read the stats')
+
+  @staticmethod
+  def from_args(args, inputs):
+    """
+    This creates the SweepIndex of inputs given the parsed arguments, checking
+    the loads against the sweep.
+    """
+    index = SweepIndex(inputs, args.stats_regex)
+    index.check_loads(args.start, args.stop, args.step, args.seeds)
+    return index
@@ -29,7 +29,6 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
-import handycsv
 import numpy
 
 import ssplot
@@ -63,7 +62,7 @@ class TimeAverageHops(ssplot.CommandLine):
   @staticmethod
   def run_command(args, plt):
     # create a sample stats object of latencies
-    stats = handycsv.GridStats.read(args.ifile)
+    stats = ssplot.InputOpener.read_grid_stats(args.ifile)
 
     # determine the fields and data labels to plot
     fields = ['AveMinHops', 'AveHops', 'AveNonMinHops']
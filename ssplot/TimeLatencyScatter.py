@@ -57,7 +57,11 @@ class TimeLatencyScatter(ssplot.CommandLine):
   @staticmethod
   def run_command(args, plt):
     # create a sample stats object of latencies
-    lstats = ssplot.SampleStats(args.ifile)
+    lstats = ssplot.SampleStats(args.ifile, preview=args.preview,
+                                tmin=args.tmin, tmax=args.tmax,
+                                time_ordered=args.time_ordered,
+                                index=args.gzip_index,
+                                workers=args.workers)
 
     # plot
     lp = ssplot.LatencyPlot(plt, TimeLatencyScatter.NAME, lstats)
@@ -29,7 +29,6 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
-import handycsv
 import numpy
 
 import ssplot
@@ -61,7 +60,7 @@ class TimePercentMinimal(ssplot.CommandLine):
   @staticmethod
   def run_command(args, plt):
     # create a sample stats object of latencies
-    stats = handycsv.GridStats.read(args.ifile)
+    stats = ssplot.InputOpener.read_grid_stats(args.ifile)
 
     # determine the fields and data labels to plot
     fields = ['PerMinimal', 'PerNonMinimal']
@@ -0,0 +1,141 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import numpy
+
+import ssplot
+
+class TimePercentile(ssplot.CommandLine):
+  """
+  This class is a command line interface to generate a time vs. latency plot
+  of windowed percentiles computed from a raw latency file.
+  """
+
+  NAME = 'time-percentile'
+  ALIASES = ['timeperc', 'tpt']
+  _SKIP = ('xlabel', 'ylabel', 'data_labels')
+
+  PERCENTILES = [50.0, 99.0, 99.9]
+
+  @staticmethod
+  def create_parser(subparser):
+    sp = subparser.add_parser(TimePercentile.NAME,
+                              aliases=TimePercentile.ALIASES,
+                              help=('Generate a time vs. latency percentile '
+                                    'plot from a raw latency file'))
+    sp.set_defaults(func=TimePercentile.run_command)
+
+    sp.add_argument('ifile',
+                    help='input latency file')
+    sp.add_argument('plotfile',
+                    help='output plot file')
+    sp.add_argument('window', type=float,
+                    help='the length of time of each window')
+
+    sp.add_argument('--step', type=float, default=None,
+                    help=('the time between windows, a divisor of the window '
+                          '(default: the window, i.e., tumbling windows)'))
+    sp.add_argument('--percentiles', type=float, action='append',
+                    help=('a percentile to plot (e.g., 99.95), default: {}'
+                          .format(', '.join('{:g}'.format(p) for p in
+                                            TimePercentile.PERCENTILES))))
+    sp.add_argument('--accuracy', type=float,
+                    default=ssplot.LatencySketch.DEFAULT_ACCURACY,
+                    help='relative accuracy of the percentiles')
+    sp.add_argument('--tmin', type=float, default=None,
+                    help=('drop samples that start before this time (also '
+                          'the start of the first window)'))
+    sp.add_argument('--tmax', type=float, default=None,
+                    help='drop samples that start after this time')
+    sp.add_argument('--time_ordered', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not the input is ordered by time '
+                          '(stops reading after --tmax)'))
+    sp.add_argument('--gzip_index', type=ssplot.str_to_bool, default='n',
+                    help=('whether or not to use (and build on first read) a '
+                          'random-access index of gzip inputs'))
+    sp.add_argument('--workers', type=int, default=1,
+                    help='number of processes used to parse the input')
+    sp.add_argument('--latency_units', default=None,
+                    help='latency units')
+
+    ssplot.MultilinePlot.add_args(sp, *TimePercentile._SKIP)
+
+  @staticmethod
+  def run_command(args, plt):
+    # check inputs
+    step = args.window if args.step is None else args.step
+    if args.window <= 0 or step <= 0:
+      print('the window and step must be > 0')
+      return -1
+    slots = int(round(args.window / step))
+    if slots < 1 or not numpy.isclose(slots * step, args.window):
+      print('the step must divide the window')
+      return -1
+    percentiles = args.percentiles or TimePercentile.PERCENTILES
+    for percentile in percentiles:
+      if not 0 <= percentile <= 100:
+        print('percentiles must be between 0 and 100')
+        return -1
+
+    # count the samples of each step in one streaming pass
+    origin = 0.0 if args.tmin is None else args.tmin
+    with ssplot.Profiler.stage('parse'):
+      sketch = ssplot.WindowSketch.summarize(
+        args.ifile, step, origin, args.accuracy, args.tmin, args.tmax,
+        args.time_ordered, args.gzip_index, args.workers)
+
+    # compute the percentiles of all windows at once, placed at window ends
+    with ssplot.Profiler.stage('stats'):
+      ydatas = []
+      for percentile in reversed(sorted(percentiles)):
+        starts, values = sketch.percentiles(percentile / 100.0, slots)
+        ydatas.append(values)
+      xdata = starts + args.window
+    labels = ['{:g}th%'.format(p) for p in reversed(sorted(percentiles))]
+
+    # create x and y axis labels
+    xlabel = 'Time'
+    ylabel = 'Latency'
+    if args.latency_units:
+      ylabel += ' ({0})'.format(args.latency_units)
+
+    # plot
+    mlp = ssplot.MultilinePlot(plt, xdata, ydatas)
+    mlp.set_xlabel(xlabel)
+    mlp.set_ylabel(ylabel)
+    mlp.set_data_labels(labels)
+    mlp.apply_args(args, *TimePercentile._SKIP)
+    mlp.plot(args.plotfile)
+
+    return 0
+
+
+ssplot.CommandLine.register(TimePercentile)
@@ -0,0 +1,247 @@
+"""
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions are met:
+ *
+ * - Redistributions of source code must retain the above copyright notice, this
+ * list of conditions and the following disclaimer.
+ *
+ * - Redistributions in binary form must reproduce the above copyright notice,
+ * this list of conditions and the following disclaimer in the documentation
+ * and/or other materials provided with the distribution.
+ *
+ * - Neither the name of prim nor the names of its contributors may be used to
+ * endorse or promote products derived from this software without specific prior
+ * written permission.
+ *
+ * See the NOTICE file distributed with this work for additional information
+ * regarding copyright ownership.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+ * AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+ * IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+ * ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+ * LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+ * CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+ * SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+ * INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+ * CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ * ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import math
+import numpy
+
+import ssplot
+
+class WindowSketch(object):
+  """
+  This class is a mergeable summary of a latency distribution over time. Time
+  is cut into slots of 'width' starting at 'origin' and the samples of each
+  slot are counted in the logarithmic buckets of a 'LatencySketch' with the
+  same accuracy, so all slots are held in one (slots x buckets) grid of counts
+  that is filled by vectorized bincounts. Windows spanning several slots are
+  sums of consecutive slots (see windows()).
+
+  Values closer to zero than LatencySketch.MIN_VALUE (including negative
+  values) are counted as zero. The count, minimum, and maximum of each slot are
+  exact and percentiles have the error bound of a 'LatencySketch'.
+  """
+
+  def __init__(self, width, origin=0.0,
+               accuracy=ssplot.LatencySketch.DEFAULT_ACCURACY):
+    assert width > 0, 'width must be > 0'
+    assert 0 < accuracy < 1, 'accuracy must be between 0 and 1'
+    self.width = width
+    self.origin = origin
+    self.accuracy = accuracy
+    self._gamma = (1 + accuracy) / (1 - accuracy)
+    self._log_gamma = math.log(self._gamma)
+    self.count = 0
+
+    # column 0 counts zeros, column c > 0 counts bucket c - 1 + bucket_offset
+    self.slot_offset = 0
+    self.bucket_offset = 0
+    self.counts = numpy.zeros((0, 1), dtype=numpy.int64)
+    self.smins = numpy.zeros(0)
+    self.smaxs = numpy.zeros(0)
+
+  def add(self, samples, times):
+    """
+    This adds arrays of samples and their times to the sketch.
+    """
+    samples = numpy.asarray(samples, dtype=float)
+    times = numpy.asarray(times, dtype=float)
+    assert times.size == samples.size, 'times and samples must match'
+    if samples.size == 0:
+      return
+
+    # slot and bucket of each sample
+    slots = numpy.floor((times - self.origin) / self.width).astype(
+      numpy.int64)
+    positive = samples >= ssplot.LatencySketch.MIN_VALUE
+    buckets = numpy.zeros(samples.size, dtype=numpy.int64)
+    buckets[positive] = numpy.ceil(
+      numpy.log(samples[positive]) / self._log_gamma).astype(numpy.int64)
+
+    # count the (slot, bucket) pairs of this chunk in a local grid
+    slot_offset = int(slots.min())
+    nslots = int(slots.max()) - slot_offset + 1
+    if numpy.any(positive):
+      bucket_offset = int(buckets[positive].min())
+      ncols = int(buckets[positive].max()) - bucket_offset + 2
+    else:
+      bucket_offset = self.bucket_offset
+      ncols = 1
+    cols = numpy.where(positive, buckets - bucket_offset + 1, 0)
+    cells = (slots - slot_offset) * ncols + cols
+    counts = numpy.bincount(cells, minlength=nslots * ncols).reshape(
+      nslots, ncols)
+    smins = numpy.full(nslots, numpy.inf)
+    smaxs = numpy.full(nslots, -numpy.inf)
+    numpy.minimum.at(smins, slots - slot_offset, samples)
+    numpy.maximum.at(smaxs, slots - slot_offset, samples)
+
+    local = WindowSketch(self.width, self.origin, self.accuracy)
+    local.count = samples.size
+    local.slot_offset = slot_offset
+    local.bucket_offset = bucket_offset
+    local.counts = counts
+    local.smins = smins
+    local.smaxs = smaxs
+    self.merge(local)
+
+  def merge(self, other):
+    """
+    This merges another sketch into this sketch.
+    """
+    if not isinstance(other, WindowSketch):
+      raise TypeError('can only merge a WindowSketch')
+    if (other.accuracy != self.accuracy or other.width != self.width or
+        other.origin != self.origin):
+      raise ValueError('can not merge window sketches with different '
+                       'accuracies, widths, or origins')
+    if other.count == 0:
+      return self
+    if self.count == 0:
+      self.count = other.count
+      self.slot_offset = other.slot_offset
+      self.bucket_offset = other.bucket_offset
+      self.counts = other.counts.copy()
+      self.smins = other.smins.copy()
+      self.smaxs = other.smaxs.copy()
+      return self
+
+    # grow the grid to cover both sketches
+    slot_offset = min(self.slot_offset, other.slot_offset)
+    slot_end = max(self.slot_offset + len(self.smins),
+                   other.slot_offset + len(other.smins))
+    bucketed = [s for s in (self, other) if s.counts.shape[1] > 1] or [self]
+    bucket_offset = min(s.bucket_offset for s in bucketed)
+    bucket_end = max(s.bucket_offset + s.counts.shape[1] for s in bucketed)
+    counts = numpy.zeros((slot_end - slot_offset, bucket_end - bucket_offset),
+                         dtype=numpy.int64)
+    smins = numpy.full(slot_end - slot_offset, numpy.inf)
+    smaxs = numpy.full(slot_end - slot_offset, -numpy.inf)
+    for sketch in (self, other):
+      rows = slice(sketch.slot_offset - slot_offset,
+                   sketch.slot_offset - slot_offset + len(sketch.smins))
+      cols = slice(sketch.bucket_offset - bucket_offset + 1,
+                   sketch.bucket_offset - bucket_offset +
+                   sketch.counts.shape[1])
+      counts[rows, 0] += sketch.counts[:, 0]
+      counts[rows, cols] += sketch.counts[:, 1:]
+      smins[rows] = numpy.minimum(smins[rows], sketch.smins)
+      smaxs[rows] = numpy.maximum(smaxs[rows], sketch.smaxs)
+
+    self.count += other.count
+    self.slot_offset = slot_offset
+    self.bucket_offset = bucket_offset
+    self.counts = counts
+    self.smins = smins
+    self.smaxs = smaxs
+    return self
+
+  def windows(self, slots=1):
+    """
+    This returns the (starts, counts, smins, smaxs) arrays of all windows of
+    'slots' consecutive slots, one window per slot (tumbling windows for 1
+    slot, rolling windows otherwise). Windows lacking samples have an infinite
+    minimum and maximum.
+    """
+    assert slots > 0, 'slots must be > 0'
+    total = len(self.smins)
+    if total < slots:
+      return (numpy.zeros(0), numpy.zeros((0, self.counts.shape[1]),
+                                          dtype=numpy.int64),
+              numpy.zeros(0), numpy.zeros(0))
+    starts = self.origin + self.width * (
+      self.slot_offset + numpy.arange(total - slots + 1))
+    if slots == 1:
+      return starts, self.counts, self.smins, self.smaxs
+
+    # windowed sums from the running sum over slots
+    running = numpy.cumsum(self.counts, axis=0)
+    counts = running[slots - 1:].copy()
+    counts[1:] -= running[:-slots]
+    view = numpy.lib.stride_tricks.sliding_window_view
+    smins = view(self.smins, slots).min(axis=1)
+    smaxs = view(self.smaxs, slots).max(axis=1)
+    return starts, counts, smins, smaxs
+
+  def percentiles(self, percent, slots=1):
+    """
+    This returns the (starts, values) arrays of a percentile of each window
+    (see windows()). Windows without samples are NaN.
+    """
+    if percent < 0 or percent > 1:
+      raise Exception('percent must be between 0 and 1')
+    starts, counts, smins, smaxs = self.windows(slots)
+    sizes = counts.sum(axis=1)
+
+    # the bucket holding the rank of each window (see LatencySketch)
+    ranks = numpy.minimum(sizes - 1, numpy.round(percent * sizes))
+    index = numpy.count_nonzero(numpy.cumsum(counts, axis=1) <=
+                                ranks[:, None], axis=1)
+    index = numpy.minimum(index, counts.shape[1] - 1)
+    values = numpy.concatenate(([0.0], self._value(
+      self.bucket_offset + numpy.arange(counts.shape[1] - 1))))[index]
+
+    # exact extremes and clamping
+    values = numpy.where(ranks <= 0, smins, values)
+    values = numpy.where(ranks >= sizes - 1, smaxs, values)
+    values = numpy.clip(values, smins, smaxs)
+    values[sizes == 0] = float('NaN')
+    return starts, values
+
+  @staticmethod
+  def summarize(filename, width, origin=0.0,
+                accuracy=ssplot.LatencySketch.DEFAULT_ACCURACY, tmin=None,
+                tmax=None, time_ordered=False, index=False, workers=1):
+    """
+    This creates a window sketch from a raw latency file without holding all
+    samples in memory. The file is split into ranges which are summarized by up
+    to 'workers' processes and merged. See SampleStats.read_chunks() for the
+    other arguments.
+    """
+    sketch = WindowSketch(width, origin, accuracy)
+    for part in ssplot.SampleStats.map_ranges(
+        WindowSketch._summarize_range, filename, workers, index, width,
+        origin, accuracy, tmin, tmax, time_ordered):
+      sketch.merge(part)
+    return sketch
+
+  @staticmethod
+  def _summarize_range(filename, byte_range, index, width, origin, accuracy,
+                       tmin, tmax, time_ordered):
+    # summarizes one range of a raw latency file
+    sketch = WindowSketch(width, origin, accuracy)
+    for times, samples in ssplot.SampleStats.read_chunks(
+        filename, tmin=tmin, tmax=tmax, time_ordered=time_ordered,
+        index=index, byte_range=byte_range):
+      sketch.add(samples, times)
+    return sketch
+
+  def _value(self, indices):
+    # the representative value of each bucket index
+    return 2 * numpy.power(self._gamma, indices) / (self._gamma + 1)
@@ -35,7 +35,14 @@ from .utils import *
 from .consts import *
 
 # data classes
+from .Profiler import Profiler
+from .InputOpener import InputOpener
+from .GzipIndex import GzipIndex
+from .SweepIndex import SweepIndex
 from .SampleStats import SampleStats
+from .LatencySketch import LatencySketch
+from .WindowSketch import WindowSketch
+from .SketchStats import SketchStats
 from .LoadLatencyStats import LoadLatencyStats
 from .LoadRateStats import LoadRateStats
 from .LoadHopsStats import LoadHopsStats
@@ -45,9 +52,12 @@ from .PlotLineStyle import PlotLineStyle
 from .PlotBarStyle import PlotBarStyle
 from .GridStyle import GridStyle
 from .FigureSize import FigureSize
+from .PercentileScale import PercentileScale
+from .RasterVariants import RasterVariants
 from .LatencyPlot import LatencyPlot
 from .MultilinePlot import MultilinePlot
 from .MultibarPlot import MultibarPlot
+from .PanelPlot import PanelPlot
 
 # these are the commandline interfaces
 from .CommandLine import CommandLine
@@ -55,14 +65,20 @@ from .TimeLatencyScatter import TimeLatencyScatter
 from .LatencyPdf import LatencyPdf
 from .LatencyCdf import LatencyCdf
 from .LatencyPercentile import LatencyPercentile
+from .LatencySummary import LatencySummary
 from .LoadLatency import LoadLatency
 from .LoadLatencyCompare import LoadLatencyCompare
+from .LoadLatencyHeatmap import LoadLatencyHeatmap
+from .LoadPercentile import LoadPercentile
 from .LoadRate import LoadRate
 #from .LoadRateVariance import LoadRateVariance    # loadratevar lrv (MAYBE or StdDev)
 from .LoadRatePercent import LoadRatePercent
 from .LoadPercentMinimal import LoadPercentMinimal
 from .LoadAverageHops import LoadAverageHops
+from .LoadPanels import LoadPanels
 from .TimePercentMinimal import TimePercentMinimal
 from .TimeAverageHops import TimeAverageHops
 from .TimeLatency import TimeLatency
+from .TimePercentile import TimePercentile
 from .SimTimeCompare import SimTimeCompare
+from .Report import Report
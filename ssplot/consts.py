@@ -30,3 +30,12 @@
 """
 
 PLOT_TITLE_FONTSIZE = 20
+
+# plotted data with more points than this is rasterized in vector outputs
+RASTERIZE_THRESHOLD = 10000
+
+# the resolution of rasterized data in vector outputs
+RASTER_DPI = 300
+
+# file extensions of vector output formats
+VECTOR_FORMATS = ['.pdf', '.svg', '.svgz', '.eps', '.ps']
@@ -29,6 +29,16 @@
  * POSSIBILITY OF SUCH DAMAGE.
 """
 
+import math
+import matplotlib
+import numbers
+import numpy
+import os
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .consts import VECTOR_FORMATS
+
 def str_to_bool(strbool):
   assert isinstance(strbool, str)
   if strbool.lower() in ['true', 't', 'yes', 'y', '1']:
@@ -39,6 +49,78 @@ def str_to_bool(strbool):
     raise ValueError('invalid boolean string: {}'.format(strbool))
 
 
+def t_score(confidence, df):
+  """
+  This returns the two-sided Student's t critical value of a confidence level
+  with 'df' degrees of freedom (e.g., 2.776 for 0.95 and 4)
+  """
+  assert 0.0 < confidence < 1.0, 'confidence must be in (0, 1)'
+  assert df >= 1, 'df must be >= 1'
+
+  def coverage(theta):
+    # P(|T| < sqrt(df) * tan(theta)) (Abramowitz and Stegun 26.7.3-4)
+    sin = math.sin(theta)
+    cos2 = math.cos(theta) ** 2
+    term = math.cos(theta) if df % 2 == 1 else 1.0
+    total = 0.0
+    for power in range(df % 2, df - 1, 2):
+      total += term
+      term *= cos2 * (power + 1) / (power + 2)
+    if df % 2 == 1:
+      return (2.0 / math.pi) * (theta + sin * total)
+    return sin * total
+
+  # bisect the angle of the critical value
+  lo = 0.0
+  hi = math.pi / 2
+  for _ in range(64):
+    mid = (lo + hi) / 2
+    if coverage(mid) < confidence:
+      lo = mid
+    else:
+      hi = mid
+  return math.sqrt(df) * math.tan((lo + hi) / 2)
+
+
+def seed_reduce(values, confidence=0.95):
+  """
+  This reduces a (loads x seeds x fields) array over the seeds into the means
+  and the lower and upper bounds of their confidence intervals (each loads x
+  fields). The bounds are None without multiple seeds.
+  """
+  means = values.mean(axis=1)
+  seeds = values.shape[1]
+  if seeds < 2:
+    return means, None, None
+  half = (t_score(confidence, seeds - 1) * values.std(axis=1, ddof=1) /
+          math.sqrt(seeds))
+  return means, means - half, means + half
+
+
+def bootstrap_percentiles(stats, percents, confidence=0.95, resamples=10000,
+                          seed=None):
+  """
+  This returns the (lows, highs) arrays of the bootstrap confidence intervals
+  of percentiles of 'stats' (e.g., a 'SampleStats'). The k-th smallest of n
+  samples drawn with replacement is the empirical quantile of the k-th order
+  statistic of n uniforms, which is Beta(k, n - k + 1) distributed. All
+  resamples are drawn at once from that distribution, so the cost does not
+  depend on the number of samples.
+  """
+  assert 0.0 < confidence < 1.0, 'confidence must be in (0, 1)'
+  assert resamples > 0, 'resamples must be > 0'
+  n = stats.count
+  percents = numpy.asarray(percents, dtype=float)
+  ks = numpy.minimum(n, numpy.round(percents * n) + 1)
+  rng = numpy.random.default_rng(seed)
+  draws = rng.beta(ks, n - ks + 1, size=(resamples, len(ks)))
+  alpha = (1.0 - confidence) / 2
+  bounds = numpy.quantile(draws, [alpha, 1.0 - alpha], axis=0)
+  lows = numpy.array([stats.percentile(u) for u in bounds[0]])
+  highs = numpy.array([stats.percentile(u) for u in bounds[1]])
+  return lows, highs
+
+
 def empty_text(axes, x, y):
   """
   This generates an empty plot when data isn't available
@@ -46,3 +128,85 @@ def empty_text(axes, x, y):
   axes.text(x, y, 'No data', clip_on=False, color='red',
             verticalalignment='center',
             horizontalalignment='center')
+
+
+def sampled_text(axes, size, count):
+  """
+  This marks a plot that only shows a sample of the data
+  """
+  axes.text(0.01, 0.99, 'Preview: {:,} of {:,} samples'.format(size, count),
+            transform=axes.transAxes, color='red', fontweight='bold',
+            bbox={'facecolor': 'white', 'edgecolor': 'red'},
+            verticalalignment='top',
+            horizontalalignment='left')
+
+
+def rasterize(points, threshold):
+  """
+  This determines whether plotted data with this many points should be
+  rasterized (a negative threshold never rasterizes)
+  """
+  return threshold >= 0 and points > threshold
+
+
+def output_dpi(figwidth, plotfile=None, raster_dpi=None, format=None):
+  """
+  This returns the highest resolution at which save_figure() draws a figure
+  'figwidth' inches wide, including active 'RasterVariants', or the resolution
+  of figure_rgba() if no plot file is given (e.g., to decimate lines).
+  """
+  if plotfile is None:
+    return matplotlib.rcParams['figure.dpi']
+  ext = _extension(plotfile, format)
+  if raster_dpi is not None and ext in VECTOR_FORMATS:
+    dpi = raster_dpi
+  else:
+    dpi = matplotlib.rcParams['savefig.dpi']
+    if not isinstance(dpi, numbers.Number):
+      dpi = matplotlib.rcParams['figure.dpi']
+  from .RasterVariants import RasterVariants
+  variants = RasterVariants.active()
+  if variants is not None and isinstance(plotfile, str):
+    for _, width, vdpi in variants.variants:
+      dpi = max(dpi, vdpi if vdpi is not None else width / figwidth)
+  return dpi
+
+
+def save_figure(fig, plotfile, raster_dpi=None, format=None):
+  """
+  This saves a figure to a file name or file object, drawing rasterized data of
+  vector outputs at 'raster_dpi'. While 'RasterVariants' are active, the
+  variants of plot files are written too.
+  """
+  kwargs = {}
+  if format is not None:
+    kwargs['format'] = format
+  ext = _extension(plotfile, format)
+  if raster_dpi is not None and ext in VECTOR_FORMATS:
+    kwargs['dpi'] = raster_dpi
+  from .RasterVariants import RasterVariants
+  variants = RasterVariants.active()
+  if variants is not None and isinstance(plotfile, str):
+    variants.save(fig, plotfile, ext, kwargs)
+  else:
+    fig.savefig(plotfile, **kwargs)
+
+
+def figure_rgba(fig):
+  """
+  This renders a figure into an RGBA NumPy array (height x width x 4)
+  """
+  canvas = fig.canvas
+  if not hasattr(canvas, 'buffer_rgba'):
+    canvas = FigureCanvasAgg(fig)
+  canvas.draw()
+  return numpy.array(canvas.buffer_rgba())
+
+
+def _extension(plotfile, format):
+  # the lower case extension of the format or name of a plot file, if any
+  if format is not None:
+    return '.' + format.lower()
+  elif isinstance(plotfile, str):
+    return os.path.splitext(plotfile)[1].lower()
+  return None